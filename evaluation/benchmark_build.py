@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark of test case construction (--build-workers).
+
+Builds the test cases of a synthetic report, made of the entries of a real
+report repeated under fresh ids, with 1 to N worker processes and prints
+wall time, speedup and parallel efficiency against the serial build. Every
+parallel build is checked to give the same test cases in the same order.
+
+    python benchmark_build.py ./report/report_with_todo.json --entries 20000
+    python benchmark_build.py --entries 5000 --depth 3 --trace-scale 4 --max-workers 8
+
+--depth nests each trace this many extra internalRouterProcess levels and
+--trace-scale repeats its iterations, to model the deep traces of large
+suites where the trace walks dominate.
+"""
+import argparse
+import copy
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+from eval_framework import BUILD_WORKERS, load_report_data, build_test_cases_parallel
+from eval_framework.config import BUILD_CHUNK_SIZE
+from eval_framework.execution import test_case_fingerprint
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark parallel test case construction.")
+    parser.add_argument("report_path", nargs="?", default="./report/report_with_todo.json")
+    parser.add_argument("--entries", type=int, default=10_000, help="Entries of the synthetic report")
+    parser.add_argument("--depth", type=int, default=0, help="Extra internalRouterProcess levels per trace")
+    parser.add_argument("--trace-scale", type=int, default=1, help="Repeat each trace's iterations this often")
+    parser.add_argument("--max-workers", type=int, default=max(os.cpu_count() or 1, BUILD_WORKERS),
+                        help="Largest number of worker processes to measure")
+    parser.add_argument("--chunk-size", type=int, default=BUILD_CHUNK_SIZE, help="Entries per worker chunk")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count (best is reported)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    return parser.parse_args()
+
+
+def deepen(trace: Dict[str, Any], depth: int, scale: int) -> Dict[str, Any]:
+    """The trace with its iterations repeated `scale` times, nested `depth` relay agents deep."""
+    process = {key: value for key, value in trace.items() if key != "agentTools"}
+    process["iterationHistory"] = (trace.get("iterationHistory") or []) * scale
+    for level in range(depth):
+        process = {
+            "agentName": f"relay-{level}",
+            "iterationHistory": [{
+                "iteration": 0,
+                "structuredThought": {"functionCalls": [{
+                    "function": f"relay-{level}",
+                    "type": "agent",
+                    "args": {},
+                    "result": "",
+                    "internalRouterProcess": process,
+                }]},
+            }],
+        }
+    return {**process, "agentTools": trace.get("agentTools", [])}
+
+
+def synthetic_entries(entries: List[Dict[str, Any]], count: int, depth: int, scale: int) -> List[Dict[str, Any]]:
+    """`count` entries cycling through `entries` under unique ids, each an independent copy."""
+    templates = [
+        {**entry, "trace": deepen(entry["trace"], depth, scale)} if entry.get("trace") else entry
+        for entry in entries
+    ]
+    result = []
+    for i in range(count):
+        entry = copy.deepcopy(templates[i % len(templates)])
+        entry["id"] = f"{entry.get('id', 'case')}#{i}"
+        result.append(entry)
+    return result
+
+
+def best_time(entries: List[Dict[str, Any]], workers: int, chunk_size: int, repeat: int):
+    best, test_cases = None, None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        test_cases = build_test_cases_parallel(entries, workers, chunk_size)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best, test_cases
+
+
+def main():
+    """Benchmark entry point."""
+    args = parse_args()
+    entries = synthetic_entries(
+        load_report_data(args.report_path)["testEntries"], args.entries, args.depth, args.trace_scale
+    )
+    print(f"{len(entries)} entries (depth +{args.depth}, trace scale ×{args.trace_scale}), "
+          f"chunks of {args.chunk_size}, {os.cpu_count()} CPU(s), best of {args.repeat}\n")
+
+    baseline, expected = best_time(entries, 1, args.chunk_size, args.repeat)
+    expected = [(tc.name, test_case_fingerprint(tc)) for tc in expected]
+    results = []
+    for workers in range(1, args.max_workers + 1):
+        seconds, test_cases = (baseline, None) if workers == 1 else best_time(
+            entries, workers, args.chunk_size, args.repeat
+        )
+        if test_cases is not None and [(tc.name, test_case_fingerprint(tc)) for tc in test_cases] != expected:
+            raise SystemExit(f"✗ {workers} workers built different test cases than the serial build")
+        results.append({
+            "workers": workers,
+            "seconds": round(seconds, 4),
+            "speedup": round(baseline / seconds, 2),
+            "efficiency": round(baseline / seconds / workers, 2),
+            "cases_per_second": round(len(entries) / seconds, 1),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'Workers':>7} {'Seconds':>9} {'Speedup':>8} {'Efficiency':>11} {'Cases/s':>10}")
+    print("─"*49)
+    for row in results:
+        print(f"{row['workers']:>7} {row['seconds']:>9.3f} {row['speedup']:>7.2f}× "
+              f"{row['efficiency'] * 100:>10.0f}% {row['cases_per_second']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,226 @@
 """
 Evaluation framework for agent experiments.
 """
-from .config import EXPERIMENTS, RUN_CALIBRATION, CALIBRATION_OUTPUT_DIR
-from .metrics import get_metrics
-from .test_case_builder import get_test_cases, get_calibration_test_cases, load_report_data
+from .config import (
+    EXPERIMENTS,
+    RUN_CALIBRATION,
+    CALIBRATION_OUTPUT_DIR,
+    COMPARISON_OUTPUT_PATH,
+    SAMPLE_MARGIN_OF_ERROR,
+    SAMPLE_CONFIDENCE,
+    SAMPLE_SEED,
+    CASCADE_CHEAP_JUDGE,
+    CASCADE_MARGIN,
+    JUDGE_CALL_TIMEOUT,
+    JUDGE_CALL_RETRIES,
+    QUEUE_DB_PATH,
+    QUEUE_PRIORITIES,
+    QUEUE_WORKERS,
+    JUDGE_ENDPOINTS,
+    BUILD_WORKERS,
+    VERDICT_STORE_PATH,
+    TRACE_INDEX_PATH,
+    HISTORY_DB_PATH,
+    GATE_VERDICT_PATH,
+    BATCH_DIR,
+)
+from .metrics import LOCAL_JUDGE, get_metrics, JudgeCascade
+from .faithfulness import ClaimFaithfulnessMetric
+from .judge_pool import (
+    PooledGPTModel,
+    JudgePool,
+    load_judge_endpoints,
+    get_configured_judge_pool,
+    default_judge_is_openai,
+)
+from .judge_output import JudgeOutputError, parse_judge_output
+from .batch_judge import BatchJudge, BatchClient, collect_batch_responses
+from .local_judge import get_local_metrics
+from .test_case_builder import (
+    get_test_cases,
+    build_test_case,
+    build_test_cases_parallel,
+    get_calibration_test_cases,
+    load_report_data,
+    stream_report,
+)
+from .sampling import draw_stratified_sample, build_sample_report
+from .performance import analyze_agent_performance
+from .failure_taxonomy import build_failure_taxonomy
+from .comparison import build_comparison
+from .estimation import estimate_evaluation
+from .profiling import StageProfiler
+from .aggregation import ResultAggregator, LiveProgress
+from .job_queue import JOB_REPORT, JOB_CALIBRATION, JobQueue, QueueWorkerPool
+from .verdict_store import VerdictStore, parse_test_run_log
+from .trace_index import TraceIndex, TraceStep
+from .history import HistoryStore, history_tests, record_evaluation
+from .regression_gate import build_gate_verdict
+from .execution import (
+    RunStats,
+    SingleFlight,
+    Hedger,
+    CallPolicy,
+    with_single_flight,
+    EvaluationRunner,
+    ExecutionOptions,
+    run_summary,
+    output_test_results,
+)
 from .reporting import (
     print_header,
     print_metadata,
     print_calibration_header,
     print_calibration_results,
+    is_unexpected_calibration_result,
     print_metrics_summary,
     print_overall_stats,
+    coverage_report,
     print_task_type_analysis,
+    print_sample_estimates,
+    print_agent_performance,
+    print_failure_clusters,
+    print_run_stats,
+    print_cascade_summary,
+    print_judge_pool_stats,
+    print_queue_status,
+    print_verdict_store_summary,
+    print_estimate,
+    print_profile,
+    print_comparison_matrix,
+    save_comparison_report,
+    print_gate_verdict,
+    save_gate_verdict,
+    print_batch_summary,
     save_json_report,
 )
+from .cli import (
+    read_test_ids,
+    add_evaluation_arguments,
+    add_judge_arguments,
+    output_dir_for,
+    EvaluationSetup,
+    setup_evaluation,
+    run_calibration,
+    calibration_metadata_for,
+    summarize_calibration,
+    evaluate_report,
+    evaluate_entries,
+    task_types_of,
+    select_entries,
+    summarize_report,
+)
 
 __all__ = [
     'EXPERIMENTS',
     'RUN_CALIBRATION',
     'CALIBRATION_OUTPUT_DIR',
+    'COMPARISON_OUTPUT_PATH',
+    'SAMPLE_MARGIN_OF_ERROR',
+    'SAMPLE_CONFIDENCE',
+    'SAMPLE_SEED',
+    'CASCADE_CHEAP_JUDGE',
+    'CASCADE_MARGIN',
+    'JUDGE_CALL_TIMEOUT',
+    'JUDGE_CALL_RETRIES',
+    'QUEUE_DB_PATH',
+    'QUEUE_PRIORITIES',
+    'QUEUE_WORKERS',
+    'JUDGE_ENDPOINTS',
+    'BUILD_WORKERS',
+    'VERDICT_STORE_PATH',
+    'TRACE_INDEX_PATH',
+    'HISTORY_DB_PATH',
+    'GATE_VERDICT_PATH',
+    'BATCH_DIR',
+    'LOCAL_JUDGE',
     'get_metrics',
+    'JudgeCascade',
+    'ClaimFaithfulnessMetric',
+    'PooledGPTModel',
+    'JudgePool',
+    'load_judge_endpoints',
+    'get_configured_judge_pool',
+    'default_judge_is_openai',
+    'JudgeOutputError',
+    'parse_judge_output',
+    'BatchJudge',
+    'BatchClient',
+    'collect_batch_responses',
+    'get_local_metrics',
     'get_test_cases',
+    'build_test_case',
+    'build_test_cases_parallel',
     'get_calibration_test_cases',
     'load_report_data',
+    'stream_report',
+    'draw_stratified_sample',
+    'build_sample_report',
+    'analyze_agent_performance',
+    'build_failure_taxonomy',
+    'build_comparison',
+    'estimate_evaluation',
+    'StageProfiler',
+    'ResultAggregator',
+    'LiveProgress',
+    'JOB_REPORT',
+    'JOB_CALIBRATION',
+    'JobQueue',
+    'QueueWorkerPool',
+    'VerdictStore',
+    'parse_test_run_log',
+    'TraceIndex',
+    'TraceStep',
+    'HistoryStore',
+    'history_tests',
+    'record_evaluation',
+    'build_gate_verdict',
+    'RunStats',
+    'SingleFlight',
+    'Hedger',
+    'CallPolicy',
+    'with_single_flight',
+    'EvaluationRunner',
+    'ExecutionOptions',
+    'run_summary',
+    'output_test_results',
     'print_header',
     'print_metadata',
     'print_calibration_header',
     'print_calibration_results',
+    'is_unexpected_calibration_result',
     'print_metrics_summary',
     'print_overall_stats',
+    'coverage_report',
     'print_task_type_analysis',
+    'print_sample_estimates',
+    'print_agent_performance',
+    'print_failure_clusters',
+    'print_run_stats',
+    'print_cascade_summary',
+    'print_judge_pool_stats',
+    'print_queue_status',
+    'print_verdict_store_summary',
+    'print_estimate',
+    'print_profile',
+    'print_comparison_matrix',
+    'save_comparison_report',
+    'print_gate_verdict',
+    'save_gate_verdict',
+    'print_batch_summary',
     'save_json_report',
+    'read_test_ids',
+    'add_evaluation_arguments',
+    'add_judge_arguments',
+    'output_dir_for',
+    'EvaluationSetup',
+    'setup_evaluation',
+    'run_calibration',
+    'calibration_metadata_for',
+    'summarize_calibration',
+    'evaluate_report',
+    'evaluate_entries',
+    'task_types_of',
+    'select_entries',
+    'summarize_report',
 ]
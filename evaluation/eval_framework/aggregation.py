@@ -0,0 +1,212 @@
+"""
+Streaming aggregates of evaluation results.
+Each test result is folded into running statistics as it arrives (Welford
+mean and variance, min/max and pass counts per metric, overall and per
+task_type), so summaries need constant memory instead of every score. The
+summary tables and the live progress line (--progress) read from them.
+"""
+import math
+import shutil
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, TextIO
+
+from .config import PROGRESS_INTERVAL
+
+
+@dataclass
+class RunningStat:
+    """Count, mean, variance (Welford), min, max and pass count of a stream of scores."""
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+    passed: int = 0
+
+    def add(self, value: float, passed: bool):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.passed += int(passed)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (0 for fewer than two scores)."""
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    @property
+    def pass_rate(self) -> float:
+        return self.passed / self.n if self.n else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "n": self.n,
+            "mean": round(self.mean, 4) if self.n else None,
+            "std": round(self.std, 4) if self.n else None,
+            "min": round(self.min, 4) if self.n else None,
+            "max": round(self.max, 4) if self.n else None,
+            "passed": self.passed,
+            "pass_rate_percent": round(self.pass_rate * 100, 2),
+        }
+
+
+@dataclass
+class GroupStats:
+    """Test case pass counts and per-metric score statistics of a group of test results."""
+    tested: int = 0
+    passed: int = 0
+    metrics: Dict[str, RunningStat] = field(default_factory=dict)
+    thresholds: Dict[str, float] = field(default_factory=dict)
+
+    def add(self, test_result):
+        self.tested += 1
+        self.passed += int(bool(test_result.success))
+        for metric_data in test_result.metrics_data or []:
+            # Metrics skipped by fail-fast or that errored carry no score
+            if metric_data.score is None:
+                continue
+            self.thresholds.setdefault(metric_data.name, metric_data.threshold)
+            self.metrics.setdefault(metric_data.name, RunningStat()).add(
+                metric_data.score, metric_data.score >= metric_data.threshold
+            )
+
+    @property
+    def pass_rate(self) -> float:
+        return self.passed / self.tested if self.tested else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tested": self.tested,
+            "passed": self.passed,
+            "pass_rate_percent": round(self.pass_rate * 100, 2),
+            "metrics": {name: stat.to_dict() for name, stat in self.metrics.items()},
+        }
+
+
+class ResultAggregator:
+    """Running statistics of one evaluation run, overall and by task_type.
+
+    Args:
+        task_types: task_type of each test case by name (entry id); results of
+            unknown test cases count as "unknown"
+    """
+
+    def __init__(self, task_types: Optional[Dict[str, str]] = None):
+        self.task_types = task_types if task_types is not None else {}
+        self.overall = GroupStats()
+        self.by_task_type: Dict[str, GroupStats] = {}
+        self.untested = 0
+
+    def add(self, test_result):
+        """Fold in a test result, or count a test case the time budget left untested (None)."""
+        if test_result is None:
+            self.untested += 1
+            return
+        self.overall.add(test_result)
+        task_type = self.task_types.get(test_result.name, "unknown")
+        self.by_task_type.setdefault(task_type, GroupStats()).add(test_result)
+
+    @property
+    def done(self) -> int:
+        return self.overall.tested + self.untested
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            **self.overall.to_dict(),
+            "untested": self.untested,
+            "by_task_type": {task_type: group.to_dict() for task_type, group in self.by_task_type.items()},
+        }
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class LiveProgress:
+    """Compact live status line on stderr: throughput, ETA and running pass rates.
+
+    On a terminal the line is redrawn in place; otherwise (CI logs) it is
+    printed at most every PROGRESS_INTERVAL seconds. `total` may grow while
+    test cases are still being read (shown as "+" after the total).
+    """
+
+    def __init__(
+        self,
+        aggregates: ResultAggregator,
+        total: int = 0,
+        reading: bool = False,
+        stream: Optional[TextIO] = None,
+        interval: float = PROGRESS_INTERVAL,
+    ):
+        self.aggregates = aggregates
+        self.total = total
+        self.reading = reading
+        self.stream = stream or sys.stderr
+        self.interactive = self.stream.isatty()
+        self.interval = interval if not self.interactive else 0.1
+        self.started = time.monotonic()
+        self._last_shown = None
+        self._on_screen = False
+
+    def line(self) -> str:
+        done = self.aggregates.done
+        elapsed = time.monotonic() - self.started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - done) / rate if rate > 0 and not self.reading else None
+        overall = self.aggregates.overall
+        parts = [
+            f"[{done}/{self.total}{'+' if self.reading else ''}]",
+            f"{rate:.2f} cases/s",
+            f"ETA {format_duration(eta)}",
+            f"passed {overall.pass_rate:.0%}",
+        ]
+        rates = " ".join(f"{name.split()[0]} {stat.pass_rate:.0%}" for name, stat in overall.metrics.items())
+        return " | ".join(parts + ([rates] if rates else []))
+
+    def update(self):
+        """Show the current line, unless one was shown less than `interval` ago."""
+        now = time.monotonic()
+        if self._last_shown is not None and now - self._last_shown < self.interval:
+            return
+        self._show()
+
+    def redraw(self):
+        """Put the line back on a terminal after other output (see clear)."""
+        if self.interactive:
+            self._show()
+
+    def clear(self):
+        """Remove the line from a terminal before printing other output."""
+        if self.interactive and self._on_screen:
+            self.stream.write("\r\x1b[K")
+            self.stream.flush()
+            self._on_screen = False
+
+    def close(self):
+        """Show the final line and end it."""
+        self._show()
+        if self.interactive:
+            self.stream.write("\n")
+            self.stream.flush()
+            self._on_screen = False
+
+    def _show(self):
+        sys.stdout.flush()
+        line = self.line()
+        if self.interactive:
+            width = shutil.get_terminal_size().columns - 1
+            self.stream.write("\r\x1b[K" + line[:width])
+            self._on_screen = True
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+        self._last_shown = time.monotonic()
@@ -0,0 +1,329 @@
+"""
+Offline batch judging (--batch).
+Every judge prompt of a run is written to a JSONL batch file in the format of
+OpenAI's Batch API, submitted, polled until done and read back, instead of
+being sent as one interactive request at a time. Metrics ask several prompts
+in sequence (GEval's evaluation steps before its scores, AnswerRelevancy's
+statements before their verdicts), so a run takes a few rounds: each round
+measures every (metric, test case) pair still waiting for an answer, submits
+the prompts none of them has an answer for as one batch, and the next round
+continues with the answers. Once nothing is pending, the normal evaluation
+replays every judge call from the batch results.
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from deepeval.metrics.base_metric import BaseMetric
+from deepeval.metrics.indicator import safe_a_measure
+from deepeval.metrics.utils import copy_metrics
+from deepeval.models.llms.openai_model import json_mode_models, structured_outputs_models
+from deepeval.test_case import LLMTestCase
+from openai import OpenAI
+from openai.types.chat import ChatCompletion
+
+from .config import (
+    MAX_CONCURRENT,
+    BATCH_BASE_URL,
+    BATCH_COMPLETION_WINDOW,
+    BATCH_POLL_SECONDS,
+    BATCH_MAX_ROUNDS,
+    BATCH_COST_FACTOR,
+)
+from .judge_output import parse_judge_output
+from .judge_pool import PooledGPTModel
+
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_FINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchPending(Exception):
+    """The judge call has no answer in the batch results yet."""
+
+
+def request_id(body: Dict[str, Any], attempt: int = 0) -> str:
+    """custom_id of a chat completions request body; re-asks of the same prompt get their own."""
+    digest = hashlib.sha256(json.dumps(body, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:32]
+    return f"{digest}-{attempt}"
+
+
+class BatchJudge(PooledGPTModel):
+    """Judge model answering from batch results.
+
+    A call whose request has a result returns it as the live judge would;
+    any other call is recorded in `pending` and raises BatchPending. Outputs
+    are parsed tolerantly (see judge_output.py); an unrepairable one is
+    re-asked in the next round under its own custom_id. Costs are the
+    interactive price times `cost_factor`.
+    """
+
+    def __init__(self, *args, cost_factor: float = BATCH_COST_FACTOR, **kwargs):
+        self.cost_factor = cost_factor
+        self.responses: Dict[str, Dict[str, Any]] = {}
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        super().__init__(*args, **kwargs)
+
+    def load_model(self, async_mode: bool = False):
+        # Answers come from the batch results, never from a client
+        return None
+
+    def add_results(self, results: Iterable[Dict[str, Any]]) -> List[str]:
+        """Store the successful batch output lines; returns their custom_ids (failed requests stay pending)."""
+        stored = []
+        for line in results:
+            response = line.get("response") or {}
+            if line.get("error") or response.get("status_code") != 200:
+                continue
+            self.responses[line["custom_id"]] = response["body"]
+            stored.append(line["custom_id"])
+        return stored
+
+    def _body(self, prompt: str, **extra) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            **self.generation_kwargs,
+            **extra,
+        }
+
+    def _requester(self, body: Dict[str, Any]):
+        """request() for PooledGPTModel._ask: the n-th call reads the answer to the n-th ask of `body`."""
+        attempts = itertools.count()
+
+        def request() -> Tuple[ChatCompletion, float]:
+            custom_id = request_id(body, next(attempts))
+            if custom_id not in self.responses:
+                self.pending[custom_id] = body
+                raise BatchPending(f"no batch result for judge request {custom_id}")
+            completion = ChatCompletion.model_validate(self.responses[custom_id])
+            cost = self.calculate_cost(completion.usage.prompt_tokens, completion.usage.completion_tokens)
+            return completion, cost * self.cost_factor
+
+        return request
+
+    def _response_format(self, schema) -> Optional[Dict[str, Any]]:
+        if self.model_name in structured_outputs_models:
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema()},
+            }
+        if self.model_name in json_mode_models:
+            return {"type": "json_object"}
+        return None
+
+    def generate(self, prompt: str, schema=None):
+        if schema is None:
+            completion, cost = self._requester(self._body(prompt))()
+            return completion.choices[0].message.content, cost
+        response_format = self._response_format(schema)
+        extra = {"response_format": response_format} if response_format else {}
+        request = self._requester(self._body(prompt, **extra))
+
+        def text():
+            completion, cost = request()
+            return completion.choices[0].message.content, cost
+
+        return self._ask(text, lambda output: parse_judge_output(output, schema))
+
+    async def a_generate(self, prompt: str, schema=None):
+        return self.generate(prompt, schema=schema)
+
+    def generate_raw_response(self, prompt: str, top_logprobs: int = 5):
+        request = self._requester(self._body(prompt, logprobs=True, top_logprobs=top_logprobs))
+        return self._ask(request, self._repair_raw_response)
+
+    async def a_generate_raw_response(self, prompt: str, top_logprobs: int = 5):
+        return self.generate_raw_response(prompt, top_logprobs=top_logprobs)
+
+    def generate_samples(self, prompt: str, n: int, temperature: float):
+        # One request with n choices, like GPTModel.generate_samples
+        completion, _ = self._requester(self._body(prompt, n=n, temperature=temperature))()
+        return [choice.message.content for choice in completion.choices]
+
+
+class BatchClient:
+    """Submits batch files to an OpenAI-compatible Batch API and reads back their results."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = BATCH_BASE_URL,
+        completion_window: str = BATCH_COMPLETION_WINDOW,
+        poll_seconds: float = BATCH_POLL_SECONDS,
+        api_key_env: str = "OPENAI_API_KEY",
+    ):
+        api_key = os.environ.get(api_key_env)
+        if api_key is None:
+            raise ValueError(f"batch judge: environment variable {api_key_env} is not set")
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.completion_window = completion_window
+        self.poll_seconds = poll_seconds
+
+    def submit(self, path: str) -> str:
+        """Upload a batch file and start its batch; returns the batch id."""
+        with open(path, "rb") as f:
+            file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def wait(self, batch_id: str):
+        """Poll a batch until it is completed, failed, expired or cancelled."""
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in BATCH_FINAL_STATES:
+                return batch
+            counts = batch.request_counts
+            done = f" ({counts.completed + counts.failed}/{counts.total})" if counts else ""
+            print(f"  … batch {batch_id} {batch.status}{done}", flush=True)
+            time.sleep(self.poll_seconds)
+
+    def results(self, batch) -> List[Dict[str, Any]]:
+        """Output and error lines of a finished batch."""
+        if batch.status == "failed":
+            errors = "; ".join(error.message or "" for error in (batch.errors.data or [])) if batch.errors else ""
+            raise RuntimeError(f"batch {batch.id} failed: {errors or 'no reason given'}")
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                lines.extend(json.loads(line) for line in self.client.files.content(file_id).text.splitlines() if line)
+        return lines
+
+
+def _load_responses(path: Path) -> Dict[str, Dict[str, Any]]:
+    responses = {}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    responses[record["custom_id"]] = record["body"]
+    return responses
+
+
+async def _a_measure_pending(
+    pairs: List[Tuple[BaseMetric, LLMTestCase]], max_concurrent: int
+) -> Tuple[List[Tuple[BaseMetric, LLMTestCase]], int]:
+    """Measure every pair.
+
+    Returns:
+        Tuple of (pairs still waiting for a batch result, number of measurements that raised another error)
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+    errors = 0
+
+    async def measure(metric, test_case):
+        nonlocal errors
+        async with semaphore:
+            try:
+                await safe_a_measure(copy_metrics([metric])[0], test_case, ignore_errors=False,
+                                     skip_on_missing_params=False)
+            except BatchPending:
+                return False
+            except Exception as e:
+                # Its judge calls are done; the evaluation replays them and reports the error as the metric's
+                errors += 1
+                print(f"⚠ Warning: {metric.__name__} on {test_case.input[:60]!r} failed while collecting "
+                      f"batch answers: {type(e).__name__}: {e}")
+            return True
+
+    done = await asyncio.gather(*(measure(metric, test_case) for metric, test_case in pairs))
+    return [pair for pair, finished in zip(pairs, done) if not finished], errors
+
+
+def _ignore_batch_pending(loop, context):
+    # Sibling judge calls of a metric that already raised BatchPending raise it too, unawaited
+    if not isinstance(context.get("exception"), BatchPending):
+        loop.default_exception_handler(context)
+
+
+def collect_batch_responses(
+    judge: BatchJudge,
+    client: BatchClient,
+    metrics: List[BaseMetric],
+    test_case_sets: List[Tuple[str, List[LLMTestCase]]],
+    batch_dir: str,
+    max_rounds: int = BATCH_MAX_ROUNDS,
+    max_concurrent: int = MAX_CONCURRENT,
+) -> Dict[str, Any]:
+    """Fetch the answer to every judge call the metrics make on the test cases through batches.
+
+    Answers are appended to batch_dir/responses.jsonl as each batch finishes,
+    and a submitted batch is recorded in batch_dir/in_flight.json until then,
+    so an interrupted run resumes: known answers are not asked again and an
+    in-flight batch is waited for instead of resubmitted.
+
+    Returns:
+        Summary of the rounds: requests submitted, failed and answered per round, and
+        measurements that raised an error other than a missing answer
+    """
+    directory = Path(batch_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    responses_path = directory / "responses.jsonl"
+    in_flight_path = directory / "in_flight.json"
+    judge.responses.update(_load_responses(responses_path))
+
+    def finish(batch_id: str) -> Tuple[int, int]:
+        results = client.results(client.wait(batch_id))
+        stored = judge.add_results(results)
+        with open(responses_path, "a", encoding="utf-8") as f:
+            for custom_id in stored:
+                f.write(json.dumps({"custom_id": custom_id, "body": judge.responses[custom_id]},
+                                   ensure_ascii=False) + "\n")
+        in_flight_path.unlink()
+        return len(stored), len(results) - len(stored)
+
+    start_time = time.perf_counter()
+    rounds = []
+    measurement_errors = 0
+    if in_flight_path.exists():
+        batch_id = json.loads(in_flight_path.read_text())["batch_id"]
+        print(f"Resuming batch {batch_id}")
+        finish(batch_id)
+    reused = len(judge.responses)
+    # Round files of earlier runs in the same directory are kept
+    first_round = len(list(directory.glob("round_*.jsonl")))
+
+    pairs = [(metric, test_case) for _, test_cases in test_case_sets for test_case in test_cases for metric in metrics]
+    loop = asyncio.new_event_loop()
+    loop.set_exception_handler(_ignore_batch_pending)
+    try:
+        for round_number in range(1, max_rounds + 2):
+            judge.pending.clear()
+            pairs, errors = loop.run_until_complete(_a_measure_pending(pairs, max_concurrent))
+            measurement_errors += errors
+            if not judge.pending or round_number > max_rounds:
+                break
+            path = directory / f"round_{first_round + round_number}.jsonl"
+            with open(path, "w", encoding="utf-8") as f:
+                for custom_id, body in judge.pending.items():
+                    f.write(json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT,
+                                        "body": body}, ensure_ascii=False) + "\n")
+            batch_id = client.submit(str(path))
+            in_flight_path.write_text(json.dumps({"batch_id": batch_id, "path": str(path)}))
+            print(f"Round {round_number}: {len(judge.pending)} judge requests from {len(pairs)} "
+                  f"metric measurements submitted as batch {batch_id}", flush=True)
+            answered, failed = finish(batch_id)
+            rounds.append({"round": round_number, "batch_id": batch_id, "requests": len(judge.pending),
+                           "answered": answered, "failed": failed})
+    finally:
+        loop.close()
+
+    return {
+        "rounds": rounds,
+        "requests": sum(r["requests"] for r in rounds),
+        "failed": sum(r["failed"] for r in rounds),
+        "reused_responses": reused,
+        "unanswered_measurements": len(pairs),
+        "measurement_errors": measurement_errors,
+        "seconds": round(time.perf_counter() - start_time, 2),
+    }
@@ -0,0 +1,487 @@
+"""
+Steps shared by the evaluation entry points.
+evaluate_single.py, evaluate_experiments.py, watch_reports.py and eval_queue.py
+take the same options, build metrics, judge and runner the same way, run
+calibration once per process and evaluate the selected entries of a report
+with the same steps.
+"""
+import argparse
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from .config import (
+    RUN_CALIBRATION,
+    CALIBRATION_OUTPUT_DIR,
+    SAMPLE_MARGIN_OF_ERROR,
+    SAMPLE_CONFIDENCE,
+    SAMPLE_SEED,
+    CASCADE_CHEAP_JUDGE,
+    CASCADE_MARGIN,
+    JUDGE_CALL_TIMEOUT,
+    JUDGE_CALL_RETRIES,
+    BUILD_WORKERS,
+    VERDICT_STORE_PATH,
+    HISTORY_DB_PATH,
+)
+from .metrics import LOCAL_JUDGE, get_metrics, JudgeCascade
+from .judge_pool import (
+    PooledGPTModel,
+    JudgePool,
+    load_judge_endpoints,
+    get_configured_judge_pool,
+    default_judge_is_openai,
+)
+from .test_case_builder import (
+    get_test_cases,
+    build_test_case,
+    get_calibration_test_cases,
+    load_report_data,
+    stream_report,
+)
+from .sampling import draw_stratified_sample, build_sample_report
+from .performance import analyze_agent_performance
+from .failure_taxonomy import build_failure_taxonomy
+from .profiling import StageProfiler
+from .aggregation import ResultAggregator
+from .verdict_store import VerdictStore
+from .trace_index import experiment_for
+from .history import record_evaluation, run_scope
+from .execution import (
+    RunStats,
+    SingleFlight,
+    Hedger,
+    CallPolicy,
+    with_single_flight,
+    EvaluationRunner,
+    ExecutionOptions,
+    run_summary,
+)
+from .reporting import (
+    print_metadata,
+    print_calibration_header,
+    print_calibration_results,
+    is_unexpected_calibration_result,
+    print_metrics_summary,
+    print_overall_stats,
+    coverage_report,
+    print_task_type_analysis,
+    print_sample_estimates,
+    print_agent_performance,
+    print_failure_clusters,
+    print_run_stats,
+    print_cascade_summary,
+    print_judge_pool_stats,
+    print_profile,
+    save_json_report,
+)
+
+
+def read_test_ids(path: str) -> Set[str]:
+    """Test ids listed one per line in a file ('-' for stdin), e.g. by query_traces.py find --ids."""
+    try:
+        with (sys.stdin if path == "-" else open(path, "r", encoding="utf-8")) as f:
+            return {line.strip() for line in f if line.strip()}
+    except OSError as e:
+        raise argparse.ArgumentTypeError(f"cannot read test ids: {e}")
+
+
+def add_evaluation_arguments(parser: argparse.ArgumentParser):
+    """Add the options shared by every way of evaluating a report."""
+    parser.add_argument("--ids", type=read_test_ids, default=None, metavar="FILE",
+                        help="Evaluate only the test entries whose id is listed in FILE ('-' for stdin)")
+    parser.add_argument("--sample", action="store_true",
+                        help="Judge a stratified sample by task_type instead of every test entry")
+    parser.add_argument("--margin-of-error", type=float, default=SAMPLE_MARGIN_OF_ERROR,
+                        help="Target margin of error for the overall pass rate when sampling")
+    parser.add_argument("--confidence", type=float, default=SAMPLE_CONFIDENCE,
+                        help="Confidence level for sampled pass-rate intervals")
+    parser.add_argument("--seed", type=int, default=SAMPLE_SEED,
+                        help="Random seed for drawing the sample")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="Stop starting new test cases after this many seconds and report what was evaluated")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Stream entries from the report into the judges instead of loading and building "
+                             "every test case first")
+    parser.add_argument("--progress", action="store_true",
+                        help="Show a live line with throughput, ETA and running pass rates while judging")
+    parser.add_argument("--build-workers", type=int, default=BUILD_WORKERS,
+                        help="Processes building test cases from the report (not used with --pipeline)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record wall time, CPU time and peak memory of each run stage")
+    parser.add_argument("--profile-dump", default=None, metavar="PATH",
+                        help="Also write a cProfile/pstats dump of the run to PATH (implies --profile)")
+    parser.add_argument("--history-db", default=HISTORY_DB_PATH, metavar="PATH",
+                        help="History store every evaluated report is appended to (see eval_history.py)")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Do not append this run to the history store")
+    add_judge_arguments(parser)
+
+
+def add_judge_arguments(parser: argparse.ArgumentParser):
+    """Add the options that control how test cases are judged."""
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="Run metrics cheapest first and skip the rest of a test case once one fails")
+    parser.add_argument("--score-only", action="store_true",
+                        help="Judge scores without reasons, then explain only failing or borderline results")
+    parser.add_argument("--cheap-judge", nargs="?", const=CASCADE_CHEAP_JUDGE, default=None,
+                        help="Score with this cheap judge first ('local' or a model name) and escalate "
+                             "only near-threshold cases to the strong judge")
+    parser.add_argument("--cascade-margin", type=float, default=CASCADE_MARGIN,
+                        help="Distance from a metric threshold within which cheap scores are escalated")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Send a duplicate judge request when a request is slower than the metric's p95 so far")
+    parser.add_argument("--call-timeout", type=float, default=JUDGE_CALL_TIMEOUT,
+                        help="Deadline in seconds for a single judge call")
+    parser.add_argument("--call-retries", type=int, default=JUDGE_CALL_RETRIES,
+                        help="Retries for a judge call that hit its deadline")
+    parser.add_argument("--judge-endpoints", default=None,
+                        help="JSON file of judge endpoints to balance judge calls over (overrides JUDGE_ENDPOINTS)")
+    parser.add_argument("--claim-faithfulness", action="store_true",
+                        help="Judge faithfulness claim by claim against retrieved context instead of in one prompt")
+    parser.add_argument("--verdict-store", nargs="?", const=VERDICT_STORE_PATH, default=None, metavar="PATH",
+                        help="Reuse verdicts imported from earlier test_run logs (see import_verdicts.py) "
+                             "instead of asking the judge again")
+
+
+
+def output_dir_for(report_path: Path) -> Path:
+    """report_<name>.json -> evaluation_<name>/ next to the report."""
+    stem = report_path.stem
+    name = stem[len("report_"):] if stem.startswith("report_") else stem
+    return report_path.parent / f"evaluation_{name}"
+
+
+@dataclass
+class EvaluationSetup:
+    """Metrics, runner and run state; reusable across reports in one process."""
+    run_stats: RunStats
+    hedger: Optional[Hedger]
+    cascade: JudgeCascade
+    metrics: List[Any]
+    runner: EvaluationRunner
+    metric_thresholds: Dict[str, float]
+    judge_pool: Optional[JudgePool] = None
+    single_flight: Optional[SingleFlight] = None
+    profiler: StageProfiler = field(default_factory=StageProfiler)
+
+
+def setup_evaluation(
+    args,
+    pooled: bool = False,
+    metrics: Optional[List[Any]] = None,
+    judge: Optional[Any] = None,
+) -> EvaluationSetup:
+    """Build metrics and runner from the parsed options.
+
+    Args:
+        args: Parsed options (see add_evaluation_arguments)
+        pooled: Judge through PooledGPTModel so HTTP connections are reused across calls
+        metrics: Metrics to use instead of get_metrics(), e.g. a stubbed judge
+        judge: Judge model to use instead of the configured one, e.g. a BatchJudge
+    """
+    # Get metrics; identical judge requests within this run share one call, slow ones may be hedged
+    run_stats = RunStats()
+    hedger = Hedger(run_stats) if args.hedge else None
+    cascade = JudgeCascade(args.cascade_margin)
+    judge_pool = None
+    if metrics is None:
+        if judge is None:
+            judge_pool = (
+                JudgePool.from_specs(load_judge_endpoints(args.judge_endpoints))
+                if args.judge_endpoints else get_configured_judge_pool()
+            )
+            # deepeval's default OpenAI judge is replaced by a PooledGPTModel, which repairs malformed outputs
+            pooled = pooled or (judge_pool is None and default_judge_is_openai())
+            judge = judge_pool or (PooledGPTModel() if pooled else None)
+        cheap_judge = args.cheap_judge
+        if pooled and cheap_judge not in (None, LOCAL_JUDGE):
+            cheap_judge = PooledGPTModel(model=cheap_judge)
+        metrics = get_metrics(
+            score_only=args.score_only,
+            cheap_judge=cheap_judge,
+            cascade=cascade,
+            judge=judge,
+            claim_faithfulness=args.claim_faithfulness,
+        )
+    verdicts = VerdictStore(args.verdict_store) if getattr(args, "verdict_store", None) else None
+    single_flight = SingleFlight(run_stats, verdicts)
+    metrics = with_single_flight(
+        metrics,
+        single_flight,
+        hedger,
+        CallPolicy(timeout=args.call_timeout, retries=args.call_retries),
+    )
+    runner = EvaluationRunner(
+        ExecutionOptions(
+            fail_fast=args.fail_fast,
+            score_only=args.score_only,
+            time_budget=getattr(args, "time_budget", None),
+            pipeline=getattr(args, "pipeline", False),
+            progress=getattr(args, "progress", False),
+        ),
+        run_stats,
+    )
+
+    # Calculate metric thresholds
+    metric_thresholds = {}
+    for metric in metrics:
+        metric_name = getattr(metric, 'name', metric.__class__.__name__)
+        metric_thresholds[metric_name] = metric.threshold
+
+    profiler = StageProfiler(getattr(args, "profile", False), getattr(args, "profile_dump", None))
+    return EvaluationSetup(
+        run_stats, hedger, cascade, metrics, runner, metric_thresholds, judge_pool, single_flight, profiler
+    )
+
+
+def run_calibration(setup: EvaluationSetup) -> Optional[Dict[str, Any]]:
+    """Run the calibration controls if enabled and return their summary."""
+    if not RUN_CALIBRATION:
+        return None
+
+    print_calibration_header()
+
+    with setup.profiler.stage("calibration"):
+        # Get calibration test cases with metadata (name, is_positive, test_case)
+        calibration_data = get_calibration_test_cases()
+
+        # Extract test cases for evaluation
+        test_cases = [tc for name, is_positive, tc in calibration_data]
+        calibration_metadata = calibration_metadata_for(calibration_data)
+
+        # The strong judge scores every calibration case so the cascade can be checked against it
+        with setup.cascade.auditing():
+            calibration_result = setup.runner.run(
+                test_cases,
+                setup.metrics,
+                CALIBRATION_OUTPUT_DIR,
+                explain=lambda tr: is_unexpected_calibration_result(tr, calibration_metadata),
+            )
+
+        return summarize_calibration(setup, calibration_data, calibration_result)
+
+
+def calibration_metadata_for(calibration_data) -> Dict[tuple, tuple]:
+    """Map (input, actual_output) to (name, is_positive) for reporting.
+
+    Keyed by content rather than position to handle async execution order and duplicate inputs.
+    """
+    return {
+        (tc.input, tc.actual_output): (name, is_positive)
+        for name, is_positive, tc in calibration_data
+    }
+
+
+def summarize_calibration(setup: EvaluationSetup, calibration_data, calibration_result) -> Dict[str, Any]:
+    """Print the calibration results and return their summary."""
+    calibration_metadata = calibration_metadata_for(calibration_data)
+    positive_controls_count = sum(1 for name, is_pos, tc in calibration_data if is_pos)
+    negative_controls_count = sum(1 for name, is_pos, tc in calibration_data if not is_pos)
+
+    calibration_summary, calibration_valid = print_calibration_results(
+        calibration_result,
+        positive_controls_count,
+        negative_controls_count,
+        setup.metrics,
+        setup.metric_thresholds,
+        calibration_metadata
+    )
+
+    if not calibration_valid:
+        print("⚠ WARNING: Calibration failed. Results may not be reliable.")
+
+    return calibration_summary
+
+
+def evaluate_report(
+    args,
+    setup: EvaluationSetup,
+    report_path: str,
+    output_dir: str,
+    calibration_summary: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Evaluate one report file and write output_dir/analysis.json.
+
+    Returns:
+        Path of the written analysis.json
+    """
+    report_data, tcs, result, population_by_type = evaluate_entries(args, setup, report_path, output_dir)
+    return summarize_report(
+        args, setup, report_data, tcs, result, output_dir, calibration_summary, population_by_type, report_path
+    )
+
+
+def evaluate_entries(args, setup: EvaluationSetup, report_path: str, output_dir: str):
+    """Load the entries of a report selected by --ids and --sample, and judge them.
+
+    Returns:
+        Tuple of (report data with the judged entries, test cases, evaluation result,
+        population per task_type or None when not sampling)
+    """
+    # Load report data (pipelined without sampling: only the values before testEntries, entries are streamed)
+    with setup.profiler.stage("load"):
+        if args.pipeline and not args.sample:
+            report_data, entries = stream_report(report_path)
+            if getattr(args, "ids", None) is not None:
+                entries = (entry for entry in entries if entry.get("id") in args.ids)
+        else:
+            report_data = load_report_data(report_path)
+        git_hash = report_data.get("gitHash", "N/A")
+        timestamp = report_data.get("timestamp", "N/A")
+
+        print_metadata(git_hash, timestamp)
+
+        report_data, population_by_type = select_entries(args, report_data)
+
+    if args.pipeline:
+        # Parsing, building and judging overlap, so they are profiled as one stage
+        with setup.profiler.stage("evaluate"):
+            result, entries, tcs = setup.runner.run_pipeline(
+                report_data["testEntries"] if args.sample else entries,
+                build_test_case,
+                setup.metrics,
+                output_dir,
+            )
+        report_data = {**report_data, "testEntries": entries}
+    else:
+        # Get test cases and run evaluation
+        with setup.profiler.stage("build"):
+            tcs = get_test_cases(report_data, workers=args.build_workers)
+        with setup.profiler.stage("evaluate"):
+            result = setup.runner.run(tcs, setup.metrics, output_dir, task_types=task_types_of(report_data))
+
+    return report_data, tcs, result, population_by_type
+
+
+def task_types_of(report_data: Dict[str, Any]) -> Dict[str, str]:
+    """task_type of each test case (named after its entry id)."""
+    return {entry.get("id"): entry.get("task_type", "unknown") for entry in report_data.get("testEntries", [])}
+
+
+def select_entries(args, report_data: Dict[str, Any]):
+    """Report data with only the entries listed by --ids, and only a stratified sample of them if --sample is given.
+
+    Returns:
+        Tuple of (report data, population per task_type or None when not sampling)
+    """
+    ids = getattr(args, "ids", None)
+    if ids is not None and "testEntries" in report_data:
+        entries = [entry for entry in report_data["testEntries"] if entry.get("id") in ids]
+        print(f"Selected {len(entries)} of {len(report_data['testEntries'])} test entries by id\n")
+        report_data = {**report_data, "testEntries": entries}
+
+    # Judge only a stratified sample of the entries if requested
+    population_by_type = None
+    if args.sample:
+        sampled_entries, population_by_type = draw_stratified_sample(
+            report_data.get("testEntries", []),
+            args.margin_of_error,
+            args.confidence,
+            args.seed,
+        )
+        print(f"Sampling {len(sampled_entries)} of {sum(population_by_type.values())} test entries "
+              f"(±{args.margin_of_error * 100:.0f}% at {args.confidence * 100:.0f}% confidence)\n")
+        report_data = {**report_data, "testEntries": sampled_entries}
+    return report_data, population_by_type
+
+
+def summarize_report(
+    args,
+    setup: EvaluationSetup,
+    report_data: Dict[str, Any],
+    tcs: List[Any],
+    result,
+    output_dir: str,
+    calibration_summary: Optional[Dict[str, Any]] = None,
+    population_by_type: Optional[Dict[str, int]] = None,
+    report_path: Optional[str] = None,
+    aggregates: Optional[ResultAggregator] = None,
+) -> str:
+    """Print the analysis of an evaluated report, write output_dir/analysis.json and append the run to the history.
+
+    Args:
+        aggregates: Running statistics of the report's results (default: the runner's latest run)
+
+    Returns:
+        Path of the written analysis.json
+    """
+    run_stats, hedger, cascade = setup.run_stats, setup.hedger, setup.cascade
+    aggregates = aggregates if aggregates is not None else setup.runner.aggregates
+
+    with setup.profiler.stage("analysis"):
+        # Print results
+        print_metrics_summary(aggregates)
+        print_overall_stats(aggregates, tcs)
+
+        entries = report_data.get("testEntries", [])
+        categories_report, failure_analysis = print_task_type_analysis(aggregates, result, entries)
+
+        sample_report = None
+        if population_by_type is not None:
+            sample_report = build_sample_report(
+                categories_report, population_by_type, args.margin_of_error, args.confidence
+            )
+            print_sample_estimates(sample_report)
+
+        # Recurring agent errors and judge reasons, grouped into near-duplicate clusters
+        failure_clusters = build_failure_taxonomy(result, entries)
+        print_failure_clusters(failure_clusters)
+
+        # Where the agent spends time, not just whether it passed
+        agent_performance = analyze_agent_performance(entries, result)
+        print_agent_performance(agent_performance)
+
+        # Calculate overall stats (pass rate over the test cases that were evaluated)
+        total_tests = len(tcs)
+        passed_tests = aggregates.overall.passed
+        coverage = coverage_report(result, tcs)
+        overall_pass_rate = (passed_tests / coverage["tested"] * 100) if coverage["tested"] > 0 else 0
+
+        print_run_stats(run_summary(run_stats, hedger))
+        if args.cheap_judge:
+            print_cascade_summary(cascade.summary())
+        if setup.judge_pool:
+            print_judge_pool_stats(setup.judge_pool.summary())
+
+        # Save report
+        extra_sections = {
+            "run_stats": run_summary(run_stats, hedger),
+            "coverage": coverage,
+            "agent_performance": agent_performance,
+            "metric_stats": aggregates.summary(),
+            "failure_clusters": failure_clusters,
+        }
+        if args.cheap_judge:
+            extra_sections["cascade"] = cascade.summary()
+        if setup.judge_pool:
+            extra_sections["judge_pool"] = setup.judge_pool.summary()
+        if setup.single_flight:
+            extra_sections["metric_latency"] = setup.single_flight.latency_summary()
+        if sample_report:
+            extra_sections["sampling"] = sample_report
+
+    output_path = f"{output_dir}/analysis.json"
+    with setup.profiler.stage("save"):
+        save_json_report(
+            output_path,
+            total_tests,
+            overall_pass_rate,
+            calibration_summary or {},
+            categories_report,
+            failure_analysis,
+            extra_sections=extra_sections,
+        )
+        if report_path and not getattr(args, "no_history", False):
+            scope = run_scope(coverage, population_by_type is not None, getattr(args, "ids", None) is not None)
+            history_db = getattr(args, "history_db", HISTORY_DB_PATH)
+            run_id = record_evaluation(
+                history_db, experiment_for(report_path), report_data, result, scope, report_path, output_dir
+            )
+            print(f"✓ Run {run_id} ({scope}) recorded in history: {history_db}\n")
+
+    if setup.profiler.enabled:
+        setup.profiler.dump()
+        print_profile(setup.profiler.write_into(output_path))
+    return output_path
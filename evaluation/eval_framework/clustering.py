@@ -0,0 +1,133 @@
+"""
+Near-duplicate clustering of free-text failures (agent errors, judge reasons).
+Texts are normalized (numbers, quoted values and ids become placeholders),
+turned into word shingles and MinHash signatures, and grouped with
+locality-sensitive hashing: texts that share a signature band and whose
+estimated Jaccard similarity reaches the threshold end up in one cluster.
+Work grows linearly with the number of texts; no pairwise comparison.
+"""
+import re
+import zlib
+from typing import Dict, Any, Hashable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .config import (
+    CLUSTER_NUM_PERM,
+    CLUSTER_BANDS,
+    CLUSTER_SIMILARITY,
+    CLUSTER_SHINGLE_WORDS,
+    CLUSTER_EXAMPLES,
+)
+
+
+# Mersenne prime for the universal hash family (a * x + b) mod p; products stay below 2**62
+_PRIME = (1 << 31) - 1
+
+_PLACEHOLDERS = [
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"), " <id> "),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}(?:[t ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?z?)?\b"), " <date> "),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b[0-9a-f]{12,}\b"), " <hex> "),
+    (re.compile(r"(?<!\w)'[^'\n]{1,80}'(?!\w)|\"[^\"\n]{1,80}\"|`[^`\n]{1,80}`"), " <value> "),
+    (re.compile(r"\d+(?:[.,]\d+)*"), " <num> "),
+]
+_WORD_RE = re.compile(r"<\w+>|\w+", re.UNICODE)
+
+# Function words (English and German, the languages of our reports) say nothing about the failure
+STOP_WORDS = frozenset("""
+    a all also an and any are as at be been but by can could did do does for from had has have in into is it its
+    no not of on only or so than that the their then there they this to was were which with
+    aber als auch auf aus bei das dass den der des die ein eine einen einer es für hat ich im in ist mit
+    nicht noch nur oder sich sie sind und von war wie wird wurde zu zum zur
+""".split())
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase text with values that vary between occurrences replaced by placeholders."""
+    text = text.lower()
+    for pattern, placeholder in _PLACEHOLDERS:
+        text = pattern.sub(placeholder, text)
+    return " ".join(_WORD_RE.findall(text))
+
+
+def shingles(normalized: str, words: int = CLUSTER_SHINGLE_WORDS) -> Set[str]:
+    """Content-word n-grams of a normalized text (the whole text if it has fewer words)."""
+    tokens = [token for token in normalized.split() if token not in STOP_WORDS]
+    if len(tokens) <= words:
+        return {" ".join(tokens) or normalized}
+    return {" ".join(tokens[i:i + words]) for i in range(len(tokens) - words + 1)}
+
+
+class MinHasher:
+    """MinHash signatures over a fixed, seeded family of hash permutations."""
+
+    def __init__(self, num_perm: int = CLUSTER_NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = rng.randint(1, _PRIME, num_perm).astype(np.int64)
+        self._b = rng.randint(0, _PRIME, num_perm).astype(np.int64)
+
+    def signature(self, items: Set[str]) -> np.ndarray:
+        # crc32 rather than hash(): stable across processes, so clusters are reproducible
+        hashes = np.fromiter(
+            (zlib.crc32(item.encode("utf-8")) % _PRIME for item in items), dtype=np.int64, count=len(items)
+        )
+        if not len(hashes):
+            return np.full(self.num_perm, _PRIME, dtype=np.int64)
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+
+def cluster_texts(
+    items: Sequence[Tuple[Hashable, str]],
+    threshold: float = CLUSTER_SIMILARITY,
+    bands: int = CLUSTER_BANDS,
+    hasher: Optional[MinHasher] = None,
+    examples: int = CLUSTER_EXAMPLES,
+) -> List[Dict[str, Any]]:
+    """Group (id, text) items into near-duplicate clusters, largest first.
+
+    Each cluster reports its size, a representative text (the most frequent
+    normalized form, as it first occurred) and the ids of its first items.
+    """
+    hasher = hasher or MinHasher()
+    rows = hasher.num_perm // bands
+
+    # Items with the same normalized text share one signature
+    documents: Dict[str, List[int]] = {}
+    for index, (_, text) in enumerate(items):
+        documents.setdefault(normalize_text(text or ""), []).append(index)
+    keys = list(documents)
+    if not keys:
+        return []
+    signatures = np.array([hasher.signature(shingles(key)) for key in keys])
+
+    # Leader clustering: a text joins the most similar earlier leader it shares a band with, or leads a
+    # new cluster. Comparing with leaders only (not every member) keeps clusters from chaining apart.
+    buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+    groups: Dict[int, List[int]] = {}
+    for doc, signature in enumerate(signatures):
+        band_keys = [signature[band * rows:(band + 1) * rows].tobytes() for band in range(bands)]
+        candidates = {leader for band, key in enumerate(band_keys) for leader in buckets[band].get(key, ())}
+        best = max(((float(np.mean(signatures[leader] == signature)), -leader) for leader in candidates), default=None)
+        if best is not None and best[0] >= threshold:
+            groups[-best[1]].append(doc)
+            continue
+        groups[doc] = [doc]
+        for band, key in enumerate(band_keys):
+            buckets[band].setdefault(key, []).append(doc)
+
+    clusters = []
+    for docs in groups.values():
+        indices = sorted(index for doc in docs for index in documents[keys[doc]])
+        representative = max(docs, key=lambda doc: (len(documents[keys[doc]]), -documents[keys[doc]][0]))
+        clusters.append({
+            "size": len(indices),
+            "distinct": len(docs),
+            "representative": items[documents[keys[representative]][0]][1],
+            "examples": [items[index][0] for index in indices[:examples]],
+            "_first": indices[0],
+        })
+    clusters.sort(key=lambda cluster: (-cluster["size"], cluster["_first"]))
+    for cluster in clusters:
+        del cluster["_first"]
+    return clusters
@@ -0,0 +1,134 @@
+"""
+N-way comparison of experiment results.
+Joins every experiment's per-test, per-metric results on entry id and computes
+paired wins/losses/ties, score and pass-rate deltas, and tests that flipped
+between configurations. Pairwise statistics are matrix products over the
+joined (experiment x test) arrays, so they stay fast for many experiments.
+"""
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
+from .reporting import map_test_results
+
+
+def _matrix(values: np.ndarray, digits: int = 4) -> List[List[Any]]:
+    """JSON-friendly nested list with None for undefined cells."""
+    return [[None if np.isnan(v) else round(float(v), digits) for v in row] for row in values]
+
+
+def _counts(values: np.ndarray) -> List[List[int]]:
+    return values.astype(int).tolist()
+
+
+def _paired_mean_delta(values: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean of (row experiment - column experiment) over tests valid in both.
+
+    Args:
+        values: (experiments x tests) array, ignored where not valid
+        valid: (experiments x tests) mask
+
+    Returns:
+        Tuple of (mean delta matrix, paired count matrix)
+    """
+    v = valid.astype(float)
+    z = np.where(valid, values, 0.0)
+    paired = v @ v.T
+    sum_delta = z @ v.T - v @ z.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sum_delta / paired, paired
+
+
+def build_comparison(experiments: List[Tuple[str, List[Dict[str, Any]], Any]]) -> Dict[str, Any]:
+    """Compare experiments test by test.
+
+    Args:
+        experiments: (name, report entries, evaluation result) per experiment
+
+    Returns:
+        Comparison report; matrices are indexed [row experiment][column experiment]
+        and deltas are row minus column.
+    """
+    names = [name for name, _, _ in experiments]
+
+    # Union of entry ids (first-seen order) and metric names
+    test_ids, task_types, metric_names = [], [], []
+    test_index, metric_index = {}, {}
+    result_maps = []
+    for _, entries, result in experiments:
+        for entry in entries:
+            entry_id = entry.get("id")
+            if entry_id not in test_index:
+                test_index[entry_id] = len(test_ids)
+                test_ids.append(entry_id)
+                task_types.append(entry.get("task_type", "unknown"))
+        test_result_map = map_test_results(result, entries)
+        result_maps.append(test_result_map)
+        for test_result in test_result_map.values():
+            for metric_data in test_result.metrics_data or []:
+                if metric_data.name not in metric_index:
+                    metric_index[metric_data.name] = len(metric_names)
+                    metric_names.append(metric_data.name)
+
+    n_experiments, n_tests, n_metrics = len(names), len(test_ids), len(metric_names)
+    passed = np.full((n_experiments, n_tests), np.nan)
+    scores = np.full((n_experiments, n_tests, n_metrics), np.nan)
+    for e, test_result_map in enumerate(result_maps):
+        for entry_id, test_result in test_result_map.items():
+            t = test_index[entry_id]
+            passed[e, t] = float(bool(test_result.success))
+            for metric_data in test_result.metrics_data or []:
+                if metric_data.score is not None:
+                    scores[e, t, metric_index[metric_data.name]] = metric_data.score
+
+    tested = ~np.isnan(passed)
+    passes = (passed == 1) & tested
+    fails = (passed == 0) & tested
+
+    wins = passes.astype(float) @ fails.astype(float).T
+    losses = wins.T
+    paired_tests = tested.astype(float) @ tested.astype(float).T
+    ties = paired_tests - wins - losses
+    pass_rate_delta, _ = _paired_mean_delta(passed, tested)
+
+    metric_deltas = {}
+    for name, m in metric_index.items():
+        delta, _ = _paired_mean_delta(scores[:, :, m], ~np.isnan(scores[:, :, m]))
+        metric_deltas[name] = _matrix(delta)
+
+    task_type_array = np.array(task_types, dtype=object)
+    task_type_deltas = {}
+    for task_type in dict.fromkeys(task_types):
+        columns = task_type_array == task_type
+        delta, _ = _paired_mean_delta(passed[:, columns], tested[:, columns])
+        task_type_deltas[task_type] = _matrix(delta)
+
+    flipped = np.flatnonzero(passes.any(axis=0) & fails.any(axis=0))
+    flipped_tests = [
+        {
+            "id": test_ids[t],
+            "task_type": task_types[t],
+            "passed": {names[e]: (None if not tested[e, t] else bool(passes[e, t])) for e in range(n_experiments)},
+        }
+        for t in flipped
+    ]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pass_rates = passes.sum(axis=1) / tested.sum(axis=1)
+
+    return {
+        "experiments": names,
+        "metrics": metric_names,
+        "total_tests": n_tests,
+        "pass_rates": {name: (None if np.isnan(rate) else round(float(rate) * 100, 2)) for name, rate in zip(names, pass_rates)},
+        "pairwise": {
+            "paired_tests": _counts(paired_tests),
+            "wins": _counts(wins),
+            "losses": _counts(losses),
+            "ties": _counts(ties),
+            "pass_rate_delta": _matrix(pass_rate_delta),
+        },
+        "metric_deltas": metric_deltas,
+        "task_type_deltas": task_type_deltas,
+        "flipped_tests": flipped_tests,
+    }
@@ -8,10 +8,79 @@ Usage:
     # Evaluate a single report:
     python evaluate_single.py ./report/report.json ./report/output_dir
 
+    # Quick regression check on a stratified sample instead of every test:
+    python evaluate_experiments.py --sample --margin-of-error 0.15
+
+    # Smoke run: stop judging a test case once one of its metrics fails:
+    python evaluate_experiments.py --fail-fast
+
+    # Judge scores first, then ask for reasons only where they are needed:
+    python evaluate_experiments.py --score-only
+
+    # Score with a cheap judge first, escalate only near-threshold cases:
+    python evaluate_experiments.py --cheap-judge local
+    python evaluate_experiments.py --cheap-judge gpt-4.1-mini --cascade-margin 0.2
+
+    # Duplicate judge requests that are slower than usual to cut tail latency:
+    python evaluate_experiments.py --hedge
+
+    # Stop dispatching after 30 minutes and still write a (partial) analysis.json:
+    python evaluate_experiments.py --time-budget 1800
+
+    # Keep a warm process that evaluates new reports in ./report as they land:
+    python watch_reports.py ./report
+
+    # Spread judge calls over several API keys / endpoints:
+    python evaluate_experiments.py --judge-endpoints ./judge_endpoints.json
+
+    # Queue evaluations by priority and judge them with a shared worker pool:
+    python eval_queue.py submit --calibration
+    python eval_queue.py submit ./report/report_with_todo.json --priority release
+    python eval_queue.py work --workers 20
+    python eval_queue.py status
+
+    # Judge faithfulness claim by claim against retrieved context instead of in one GEval prompt:
+    python evaluate_experiments.py --claim-faithfulness
+
+    # Estimate judge tokens, cost and wall-clock time without calling the judge:
+    python evaluate_experiments.py --dry-run
+
+    # Time, CPU and memory per stage (written to analysis.json), with a cProfile dump:
+    python evaluate_experiments.py --profile --profile-dump ./report/run.pstats
+
+    # Stream entries from the report into the judges instead of loading and building everything first:
+    python evaluate_experiments.py --pipeline
+
+    # Show throughput, ETA and running pass rates while judging:
+    python evaluate_experiments.py --progress
+
+    # Build test cases of very large reports in 8 worker processes (benchmark: benchmark_build.py):
+    python evaluate_experiments.py --build-workers 8
+
+    # Import the verdicts of earlier test_run logs and reuse them instead of asking the judge again:
+    python import_verdicts.py ./report/evaluation_with_todo ./report/calibration_report
+    python evaluate_experiments.py --verdict-store
+
+    # Index agent traces and find tests by what happened in them, then judge just those:
+    python query_traces.py index ./report/report_with_todo.json ./report/report_without_todo.json
+    python query_traces.py find error:moodle* called:calendar-agent --experiment with_todo --ids \
+        | python evaluate_single.py ./report/report_with_todo.json ./report/subset --ids -
+
+    # Every run is appended to a history store; pass-rate and metric trends, regressions since a commit:
+    python eval_history.py trend --last 10
+    python eval_history.py regressions --since fda7f00 --experiment with_todo
+
+    # CI gate: fail when the candidate agent got slower or more expensive than the baseline (no judge calls):
+    python gate_reports.py ./report/baseline.json ./report/report_with_todo.json --verdict ./report/gate_verdict.json
+
+    # Overnight comparison through a batch judge API (one batch file per round instead of live calls):
+    python evaluate_experiments.py --batch
+    python evaluate_experiments.py --batch --batch-base-url http://127.0.0.1:8801/v1  # stub_judge_server.py
+
 Modify EXPERIMENTS list below to add/remove configurations to compare.
 """
 from dataclasses import dataclass
-from typing import List
+from typing import Any, Dict, List
 
 
 @dataclass
@@ -45,6 +114,9 @@ EXPERIMENTS: List[EvaluationConfig] = [
 ]
 
 CALIBRATION_OUTPUT_DIR = "./report/calibration_report"
+
+# Paired per-test comparison of all evaluated experiments (first experiment is the baseline)
+COMPARISON_OUTPUT_PATH = "./report/comparison.json"
 RUN_CALIBRATION = True
 
 # Evaluation date (used as context for all test cases to ensure reproducible results)
@@ -60,3 +132,133 @@ FORMAT_COMPLIANCE_THRESHOLD = 0.7
 # Calibration validation
 CALIBRATION_POSITIVE_PASS_RATE_MIN = 0.8
 CALIBRATION_NEGATIVE_FAIL_RATE_MIN = 0.8
+
+# Maximum number of test cases judged concurrently
+MAX_CONCURRENT = 20
+
+# Pipelined evaluation (--pipeline): entries parsed and test cases built ahead of the judges, per queue,
+# and characters read at a time while streaming a report's testEntries
+PIPELINE_QUEUE_DEPTH = MAX_CONCURRENT
+REPORT_READ_CHUNK = 1 << 20
+
+# Parallel test case construction (--build-workers): entries per chunk handed to a worker process;
+# reports with fewer than two chunks of entries are built serially
+BUILD_WORKERS = 1
+BUILD_CHUNK_SIZE = 250
+
+# Live progress line (--progress): seconds between lines when stderr is not a terminal (e.g. CI logs)
+PROGRESS_INTERVAL = 10
+
+# Judge endpoint pool: spread judge calls over several API keys / endpoints (empty: deepeval's default judge).
+# Each entry: {"name": ..., "model": "gpt-4.1", "base_url": None, "api_key_env": "OPENAI_API_KEY", "weight": 1.0};
+# keys are read from the named environment variables. --judge-endpoints FILE.json overrides this list.
+JUDGE_ENDPOINTS: List[Dict[str, Any]] = []
+JUDGE_POOL_EJECT_AFTER = 3  # consecutive failures that take an endpoint out of rotation
+JUDGE_POOL_EJECT_SECONDS = 30
+
+# Per judge call deadline (seconds) and retries after a timeout, with exponential backoff
+JUDGE_CALL_TIMEOUT = 120
+JUDGE_CALL_RETRIES = 2
+JUDGE_RETRY_BACKOFF = 2.0
+
+# Offline batch mode (--batch): the judge prompts of calibration and every experiment are submitted as one
+# JSONL batch file per round (later prompts of a metric depend on earlier answers) and polled until done.
+# BATCH_BASE_URL None is OpenAI's Batch API; answers are kept in BATCH_DIR so an interrupted run resumes.
+BATCH_DIR = "./report/batch"
+BATCH_BASE_URL = None
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_SECONDS = 30
+BATCH_MAX_ROUNDS = 8
+BATCH_COST_FACTOR = 0.5  # batch price relative to the interactive price
+
+# Nearly-valid JSON from the judge (code fences, trailing text, single quotes, cut-off objects) is repaired
+# locally; only an output that cannot be repaired is asked for again, at most this many times
+JUDGE_OUTPUT_REASKS = 1
+
+# Claim-level faithfulness (--claim-faithfulness): claims are verified against the top BM25 context chunks
+FAITHFULNESS_TOP_K = 3
+FAITHFULNESS_CHUNK_CHARS = 400  # longer context entries are split into chunks of about this many characters
+FAITHFULNESS_CLAIM_CONCURRENCY = 8  # claims of one test case verified at once
+FAITHFULNESS_PINNED_CONTEXT = ("Current date for evaluation",)  # context entries sent with every claim
+
+# Score-only mode (--score-only): results this close to the threshold still get a reason
+REASON_BORDERLINE_MARGIN = 0.1
+
+# Stratified sampling (--sample)
+SAMPLE_MARGIN_OF_ERROR = 0.15
+SAMPLE_CONFIDENCE = 0.95
+SAMPLE_MIN_PER_STRATUM = 3
+SAMPLE_SEED = 42
+
+# Judge cascade (--cheap-judge): cheap-judge scores this close to the threshold escalate to the strong judge
+CASCADE_CHEAP_JUDGE = "local"
+CASCADE_MARGIN = 0.15
+
+# Hedged judge requests (--hedge): duplicate a request still running after this latency percentile
+HEDGE_PERCENTILE = 95
+HEDGE_BUDGET = 0.05  # max extra requests as a fraction of all judge requests
+HEDGE_MIN_SAMPLES = 20  # latencies per metric needed before hedging starts
+HEDGE_HOLDOUT = 0.1  # share of post-warm-up requests never hedged, to measure unhedged tail latency
+HEDGE_MAX_SAMPLES = 1000  # most recent latencies kept per metric (and per comparison group) in long-running processes
+
+# Identical judge requests share one measurement; finished measurements kept for reuse by later duplicates
+# (least recently used dropped first, so a long-running watch or queue process does not grow without bound)
+SINGLE_FLIGHT_MAX_RESULTS = 10000
+
+# Failure clustering (analysis.json "failure_clusters"): agent errors and judge reasons grouped by MinHash/LSH.
+# A text joins a cluster when it shares one of CLUSTER_BANDS signature bands with the cluster's first text and
+# their estimated Jaccard similarity of content-word CLUSTER_SHINGLE_WORDS-grams reaches CLUSTER_SIMILARITY
+# (with 96 permutations in 32 bands of 3, pairs at 0.3 become candidates ~60% of the time, at 0.5 ~99%)
+CLUSTER_NUM_PERM = 96
+CLUSTER_BANDS = 32
+CLUSTER_SIMILARITY = 0.3
+CLUSTER_SHINGLE_WORDS = 1
+CLUSTER_TOP = 5  # clusters reported per task_type and metric
+CLUSTER_EXAMPLES = 3  # test ids listed per cluster
+
+# Dry-run estimates (--dry-run)
+JUDGE_CONTEXT_WINDOWS = {  # prompt + completion tokens per judge call
+    "gpt-4.1": 1_047_576,
+    "gpt-4.1-mini": 1_047_576,
+    "gpt-4.1-nano": 1_047_576,
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+    "o3": 200_000,
+    "o4-mini": 200_000,
+}
+JUDGE_CONTEXT_WINDOW_DEFAULT = 128_000
+ESTIMATE_OUTPUT_TOKENS = 200  # completion tokens assumed per judge call
+ESTIMATE_CALL_SECONDS = 5.0  # judge call latency assumed for metrics no earlier run has measured
+ESTIMATE_REASON_SHARE = 0.3  # share of metric results explained afterwards in score-only mode
+ESTIMATE_HISTORY_DIR = "./report"  # searched for analysis.json files with measured metric latencies
+
+# Evaluation job queue (eval_queue.py): higher priorities are judged first
+QUEUE_DB_PATH = "./report/eval_queue.sqlite"
+QUEUE_PRIORITIES = {"calibration": 100, "release": 50, "normal": 0}
+QUEUE_WORKERS = MAX_CONCURRENT
+QUEUE_LEASE_SECONDS = 600  # running test cases older than this are requeued (worker crashed)
+QUEUE_MAX_ATTEMPTS = 3
+QUEUE_THROUGHPUT_WINDOW = 300  # seconds of finished test cases used for throughput and ETA
+
+# Verdicts imported from test_run_*.log files (import_verdicts.py), reusable with --verdict-store
+VERDICT_STORE_PATH = "./report/verdicts.sqlite"
+
+# Full-text and structured index of agent traces (query_traces.py)
+TRACE_INDEX_PATH = "./report/traces.sqlite"
+# FTS5 query for call results that read like an error (error:NAME steps)
+TRACE_ERROR_QUERY = 'error* OR fehler* OR exception* OR fail* OR unable OR timeout* OR "not found" OR "could not"'
+
+# Latency and cost regression gate between two reports (gate_reports.py)
+# Largest allowed relative increase per feature and stat (0.2 = 20% slower / more expensive)
+GATE_LIMITS = {
+    "completion_time": {"median": 0.15, "p95": 0.25},
+    "token_cost": {"median": 0.10, "p95": 0.20},
+}
+GATE_CONFIDENCE = 0.95
+GATE_BOOTSTRAP_SAMPLES = 2000
+GATE_MIN_PAIRS = 10  # task_types with fewer paired entries are reported but not gated
+GATE_SEED = 42
+GATE_VERDICT_PATH = "./report/gate_verdict.json"
+
+# History of evaluation runs across git commits (eval_history.py); every evaluation is appended unless --no-history
+HISTORY_DB_PATH = "./report/history.sqlite"
@@ -0,0 +1,306 @@
+"""
+Pre-run estimate of what an evaluation will cost (dry run).
+
+Renders every judge prompt the metrics would send for each test case, with
+deepeval's own templates (GEval evaluation steps included), counts its tokens
+locally and projects judge cost and wall-clock time from the configured
+concurrency and the metric latencies measured by earlier runs. No judge is
+called. Prompts that depend on an earlier judge answer (Answer Relevancy
+verdicts, the Task Completion verdict) are rendered with the test case text in
+place of that answer.
+"""
+import json
+import re
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from deepeval.key_handler import KEY_FILE_HANDLER, ModelKeyValues
+from deepeval.metrics import GEval, AnswerRelevancyMetric, TaskCompletionMetric
+from deepeval.metrics.base_metric import BaseMetric
+from deepeval.metrics.g_eval.utils import (
+    construct_g_eval_params_string,
+    construct_test_case_string,
+    format_rubrics,
+    number_evaluation_steps,
+)
+from deepeval.metrics.task_completion.template import TaskCompletionTemplate
+from deepeval.models import DeepEvalBaseLLM
+from deepeval.models.llms.openai_model import default_gpt_model, model_pricing
+from deepeval.test_case import LLMTestCase
+
+from .config import (
+    MAX_CONCURRENT,
+    JUDGE_CONTEXT_WINDOWS,
+    JUDGE_CONTEXT_WINDOW_DEFAULT,
+    ESTIMATE_OUTPUT_TOKENS,
+    ESTIMATE_CALL_SECONDS,
+    ESTIMATE_REASON_SHARE,
+    ESTIMATE_HISTORY_DIR,
+)
+from .metrics import get_metrics, reason_prompt, ScoreOnlyTaskCompletionMetric, ScoreOnlyTaskCompletionTemplate
+from .faithfulness import ClaimFaithfulnessMetric
+
+try:
+    import tiktoken
+except ImportError:  # optional: exact counts for OpenAI judges, approximated otherwise
+    tiktoken = None
+
+
+# Word and punctuation pieces for the approximate token count
+_TOKEN_PIECE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+class TokenCounter:
+    """Counts prompt tokens with tiktoken if installed, else approximately (about 5 characters per token)."""
+
+    def __init__(self, model: str):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("o200k_base")
+        self.name = f"tiktoken ({self.encoding.name})" if self.encoding else "approximate (tiktoken not installed)"
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return sum(-(-len(piece) // 5) for piece in _TOKEN_PIECE.findall(text))
+
+
+class EstimateJudge(DeepEvalBaseLLM):
+    """Stand-in judge so metrics can be built, and their prompts rendered, without credentials."""
+
+    def load_model(self, async_mode: bool = False):
+        return None
+
+    def generate(self, prompt: str, schema=None):
+        raise RuntimeError("dry run: the judge is not called")
+
+    async def a_generate(self, prompt: str, schema=None):
+        raise RuntimeError("dry run: the judge is not called")
+
+    def get_model_name(self):
+        return self.model_name
+
+
+def estimate_judge_model(judge_specs: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Model that judges most calls: the highest-weighted endpoint's, else deepeval's configured default."""
+    if judge_specs:
+        spec = max(judge_specs, key=lambda s: float(s.get("weight", 1.0)))
+        if spec.get("model"):
+            return spec["model"]
+    return KEY_FILE_HANDLER.fetch_data(ModelKeyValues.OPENAI_MODEL_NAME) or default_gpt_model
+
+
+def load_latency_history(history_dir: str = ESTIMATE_HISTORY_DIR) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Measured metric latencies of the most recent analysis.json that has them.
+
+    Returns:
+        Tuple of (metric name -> latency summary, path of the analysis.json or None)
+    """
+    candidates = sorted(
+        Path(history_dir).glob("**/analysis.json"),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for path in candidates:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                latency = json.load(f).get("metric_latency")
+        except (OSError, ValueError, AttributeError):
+            continue
+        if latency:
+            return latency, str(path)
+    return {}, None
+
+
+def _sentences(text: str) -> List[str]:
+    return [s for s in _SENTENCE_END.split((text or "").strip()) if s]
+
+
+def judge_prompts(metric: BaseMetric, test_case: LLMTestCase) -> List[Tuple[str, str]]:
+    """(step, prompt) of every judge call the metric makes for the test case; [] for local metrics."""
+    if isinstance(metric, GEval):
+        prompts = []
+        params = construct_g_eval_params_string(metric.evaluation_params)
+        if not metric.evaluation_steps:
+            prompts.append(("evaluation steps", metric.evaluation_template.generate_evaluation_steps(
+                criteria=metric.criteria, parameters=params,
+            )))
+        if metric.strict_mode:
+            prompt = metric.evaluation_template.generate_strict_evaluation_results(
+                evaluation_steps=number_evaluation_steps(metric.evaluation_steps or []),
+                test_case_content=construct_test_case_string(metric.evaluation_params, test_case),
+                parameters=params,
+            )
+        else:
+            prompt = metric.evaluation_template.generate_evaluation_results(
+                evaluation_steps=number_evaluation_steps(metric.evaluation_steps or []),
+                test_case_content=construct_test_case_string(metric.evaluation_params, test_case),
+                parameters=params,
+                rubric=format_rubrics(metric.rubric) if metric.rubric else None,
+                score_range=metric.score_range,
+            )
+        return prompts + [("evaluation", prompt)]
+
+    if isinstance(metric, ClaimFaithfulnessMetric):
+        return [(f"claim {i}", prompt) for i, (claim, prompt) in enumerate(metric.verification_prompts(test_case), 1)]
+
+    if isinstance(metric, AnswerRelevancyMetric):
+        template = metric.evaluation_template
+        prompts = [
+            ("statements", template.generate_statements(actual_output=test_case.actual_output)),
+            ("verdicts", template.generate_verdicts(input=test_case.input, statements=_sentences(test_case.actual_output))),
+        ]
+        if metric.include_reason:
+            prompts.append(("reason", template.generate_reason(
+                irrelevant_statements=[], input=test_case.input, score=metric.threshold,
+            )))
+        return prompts
+
+    if isinstance(metric, TaskCompletionMetric):
+        template = (
+            ScoreOnlyTaskCompletionTemplate if isinstance(metric, ScoreOnlyTaskCompletionMetric)
+            else TaskCompletionTemplate
+        )
+        return [
+            ("task and outcome", TaskCompletionTemplate.extract_goal_and_outcome(
+                input=test_case.input,
+                actual_output=test_case.actual_output,
+                tools_called=test_case.tools_called,
+            )),
+            ("verdict", template.generate_verdict(
+                task=test_case.input, actual_outcome=test_case.actual_output,
+            )),
+        ]
+
+    return []
+
+
+def _sequential_calls(metric: BaseMetric, prompts: List[Tuple[str, str]]) -> int:
+    """Judge calls of a measurement that wait for one another (claims are verified concurrently)."""
+    if isinstance(metric, ClaimFaithfulnessMetric):
+        return -(-len(prompts) // metric.claim_concurrency)
+    return len(prompts)
+
+
+def estimate_evaluation(
+    test_case_sets: List[Tuple[str, List[LLMTestCase]]],
+    score_only: bool = False,
+    fail_fast: bool = False,
+    judge_specs: Optional[List[Dict[str, Any]]] = None,
+    claim_faithfulness: bool = False,
+    max_concurrent: int = MAX_CONCURRENT,
+    history_dir: str = ESTIMATE_HISTORY_DIR,
+) -> Dict[str, Any]:
+    """Estimate judge calls, tokens, cost and wall-clock time of evaluating the test case sets.
+
+    Args:
+        test_case_sets: (name, test cases) per evaluation, e.g. calibration and each report
+        score_only: Estimate --score-only runs (ESTIMATE_REASON_SHARE of results explained afterwards)
+        fail_fast: Metrics run one after another (every metric still counted, so calls are an upper bound)
+        judge_specs: Judge endpoint specs, used to pick the judge model
+        claim_faithfulness: Estimate --claim-faithfulness runs
+    """
+    model = estimate_judge_model(judge_specs)
+    metrics = get_metrics(score_only=score_only, judge=EstimateJudge(model), claim_faithfulness=claim_faithfulness)
+    counter = TokenCounter(model)
+    context_window = JUDGE_CONTEXT_WINDOWS.get(model, JUDGE_CONTEXT_WINDOW_DEFAULT)
+    pricing = model_pricing.get(model)
+    history, history_path = load_latency_history(history_dir)
+
+    def cost(prompt_tokens: float, calls: float) -> Optional[float]:
+        if pricing is None:
+            return None
+        return round(prompt_tokens * pricing["input"] + calls * ESTIMATE_OUTPUT_TOKENS * pricing["output"], 4)
+
+    metric_stats = {
+        metric.__name__: {"judge_calls": 0, "prompt_tokens": 0, "max_prompt_tokens": 0}
+        for metric in metrics
+    }
+    sets, oversized = [], []
+    for set_name, test_cases in test_case_sets:
+        calls, prompt_tokens, reason_calls, reason_tokens = 0, 0, 0.0, 0.0
+        case_seconds = []
+        for index, test_case in enumerate(test_cases):
+            metric_seconds = []
+            for metric in metrics:
+                prompts = judge_prompts(metric, test_case)
+                stats = metric_stats[metric.__name__]
+                for step, prompt in prompts:
+                    tokens = counter.count(prompt)
+                    calls += 1
+                    prompt_tokens += tokens
+                    stats["judge_calls"] += 1
+                    stats["prompt_tokens"] += tokens
+                    stats["max_prompt_tokens"] = max(stats["max_prompt_tokens"], tokens)
+                    if tokens + ESTIMATE_OUTPUT_TOKENS > context_window:
+                        oversized.append({
+                            "set": set_name,
+                            "test_case": test_case.name or f"#{index}",
+                            "metric": metric.__name__,
+                            "step": step,
+                            "prompt_tokens": tokens,
+                        })
+                if not prompts:
+                    continue
+                measured = history.get(metric.__name__)
+                metric_seconds.append(
+                    measured["mean_seconds"] if measured else _sequential_calls(metric, prompts) * ESTIMATE_CALL_SECONDS
+                )
+                if score_only:
+                    reason_calls += ESTIMATE_REASON_SHARE
+                    reason_tokens += ESTIMATE_REASON_SHARE * counter.count(
+                        reason_prompt(metric, test_case, metric.threshold)
+                    )
+            # Metrics of a test case run concurrently, or one after another with fail-fast
+            case_seconds.append((sum(metric_seconds) if fail_fast else max(metric_seconds, default=0.0)))
+
+        wall_clock = max(sum(case_seconds) / max_concurrent, max(case_seconds, default=0.0))
+        if reason_calls:
+            wall_clock += max(reason_calls * ESTIMATE_CALL_SECONDS / max_concurrent, ESTIMATE_CALL_SECONDS)
+        total_calls = calls + reason_calls
+        total_prompt_tokens = prompt_tokens + reason_tokens
+        sets.append({
+            "name": set_name,
+            "test_cases": len(test_cases),
+            "judge_calls": round(total_calls),
+            "reason_calls": round(reason_calls),
+            "prompt_tokens": round(total_prompt_tokens),
+            "output_tokens": round(total_calls * ESTIMATE_OUTPUT_TOKENS),
+            "cost": cost(total_prompt_tokens, total_calls),
+            "wall_clock_seconds": round(wall_clock, 1),
+        })
+
+    for name, stats in metric_stats.items():
+        measured = history.get(name)
+        stats["mean_prompt_tokens"] = round(stats["prompt_tokens"] / stats["judge_calls"]) if stats["judge_calls"] else 0
+        stats["seconds_per_test_case"] = measured["mean_seconds"] if measured else None
+        stats["latency"] = "measured" if measured else ("assumed" if stats["judge_calls"] else "local")
+
+    total_calls = sum(s["judge_calls"] for s in sets)
+    total_prompt_tokens = sum(s["prompt_tokens"] for s in sets)
+    return {
+        "model": model,
+        "tokenizer": counter.name,
+        "context_window": context_window,
+        "max_concurrent": max_concurrent,
+        "output_tokens_per_call": ESTIMATE_OUTPUT_TOKENS,
+        "assumed_call_seconds": ESTIMATE_CALL_SECONDS,
+        "latency_history": history_path,
+        "score_only": score_only,
+        "fail_fast": fail_fast,
+        "sets": sets,
+        "metrics": metric_stats,
+        "total": {
+            "test_cases": sum(s["test_cases"] for s in sets),
+            "judge_calls": total_calls,
+            "prompt_tokens": total_prompt_tokens,
+            "output_tokens": sum(s["output_tokens"] for s in sets),
+            "cost": cost(total_prompt_tokens, total_calls),
+            "wall_clock_seconds": round(sum(s["wall_clock_seconds"] for s in sets), 1),
+        },
+        "oversized": oversized,
+    }
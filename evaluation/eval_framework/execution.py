@@ -0,0 +1,911 @@
+"""
+Metric execution layer shared by the evaluation entry points.
+Wraps metrics so identical judge requests within a run are only sent once,
+judge calls are bounded by a deadline (and slow ones optionally hedged), and
+runs test cases with fail-fast metric ordering, score-only judging or a
+whole-run time budget when requested.
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import math
+import random
+import time
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass, asdict, fields
+from typing import Dict, Any, List, Callable, Awaitable, Iterable, Optional, Tuple
+
+from deepeval import evaluate
+from deepeval.evaluate import DisplayConfig
+from deepeval.evaluate.types import EvaluationResult, TestResult
+from deepeval.evaluate.utils import create_metric_data, print_test_result, write_test_result_to_file
+from deepeval.metrics.base_metric import BaseMetric
+from deepeval.metrics.indicator import safe_a_measure
+from deepeval.metrics.utils import copy_metrics
+from deepeval.test_case import LLMTestCase
+from deepeval.test_run import MetricData
+from deepeval.test_run.test_run import TestRunResultDisplay
+from deepeval.utils import get_or_create_event_loop
+
+from .config import (
+    MAX_CONCURRENT,
+    PIPELINE_QUEUE_DEPTH,
+    JUDGE_CALL_TIMEOUT,
+    JUDGE_CALL_RETRIES,
+    JUDGE_RETRY_BACKOFF,
+    REASON_BORDERLINE_MARGIN,
+    HEDGE_PERCENTILE,
+    HEDGE_BUDGET,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_HOLDOUT,
+    HEDGE_MAX_SAMPLES,
+    SINGLE_FLIGHT_MAX_RESULTS,
+)
+from .metrics import METRIC_STATE_FIELDS, CascadeMetric, a_generate_reason
+from .judge_output import counting_judge_outputs
+from .aggregation import ResultAggregator, LiveProgress
+from .verdict_store import VerdictStore
+
+
+# Error marker for metrics that were skipped by fail-fast execution
+NOT_EVALUATED = "not evaluated"
+
+
+# End of a pipeline stage's input
+_END = object()
+
+
+# Test case fields that never reach the judge prompt
+IGNORED_TEST_CASE_FIELDS = {"name", "completion_time", "token_cost", "tags", "comments", "additional_metadata"}
+
+
+@dataclass
+class RunStats:
+    """Counters collected over one evaluation run."""
+    judge_calls: int = 0
+    coalesced_calls: int = 0
+    stored_verdicts: int = 0
+    skipped_calls: int = 0
+    reason_calls: int = 0
+    hedged_calls: int = 0
+    hedge_wins: int = 0
+    timed_out_calls: int = 0
+    retried_calls: int = 0
+    repaired_outputs: int = 0
+    reasked_calls: int = 0
+    untested_cases: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def reset(self):
+        """Zero all counters, e.g. between reports evaluated by one long-running process."""
+        for field in fields(self):
+            setattr(self, field.name, field.default)
+
+
+def metric_fingerprint(metric: BaseMetric) -> str:
+    """Identify a metric configuration (same fields deepeval uses for its cache)."""
+    config = {
+        "class": metric.__class__.__name__,
+        "name": metric.__name__,
+        "threshold": metric.threshold,
+        "evaluation_model": getattr(metric, "evaluation_model", None),
+        "strict_mode": getattr(metric, "strict_mode", False),
+        "include_reason": getattr(metric, "include_reason", None),
+        "criteria": getattr(metric, "criteria", None),
+        "evaluation_steps": getattr(metric, "evaluation_steps", None),
+        "evaluation_params": [str(p) for p in getattr(metric, "evaluation_params", None) or []],
+    }
+    return json.dumps(config, sort_keys=True, default=str)
+
+
+def test_case_fingerprint(test_case: LLMTestCase) -> str:
+    """Identify a test case by the content the judge actually sees."""
+    content = test_case.model_dump(exclude=IGNORED_TEST_CASE_FIELDS, mode="json")
+    return json.dumps(content, sort_keys=True, ensure_ascii=False)
+
+
+def request_key(metric: BaseMetric, test_case: LLMTestCase) -> str:
+    """Key of a (metric, test case) judge request."""
+    raw = metric_fingerprint(metric) + "\n" + test_case_fingerprint(test_case)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Share one measurement between identical (metric, test case) requests.
+
+    The first request for a key runs the judge; concurrent and later duplicates
+    within the same run await the same future instead of calling the judge again.
+    It also keeps the latency of every measurement that did call the judge, by
+    metric, for later runs to plan with (see estimation.py). With a verdict
+    store, verdicts of earlier runs are reused before the judge is asked.
+    Only the `max_results` most recently used measurements are kept.
+    """
+
+    def __init__(
+        self,
+        stats: RunStats,
+        verdicts: Optional[VerdictStore] = None,
+        max_results: int = SINGLE_FLIGHT_MAX_RESULTS,
+    ):
+        self.stats = stats
+        self.verdicts = verdicts
+        self.max_results = max_results
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+
+    def reset(self):
+        """Forget finished measurements and latencies, e.g. between reports evaluated by one long-running process."""
+        self._results.clear()
+        self.latencies.clear()
+
+    def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        state = self._results.get(key)
+        if state is not None:
+            self._results.move_to_end(key)
+            self.stats.coalesced_calls += 1
+        return state
+
+    def _remember(self, key: str, state: Dict[str, Any]):
+        self._results[key] = state
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    def record_latency(self, metric_name: str, seconds: float):
+        self.latencies[metric_name].append(seconds)
+
+    def latency_summary(self) -> Dict[str, Any]:
+        """Measured seconds per metric and test case (retries and hedges included)."""
+        summary = {}
+        for name, samples in self.latencies.items():
+            ordered = sorted(samples)
+            summary[name] = {
+                "measurements": len(ordered),
+                "mean_seconds": round(sum(ordered) / len(ordered), 3),
+                "p95_seconds": round(latency_percentile(ordered, 95), 3),
+            }
+        return summary
+
+    def stored(self, metric: BaseMetric, test_case: LLMTestCase) -> Optional[Dict[str, Any]]:
+        """Metric state of a stored verdict for this request, or None."""
+        if self.verdicts is None:
+            return None
+        verdict = self.verdicts.lookup(metric, test_case)
+        if verdict is None:
+            return None
+        self.stats.stored_verdicts += 1
+        state = {field: None for field in METRIC_STATE_FIELDS}
+        state.update(
+            score=verdict["score"],
+            reason=verdict["reason"],
+            success=bool(verdict["success"]),
+            evaluation_model=verdict["evaluation_model"],
+            evaluation_cost=0,
+        )
+        return state
+
+    async def run(self, key: str, measure: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        state = self._cached(key)
+        if state is not None:
+            return state
+
+        future = self._futures.get(key)
+        if future is not None and future.get_loop() is asyncio.get_running_loop():
+            self.stats.coalesced_calls += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        self.stats.judge_calls += 1
+        try:
+            state = await measure()
+        except asyncio.CancelledError:
+            del self._futures[key]
+            future.cancel()
+            raise
+        except Exception as e:
+            # Waiting duplicates see the same error; later requests retry
+            del self._futures[key]
+            future.set_exception(e)
+            future.exception()
+            raise
+
+        # Later duplicates find the state in _results; the settled future is only for current waiters
+        if self._futures.get(key) is future:
+            del self._futures[key]
+        self._remember(key, state)
+        future.set_result(state)
+        return state
+
+    def run_sync(self, key: str, measure: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        state = self._cached(key)
+        if state is not None:
+            return state
+
+        self.stats.judge_calls += 1
+        state = measure()
+        self._remember(key, state)
+        return state
+
+
+def latency_percentile(sorted_samples: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    index = max(0, math.ceil(percentile / 100 * len(sorted_samples)) - 1)
+    return sorted_samples[min(index, len(sorted_samples) - 1)]
+
+
+class Hedger:
+    """Send a duplicate for judge requests that are slower than usual.
+
+    Once a metric has enough observed latencies, a request still running after
+    the metric's latency percentile gets a duplicate request; whichever returns
+    first wins and the other is cancelled. Duplicates are capped at `budget`
+    times the number of requests. Warm-up requests are never hedged and only
+    feed the percentile; after warm-up, a random holdout is never hedged
+    either and is the baseline the hedged requests' tail latency is compared
+    against. Only the `max_samples` most recent latencies are kept, so a
+    watch or queue process follows the judge's current latency and does not
+    grow without bound.
+    """
+
+    def __init__(
+        self,
+        stats: RunStats,
+        percentile: float = HEDGE_PERCENTILE,
+        budget: float = HEDGE_BUDGET,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        holdout: float = HEDGE_HOLDOUT,
+        max_samples: int = HEDGE_MAX_SAMPLES,
+    ):
+        self.stats = stats
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.holdout = holdout
+        self._rng = random.Random(0)
+        self._requests = 0
+        # Per metric: latencies sorted for the percentile, and the same latencies in arrival order for eviction
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        self._arrivals: Dict[str, deque] = defaultdict(lambda: deque(maxlen=max_samples))
+        self._hedgeable_latencies: deque = deque(maxlen=max_samples)
+        self._unhedged_latencies: deque = deque(maxlen=max_samples)
+
+    def hedge_delay(self, metric_name: str) -> Optional[float]:
+        """Seconds after which a request for this metric is hedged, or None while warming up."""
+        samples = self._latencies[metric_name]
+        if len(samples) < self.min_samples:
+            return None
+        return latency_percentile(samples, self.percentile)
+
+    async def run(self, metric_name: str, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `attempt`, hedging it with a second call of `attempt` if it is slow."""
+        self._requests += 1
+        delay = self.hedge_delay(metric_name)
+        held_out = delay is not None and self._rng.random() < self.holdout
+
+        start_time = time.perf_counter()
+        result = await (attempt() if delay is None or held_out else self._run_hedged(attempt, delay))
+        elapsed = time.perf_counter() - start_time
+
+        self._record_latency(metric_name, elapsed)
+        if delay is not None:
+            # Warm-up latencies include cold starts and stay out of the comparison
+            (self._unhedged_latencies if held_out else self._hedgeable_latencies).append(elapsed)
+        return result
+
+    def _record_latency(self, metric_name: str, elapsed: float):
+        samples, arrivals = self._latencies[metric_name], self._arrivals[metric_name]
+        if len(arrivals) == arrivals.maxlen:
+            # The oldest latency leaves the window (the deque drops it on append)
+            del samples[bisect.bisect_left(samples, arrivals[0])]
+        arrivals.append(elapsed)
+        bisect.insort(samples, elapsed)
+
+    async def _run_hedged(self, attempt: Callable[[], Awaitable[Any]], delay: float) -> Any:
+        primary = asyncio.ensure_future(attempt())
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or self.stats.hedged_calls >= self.budget * self._requests:
+                return await primary
+
+            self.stats.hedged_calls += 1
+            hedge = asyncio.ensure_future(attempt())
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+            # Both attempts failed: surface the original request's error
+            return await primary
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def summary(self) -> Dict[str, Any]:
+        """Hedge rate and p99 latency of hedgeable requests vs. the holdout, both after warm-up."""
+        def p99(samples):
+            return round(latency_percentile(sorted(samples), 99), 3) if samples else None
+
+        hedged_p99 = p99(self._hedgeable_latencies)
+        unhedged_p99 = p99(self._unhedged_latencies)
+        return {
+            "requests": self._requests,
+            "hedged_requests": self.stats.hedged_calls,
+            "hedge_wins": self.stats.hedge_wins,
+            "hedge_rate": round(self.stats.hedged_calls / self._requests, 4) if self._requests else 0.0,
+            "p99_seconds": hedged_p99,
+            "p99_unhedged_seconds": unhedged_p99,
+            "p99_improvement_seconds": (
+                round(unhedged_p99 - hedged_p99, 3) if hedged_p99 is not None and unhedged_p99 is not None else None
+            ),
+            "unhedged_samples": len(self._unhedged_latencies),
+        }
+
+
+class JudgeTimeoutError(Exception):
+    """A judge call did not finish within its deadline, retries included."""
+
+
+@dataclass
+class CallPolicy:
+    """Deadline and retry budget of a single judge call."""
+    timeout: Optional[float] = JUDGE_CALL_TIMEOUT
+    retries: int = JUDGE_CALL_RETRIES
+    backoff: float = JUDGE_RETRY_BACKOFF
+
+    async def run(self, call: Callable[[], Awaitable[Any]], stats: RunStats) -> Any:
+        """Run `call` with a deadline, retrying timed out calls with exponential backoff."""
+        for attempt in range(self.retries + 1):
+            try:
+                return await asyncio.wait_for(call(), self.timeout)
+            except asyncio.TimeoutError:
+                stats.timed_out_calls += 1
+                if attempt == self.retries:
+                    raise JudgeTimeoutError(
+                        f"judge call timed out after {self.retries + 1} attempt(s) of {self.timeout}s"
+                    ) from None
+            stats.retried_calls += 1
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+
+def run_summary(stats: RunStats, hedger: Optional[Hedger] = None) -> Dict[str, Any]:
+    """Run statistics for reporting, including hedging results if requests were hedged."""
+    summary = stats.to_dict()
+    if hedger is not None:
+        summary["hedging"] = hedger.summary()
+    return summary
+
+
+class CoalescedMetric(BaseMetric):
+    """Metric wrapper that routes measurements through a SingleFlight (and a Hedger, if any)."""
+
+    def __init__(
+        self,
+        metric: BaseMetric,
+        single_flight: SingleFlight,
+        hedger: Optional[Hedger] = None,
+        call_policy: Optional[CallPolicy] = None,
+    ):
+        self.metric = metric
+        self.single_flight = single_flight
+        self.hedger = hedger
+        self.call_policy = call_policy
+        self.name = getattr(metric, "name", metric.__class__.__name__)
+        self.threshold = metric.threshold
+        self.evaluation_model = metric.evaluation_model
+        self.strict_mode = metric.strict_mode
+        self.async_mode = metric.async_mode
+        self.verbose_mode = metric.verbose_mode
+        self.include_reason = metric.include_reason
+
+    def __getattr__(self, item):
+        # Expose configuration of the wrapped metric (evaluation_params, criteria, ...)
+        if item == "metric":
+            raise AttributeError(item)
+        return getattr(self.metric, item)
+
+    @property
+    def __name__(self):
+        return self.metric.__name__
+
+    def _capture(self, metric: BaseMetric) -> Dict[str, Any]:
+        return {field: getattr(metric, field, None) for field in METRIC_STATE_FIELDS}
+
+    def _apply(self, state: Dict[str, Any], leader: bool):
+        for field, value in state.items():
+            setattr(self, field, value)
+        if not leader and self.evaluation_cost is not None:
+            self.evaluation_cost = 0
+
+    async def a_measure(self, test_case: LLMTestCase, *args, **kwargs) -> float:
+        leader = False
+
+        async def attempt():
+            # Every attempt measures its own copy, so a losing hedge can be cancelled safely
+            metric = copy_metrics([self.metric])[0]
+            await metric.a_measure(test_case, *args, **kwargs)
+            return self._capture(metric)
+
+        async def call():
+            if self.hedger is None:
+                return await attempt()
+            return await self.hedger.run(self.__name__, attempt)
+
+        async def measure():
+            nonlocal leader
+            leader = True
+            start_time = time.perf_counter()
+            if self.call_policy is None:
+                state = await call()
+            else:
+                state = await self.call_policy.run(call, self.single_flight.stats)
+            self.single_flight.record_latency(self.__name__, time.perf_counter() - start_time)
+            return state
+
+        try:
+            with counting_judge_outputs(self.single_flight.stats):
+                state = self.single_flight.stored(self.metric, test_case) or await self.single_flight.run(
+                    request_key(self.metric, test_case), measure
+                )
+        except JudgeTimeoutError as e:
+            # A hung judge call fails this metric instead of stalling the run
+            state = {field: None for field in METRIC_STATE_FIELDS}
+            state.update(success=False, error=str(e), evaluation_model=self.evaluation_model, evaluation_cost=0)
+        self._apply(state, leader)
+        return self.score
+
+    def measure(self, test_case: LLMTestCase, *args, **kwargs) -> float:
+        leader = False
+
+        def measure():
+            nonlocal leader
+            leader = True
+            start_time = time.perf_counter()
+            metric = copy_metrics([self.metric])[0]
+            metric.measure(test_case, *args, **kwargs)
+            self.single_flight.record_latency(self.__name__, time.perf_counter() - start_time)
+            return self._capture(metric)
+
+        with counting_judge_outputs(self.single_flight.stats):
+            state = self.single_flight.stored(self.metric, test_case) or self.single_flight.run_sync(
+                request_key(self.metric, test_case), measure
+            )
+        self._apply(state, leader)
+        return self.score
+
+    def is_successful(self) -> bool:
+        if self.error is not None:
+            self.success = False
+        else:
+            self.success = self.score is not None and self.score >= self.threshold
+        return self.success
+
+
+def unwrap_metric(metric: BaseMetric) -> BaseMetric:
+    """Return the underlying metric of a CoalescedMetric (the strong judge of a cascade)."""
+    if isinstance(metric, CoalescedMetric):
+        metric = metric.metric
+    if isinstance(metric, CascadeMetric):
+        metric = metric.strong
+    return metric
+
+
+def with_single_flight(
+    metrics: List[BaseMetric],
+    single_flight: Optional[SingleFlight],
+    hedger: Optional[Hedger] = None,
+    call_policy: Optional[CallPolicy] = None,
+) -> List[BaseMetric]:
+    """Wrap metrics so duplicate judge requests share one measurement.
+
+    Args:
+        hedger: Hedges slow judge calls, if given
+        call_policy: Deadline and retries of each judge call, if given
+    """
+    if single_flight is None:
+        return metrics
+    return [CoalescedMetric(metric, single_flight, hedger, call_policy) for metric in metrics]
+
+
+@dataclass
+class ExecutionOptions:
+    """How test cases are run against the judge."""
+    fail_fast: bool = False
+    score_only: bool = False
+    time_budget: Optional[float] = None
+    max_concurrent: int = MAX_CONCURRENT
+    pipeline: bool = False
+    queue_depth: int = PIPELINE_QUEUE_DEPTH
+    progress: bool = False
+
+    def uses_deepeval_executor(self) -> bool:
+        return not (
+            self.fail_fast or self.score_only or self.time_budget is not None or self.pipeline or self.progress
+        )
+
+
+class MetricCostTracker:
+    """Measured judge latency and failure rate per metric within a run.
+
+    Fail-fast ordering runs metrics with the lowest expected cost per decisive
+    failure first: mean latency divided by the (smoothed) observed fail rate.
+    """
+
+    def __init__(self):
+        self._seconds = defaultdict(float)
+        self._calls = defaultdict(int)
+        self._failures = defaultdict(int)
+
+    def record(self, metric_name: str, seconds: float, success: bool):
+        self._seconds[metric_name] += seconds
+        self._calls[metric_name] += 1
+        if not success:
+            self._failures[metric_name] += 1
+
+    def mean_seconds(self, metric_name: str) -> Optional[float]:
+        calls = self._calls[metric_name]
+        return self._seconds[metric_name] / calls if calls else None
+
+    def order(self, metrics: List[BaseMetric]) -> List[BaseMetric]:
+        """Return metrics cheapest-to-fail first; unmeasured metrics keep their position up front."""
+        def expected_cost(indexed):
+            index, metric = indexed
+            mean = self.mean_seconds(metric.__name__)
+            if mean is None:
+                return (0, index)
+            fail_rate = (self._failures[metric.__name__] + 1) / (self._calls[metric.__name__] + 2)
+            return (1, mean / fail_rate)
+
+        return [metric for _, metric in sorted(enumerate(metrics), key=expected_cost)]
+
+
+def not_evaluated_metric_data(metric: BaseMetric) -> MetricData:
+    """Metric data for a metric that was skipped after an earlier metric failed."""
+    return MetricData(
+        name=metric.__name__,
+        threshold=metric.threshold,
+        score=None,
+        reason=None,
+        success=False,
+        strictMode=metric.strict_mode,
+        evaluationModel=metric.evaluation_model,
+        error=NOT_EVALUATED,
+        evaluationCost=0,
+    )
+
+
+def output_test_results(test_results: List[TestResult], output_dir: str):
+    """Print test results and write them to deepeval's test_run log in output_dir."""
+    for test_result in test_results:
+        print_test_result(test_result, TestRunResultDisplay.ALL)
+        write_test_result_to_file(test_result, TestRunResultDisplay.ALL, output_dir)
+
+
+class EvaluationRunner:
+    """Runs test cases against metrics for the evaluation entry points.
+
+    Without execution options this is deepeval's evaluate(). In fail-fast mode
+    each test case runs its metrics one at a time, ordered by measured cost,
+    and stops calling the judge as soon as one metric fails. In score-only mode
+    a second pass asks the judge for reasons, but only for failing or
+    borderline metric results and for test cases selected by `explain`;
+    reasons are remembered, so a runner never asks for the same one twice.
+    With a time budget (shared by all runs of this runner) no new test cases
+    are started once it is spent; their results are simply left out.
+    Every run folds its results into `aggregates` as they arrive, shown
+    live with the progress option and used for the summary tables.
+    """
+
+    def __init__(self, options: Optional[ExecutionOptions] = None, run_stats: Optional[RunStats] = None):
+        self.options = options or ExecutionOptions()
+        self.run_stats = run_stats or RunStats()
+        self.cost_tracker = MetricCostTracker()
+        # Running statistics of the latest run
+        self.aggregates = ResultAggregator()
+        # Reasons already generated by this runner, by (request, score)
+        self._reasons: Dict[str, str] = {}
+        self.restart_budget()
+
+    def restart_budget(self):
+        """Start the time budget over, e.g. for the next report of a long-running process."""
+        self.deadline = (
+            time.monotonic() + self.options.time_budget if self.options.time_budget is not None else None
+        )
+
+    def budget_exhausted(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def run(
+        self,
+        test_cases: List[LLMTestCase],
+        metrics: List[BaseMetric],
+        output_dir: str,
+        explain: Optional[Callable[[TestResult], bool]] = None,
+        task_types: Optional[Dict[str, str]] = None,
+    ) -> EvaluationResult:
+        """Evaluate test cases.
+
+        Args:
+            explain: Selects test results whose metrics all get reasons in score-only mode
+            task_types: task_type by test case name, for the per-task_type aggregates
+        """
+        self.aggregates = ResultAggregator(task_types)
+        if self.options.uses_deepeval_executor():
+            result = evaluate(
+                display_config=DisplayConfig(file_output_dir=output_dir),
+                test_cases=test_cases,
+                metrics=metrics
+            )
+            # deepeval hands results over only when all are done
+            for test_result in result.test_results:
+                self.aggregates.add(test_result)
+            return result
+
+        start_time = time.perf_counter()
+        loop = get_or_create_event_loop()
+        progress = LiveProgress(self.aggregates, len(test_cases)) if self.options.progress else None
+        results = loop.run_until_complete(self._a_run(test_cases, metrics, progress))
+        if progress:
+            progress.close()
+        if self.options.score_only:
+            loop.run_until_complete(self._a_explain(test_cases, results, metrics, explain))
+        run_duration = time.perf_counter() - start_time
+
+        output_test_results([tr for tr in results if tr is not None], output_dir)
+        return self._finish_run(results, run_duration)
+
+    def run_pipeline(
+        self,
+        entries: Iterable[Dict[str, Any]],
+        build: Callable[[Dict[str, Any]], LLMTestCase],
+        metrics: List[BaseMetric],
+        output_dir: str,
+        explain: Optional[Callable[[TestResult], bool]] = None,
+    ) -> Tuple[EvaluationResult, List[Dict[str, Any]], List[LLMTestCase]]:
+        """Evaluate report entries as they are read, with parsing, building, judging and output overlapping.
+
+        Entries are pulled from `entries` in a worker thread (e.g. a streamed
+        report), built into test cases, judged by up to max_concurrent workers
+        and printed/written in entry order as soon as every earlier entry is
+        done; the test_run log is written once all are. Each stage runs at
+        most queue_depth items ahead of the next, so unjudged test cases never
+        pile up. The printed and written results are the same as run() on the
+        built test cases in the same execution mode.
+
+        Returns:
+            Tuple of (evaluation result, entries read, test cases built), both lists in entry order
+        """
+        self.aggregates = ResultAggregator()
+        start_time = time.perf_counter()
+        loop = get_or_create_event_loop()
+        results, read_entries, test_cases = loop.run_until_complete(
+            self._a_pipeline(entries, build, metrics, output_dir, explain)
+        )
+        run_duration = time.perf_counter() - start_time
+        return self._finish_run(results, run_duration), read_entries, test_cases
+
+    def _finish_run(self, results: List[Optional[TestResult]], run_duration: float) -> EvaluationResult:
+        test_results = [tr for tr in results if tr is not None]
+        untested = len(results) - len(test_results)
+        self.run_stats.untested_cases += untested
+
+        passed = sum(1 for tr in test_results if tr.success)
+        print(f"\n✓ Evaluation completed (time taken: {run_duration:.2f}s | "
+              f"{passed}/{len(test_results)} test cases passed)")
+        if untested:
+            print(f"⚠ Time budget exhausted: {untested}/{len(results)} test cases were not evaluated")
+
+        return EvaluationResult(test_results=test_results, confident_link=None, test_run_id=None)
+
+    async def _a_pipeline(
+        self,
+        entries: Iterable[Dict[str, Any]],
+        build: Callable[[Dict[str, Any]], LLMTestCase],
+        metrics: List[BaseMetric],
+        output_dir: str,
+        explain: Optional[Callable[[TestResult], bool]],
+    ) -> Tuple[List[Optional[TestResult]], List[Dict[str, Any]], List[LLMTestCase]]:
+        """Parse -> build -> judge -> print stages connected by bounded queues."""
+        workers = self.options.max_concurrent
+        parsed = asyncio.Queue(maxsize=self.options.queue_depth)
+        built = asyncio.Queue(maxsize=self.options.queue_depth)
+        judged = asyncio.Queue()
+        read_entries, test_cases, results = [], [], []
+        progress = LiveProgress(self.aggregates, reading=True) if self.options.progress else None
+
+        async def parse():
+            iterator = iter(entries)
+            while (entry := await asyncio.to_thread(next, iterator, _END)) is not _END:
+                await parsed.put(entry)
+            await parsed.put(_END)
+            if progress:
+                progress.reading = False
+
+        async def build_test_cases():
+            while (entry := await parsed.get()) is not _END:
+                test_case = build(entry)
+                read_entries.append(entry)
+                test_cases.append(test_case)
+                self.aggregates.task_types[test_case.name] = entry.get("task_type", "unknown")
+                if progress:
+                    progress.total = len(test_cases)
+                await built.put((len(test_cases) - 1, test_case))
+            for _ in range(workers):
+                await built.put(_END)
+
+        async def judge():
+            while (item := await built.get()) is not _END:
+                index, test_case = item
+                # Like run(): test cases not started before the budget ran out yield None
+                result = None if self.budget_exhausted() else await self.a_evaluate_test_case(test_case, metrics, explain)
+                self._record(result, progress)
+                await judged.put((index, result))
+            await judged.put(_END)
+
+        async def output():
+            # Completed results wait here until every earlier entry is done
+            waiting, running = {}, workers
+            while running:
+                item = await judged.get()
+                if item is _END:
+                    running -= 1
+                    continue
+                index, result = item
+                waiting[index] = result
+                while len(results) in waiting:
+                    result = waiting.pop(len(results))
+                    results.append(result)
+                    if result is not None:
+                        if progress:
+                            progress.clear()
+                        print_test_result(result, TestRunResultDisplay.ALL)
+                        if progress:
+                            progress.redraw()
+
+        tasks = [
+            asyncio.ensure_future(stage)
+            for stage in (parse(), build_test_cases(), *(judge() for _ in range(workers)), output())
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        if progress:
+            progress.close()
+
+        # deepeval names the log after the current second, so it is written in one go like run() does
+        for result in results:
+            if result is not None:
+                write_test_result_to_file(result, TestRunResultDisplay.ALL, output_dir)
+        return results, read_entries, test_cases
+
+    async def a_evaluate_test_case(
+        self,
+        test_case: LLMTestCase,
+        metrics: List[BaseMetric],
+        explain: Optional[Callable[[TestResult], bool]] = None,
+    ) -> TestResult:
+        """Evaluate one test case, reasons included; for callers that schedule test cases themselves."""
+        test_result = await self._a_run_test_case(test_case, copy_metrics(metrics))
+        if self.options.score_only:
+            await self._a_explain([test_case], [test_result], metrics, explain)
+        return test_result
+
+    async def _a_run(
+        self,
+        test_cases: List[LLMTestCase],
+        metrics: List[BaseMetric],
+        progress: Optional[LiveProgress] = None,
+    ) -> List[Optional[TestResult]]:
+        """Run test cases in order; test cases not started before the budget ran out yield None."""
+        semaphore = asyncio.Semaphore(self.options.max_concurrent)
+
+        async def run_with_semaphore(test_case):
+            async with semaphore:
+                result = None
+                if not self.budget_exhausted():
+                    result = await self._a_run_test_case(test_case, copy_metrics(metrics))
+            self._record(result, progress)
+            return result
+
+        return await asyncio.gather(*(run_with_semaphore(tc) for tc in test_cases))
+
+    def _record(self, result: Optional[TestResult], progress: Optional[LiveProgress]):
+        """Fold a finished test case into the run's aggregates (reasons added later do not change them)."""
+        self.aggregates.add(result)
+        if progress:
+            progress.update()
+
+    async def _a_measure(self, metric: BaseMetric, test_case: LLMTestCase) -> MetricData:
+        start_time = time.perf_counter()
+        await safe_a_measure(metric, test_case, ignore_errors=False, skip_on_missing_params=False)
+        metric_data = create_metric_data(metric)
+        self.cost_tracker.record(metric.__name__, time.perf_counter() - start_time, metric_data.success)
+        return metric_data
+
+    async def _a_run_test_case(self, test_case: LLMTestCase, metrics: List[BaseMetric]) -> TestResult:
+        metrics_data = {}
+
+        if self.options.fail_fast:
+            failed = False
+            for metric in self.cost_tracker.order(metrics):
+                if failed:
+                    metrics_data[metric.__name__] = not_evaluated_metric_data(metric)
+                    self.run_stats.skipped_calls += 1
+                    continue
+
+                metric_data = await self._a_measure(metric, test_case)
+                metrics_data[metric.__name__] = metric_data
+                failed = not metric_data.success
+        else:
+            results = await asyncio.gather(*(self._a_measure(metric, test_case) for metric in metrics))
+            metrics_data = {metric.__name__: data for metric, data in zip(metrics, results)}
+
+        # Report metrics in their configured order regardless of execution order
+        ordered_data = [metrics_data[metric.__name__] for metric in metrics]
+        return TestResult(
+            name=test_case.name or "",
+            success=all(md.success for md in ordered_data),
+            metrics_data=ordered_data,
+            conversational=False,
+            input=test_case.input,
+            actual_output=test_case.actual_output,
+            expected_output=test_case.expected_output,
+            context=test_case.context,
+            retrieval_context=test_case.retrieval_context,
+            additional_metadata=test_case.additional_metadata,
+        )
+
+    async def _a_explain(
+        self,
+        test_cases: List[LLMTestCase],
+        test_results: List[Optional[TestResult]],
+        metrics: List[BaseMetric],
+        explain: Optional[Callable[[TestResult], bool]],
+    ):
+        """Generate reasons concurrently for the metric results that need a diagnosis."""
+        metrics_by_name = {metric.__name__: unwrap_metric(metric) for metric in metrics}
+        semaphore = asyncio.Semaphore(self.options.max_concurrent)
+
+        async def add_reason(test_case: LLMTestCase, metric_data: MetricData):
+            metric = metrics_by_name[metric_data.name]
+            key = f"{request_key(metric, test_case)}:{metric_data.score}"
+            if key in self._reasons:
+                metric_data.reason = self._reasons[key]
+                return
+            async with semaphore:
+                if self.budget_exhausted():
+                    return
+                with counting_judge_outputs(self.run_stats):
+                    reason, cost = await a_generate_reason(metric, test_case, metric_data.score)
+            self._reasons[key] = reason
+            metric_data.reason = reason
+            if cost is not None:
+                metric_data.evaluation_cost = (metric_data.evaluation_cost or 0) + cost
+            self.run_stats.reason_calls += 1
+
+        tasks = []
+        for test_case, test_result in zip(test_cases, test_results):
+            if test_result is None:
+                continue
+            explain_all = explain is not None and explain(test_result)
+            for metric_data in test_result.metrics_data:
+                # Verdicts reused from a verdict store already come with their reason
+                if metric_data.score is None or metric_data.reason:
+                    continue
+                borderline = abs(metric_data.score - metric_data.threshold) <= REASON_BORDERLINE_MARGIN
+                if explain_all or not metric_data.success or borderline:
+                    tasks.append(add_reason(test_case, metric_data))
+
+        await asyncio.gather(*tasks)
@@ -0,0 +1,60 @@
+"""
+Failure taxonomy of an evaluated report.
+Agent errors (trace.error) and the judge's reasons for failed metrics are
+grouped into near-duplicate clusters (see clustering.py) per task_type, and
+per metric for reasons, so recurring failure modes show up with counts and
+example test ids instead of as hundreds of individual strings.
+"""
+from collections import defaultdict
+from typing import Dict, Any, List, Tuple
+
+from .clustering import MinHasher, cluster_texts
+from .config import CLUSTER_TOP
+from .reporting import map_test_results
+
+
+def _summarize(items: List[Tuple[str, str]], hasher: MinHasher, top: int) -> Dict[str, Any]:
+    clusters = cluster_texts(items, hasher=hasher)
+    return {"failures": len(items), "clusters": len(clusters), "top": clusters[:top]}
+
+
+def build_failure_taxonomy(result, entries: List[Dict[str, Any]], top: int = CLUSTER_TOP) -> Dict[str, Any]:
+    """Largest failure clusters by task_type.
+
+    Args:
+        result: Evaluation result of the entries
+        entries: Report testEntries
+        top: Clusters kept per task_type (and metric)
+
+    Returns:
+        {"errors": {task_type: summary}, "reasons": {task_type: {metric: summary}}}, where a summary
+        holds the number of failures, the number of clusters and the `top` largest clusters
+    """
+    test_result_map = map_test_results(result, entries)
+    errors = defaultdict(list)
+    reasons = defaultdict(lambda: defaultdict(list))
+
+    for entry in entries:
+        entry_id = entry.get("id", "")
+        task_type = entry.get("task_type", "unknown")
+
+        error = (entry.get("trace") or {}).get("error")
+        if error:
+            errors[task_type].append((entry_id, str(error)))
+
+        test_result = test_result_map.get(entry_id)
+        if test_result is None:
+            continue
+        for metric_data in test_result.metrics_data or []:
+            # Skipped (fail-fast) and errored metrics have no reason; score-only passes may have none either
+            if not metric_data.success and metric_data.reason:
+                reasons[task_type][metric_data.name].append((entry_id, metric_data.reason))
+
+    hasher = MinHasher()
+    return {
+        "errors": {task_type: _summarize(items, hasher, top) for task_type, items in errors.items()},
+        "reasons": {
+            task_type: {metric: _summarize(items, hasher, top) for metric, items in by_metric.items()}
+            for task_type, by_metric in reasons.items()
+        },
+    }
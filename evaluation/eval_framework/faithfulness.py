@@ -0,0 +1,288 @@
+"""
+Claim-level faithfulness.
+Instead of one GEval prompt holding the whole output and the whole context,
+the output is split into claims, each claim is paired with the few context
+chunks a local BM25 index ranks highest for it, and the claims are verified
+concurrently with small prompts. The score is the share of supported claims.
+"""
+import asyncio
+import math
+import re
+import textwrap
+from collections import Counter
+from typing import List, Literal, Optional, Tuple, Union
+
+from pydantic import BaseModel
+from deepeval.metrics.base_metric import BaseMetric
+from deepeval.metrics.utils import construct_verbose_logs, initialize_model, trimAndLoadJson
+from deepeval.models import DeepEvalBaseLLM
+from deepeval.test_case import LLMTestCase, LLMTestCaseParams
+
+from .config import (
+    FAITHFULNESS_THRESHOLD,
+    FAITHFULNESS_TOP_K,
+    FAITHFULNESS_CHUNK_CHARS,
+    FAITHFULNESS_CLAIM_CONCURRENCY,
+    FAITHFULNESS_PINNED_CONTEXT,
+)
+
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+(?=[^\s.!?])")
+LIST_ITEM_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+
+# Claims need at least this many words; shorter fragments ("Gerne!", "Hier:") state nothing
+MIN_CLAIM_WORDS = 3
+
+
+def _terms(text: str) -> List[str]:
+    return WORD_RE.findall(text.lower())
+
+
+def split_claims(text: Optional[str]) -> List[str]:
+    """Split an output into claims: list items, sentences and the parts of `;`-joined sentences."""
+    claims = []
+    for line in (text or "").splitlines():
+        line = LIST_ITEM_RE.sub("", line).strip()
+        for sentence in SENTENCE_END_RE.split(line):
+            for part in sentence.split(";"):
+                part = part.strip()
+                if len(_terms(part)) >= MIN_CLAIM_WORDS:
+                    claims.append(part)
+    return claims
+
+
+def chunk_context(context: Optional[List[str]], max_chars: int = FAITHFULNESS_CHUNK_CHARS) -> List[str]:
+    """Context entries as retrieval chunks.
+
+    Long entries (tool observations) are split into runs of whole lines of up
+    to max_chars characters; a single longer line is cut into max_chars pieces.
+    """
+    chunks = []
+    for entry in context or []:
+        entry = str(entry).strip()
+        if len(entry) <= max_chars:
+            if entry:
+                chunks.append(entry)
+            continue
+        current = ""
+        for line in entry.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if current and len(current) + 1 + len(line) > max_chars:
+                chunks.append(current)
+                current = ""
+            while len(line) > max_chars:
+                chunks.append(line[:max_chars])
+                line = line[max_chars:]
+            current = f"{current}\n{line}" if current else line
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a small set of chunks (one test case's context)."""
+
+    def __init__(self, chunks: List[str], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self._term_counts = [Counter(_terms(chunk)) for chunk in chunks]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._avg_length = sum(self._lengths) / len(chunks) if chunks else 0.0
+        document_frequency = Counter(term for counts in self._term_counts for term in counts)
+        n = len(chunks)
+        self._idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def score(self, query: str, index: int) -> float:
+        counts, length = self._term_counts[index], self._lengths[index]
+        score = 0.0
+        for term in set(_terms(query)):
+            tf = counts.get(term)
+            if not tf:
+                continue
+            norm = self.k1 * (1 - self.b + self.b * length / self._avg_length) if self._avg_length else self.k1
+            score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+        return score
+
+    def top_k(self, query: str, k: int) -> List[int]:
+        """Indices of the k best-matching chunks (matching at least one term), best first."""
+        scored = [(self.score(query, i), i) for i in range(len(self.chunks))]
+        ranked = sorted((item for item in scored if item[0] > 0), key=lambda item: (-item[0], item[1]))
+        return [i for _, i in ranked[:k]]
+
+
+class ClaimVerdict(BaseModel):
+    verdict: Literal["yes", "no", "idk"]
+    reason: Optional[str] = None
+
+
+class ClaimVerificationTemplate:
+    """Prompt for checking a single claim against retrieved context chunks."""
+
+    @staticmethod
+    def verify_claim(claim: str, context_chunks: List[str], include_reason: bool = True):
+        context = "\n".join(f"- {chunk}" for chunk in context_chunks) or "(no matching context)"
+        if include_reason:
+            answer = "Return a JSON object with two keys: `verdict` and `reason` (one short sentence)."
+            example = '{"verdict": "no", "reason": "The context gives a different due date."}'
+        else:
+            answer = "Return a JSON object with a single key: `verdict`. Do not explain the verdict."
+            example = '{"verdict": "no"}'
+        return textwrap.dedent(
+            f"""You are checking whether a claim made by an AI assistant is supported by the context it was given.
+
+            Answer `verdict` with:
+            - "yes" if the context states or directly implies the claim,
+            - "no" if the context contradicts the claim,
+            - "idk" if the context does not mention what the claim says (the claim may be fabricated).
+            Acknowledgements of the user's request and offers to help need no support; answer "yes" for them.
+
+            Context:
+            {context}
+
+            Claim:
+            {claim}
+
+            {answer}
+            Example: {example}
+
+            JSON:
+            """
+        )
+
+
+class ClaimFaithfulnessMetric(BaseMetric):
+    """Faithfulness to CONTEXT, judged claim by claim with retrieved context.
+
+    Every claim of ACTUAL_OUTPUT is verified against the FAITHFULNESS_TOP_K
+    context chunks BM25 ranks highest for it (plus FAITHFULNESS_PINNED_CONTEXT
+    entries such as the evaluation date); up to `claim_concurrency` claims of a
+    test case are verified at once. Only grounding in CONTEXT is judged, not
+    agreement with EXPECTED_OUTPUT.
+    """
+
+    _required_params: List[LLMTestCaseParams] = [
+        LLMTestCaseParams.ACTUAL_OUTPUT,
+        LLMTestCaseParams.CONTEXT,
+    ]
+
+    def __init__(
+        self,
+        threshold: float = FAITHFULNESS_THRESHOLD,
+        model: Optional[Union[str, DeepEvalBaseLLM]] = None,
+        include_reason: bool = True,
+        top_k: int = FAITHFULNESS_TOP_K,
+        claim_concurrency: int = FAITHFULNESS_CLAIM_CONCURRENCY,
+        async_mode: bool = True,
+        strict_mode: bool = False,
+        verbose_mode: bool = False,
+    ):
+        self.name = "Faithfulness (to context) [Claims]"
+        self.threshold = 1 if strict_mode else threshold
+        self.model, self.using_native_model = initialize_model(model)
+        self.evaluation_model = self.model.get_model_name()
+        self.include_reason = include_reason
+        self.top_k = top_k
+        self.claim_concurrency = claim_concurrency
+        self.async_mode = async_mode
+        self.strict_mode = strict_mode
+        self.verbose_mode = verbose_mode
+
+    @property
+    def __name__(self):
+        return self.name
+
+    def verification_prompts(self, test_case: LLMTestCase) -> List[Tuple[str, str]]:
+        """(claim, prompt) for every claim of the test case's output."""
+        chunks = chunk_context(test_case.context)
+        pinned = [chunk for chunk in chunks if chunk.startswith(FAITHFULNESS_PINNED_CONTEXT)]
+        index = BM25Index(chunks)
+        prompts = []
+        for claim in split_claims(test_case.actual_output):
+            retrieved = [chunks[i] for i in index.top_k(claim, self.top_k)]
+            context = pinned + [chunk for chunk in retrieved if chunk not in pinned]
+            prompts.append((claim, ClaimVerificationTemplate.verify_claim(claim, context, self.include_reason)))
+        return prompts
+
+    async def _a_verify(self, prompt: str, semaphore: asyncio.Semaphore) -> ClaimVerdict:
+        async with semaphore:
+            if self.using_native_model:
+                res, cost = await self.model.a_generate(prompt, schema=ClaimVerdict)
+                self.evaluation_cost += cost
+                return res
+            try:
+                return await self.model.a_generate(prompt, schema=ClaimVerdict)
+            except TypeError:
+                res = await self.model.a_generate(prompt)
+                return ClaimVerdict(**trimAndLoadJson(res, self))
+
+    def _verify(self, prompt: str) -> ClaimVerdict:
+        if self.using_native_model:
+            res, cost = self.model.generate(prompt, schema=ClaimVerdict)
+            self.evaluation_cost += cost
+            return res
+        try:
+            return self.model.generate(prompt, schema=ClaimVerdict)
+        except TypeError:
+            res = self.model.generate(prompt)
+            return ClaimVerdict(**trimAndLoadJson(res, self))
+
+    def _start(self):
+        self.error = None
+        self.evaluation_cost = 0 if self.using_native_model else None
+
+    def _finish(self, claims: List[str], verdicts: List[ClaimVerdict]) -> float:
+        self.claims = claims
+        self.verdicts = verdicts
+        unsupported = [(claim, v) for claim, v in zip(claims, verdicts) if v.verdict != "yes"]
+        # An output without claims asserts nothing that could be unfaithful
+        self.score = 1.0 if not claims else round((len(claims) - len(unsupported)) / len(claims), 4)
+        self.success = self.score >= self.threshold
+        self.reason = self._reason(len(claims), unsupported) if self.include_reason else None
+        self.verbose_logs = construct_verbose_logs(
+            self,
+            steps=[
+                "Claims:\n" + "\n".join(f"[{v.verdict}] {claim}" for claim, v in zip(claims, verdicts)),
+                f"Score: {self.score}\nReason: {self.reason}",
+            ],
+        )
+        return self.score
+
+    @staticmethod
+    def _reason(total: int, unsupported: List[Tuple[str, ClaimVerdict]]) -> str:
+        if not total:
+            return "The output makes no claims that need support from the context."
+        if not unsupported:
+            return f"All {total} claims are supported by the context." if total > 1 else "The claim is supported by the context."
+        details = "; ".join(
+            f"\"{claim}\" ({'contradicted' if v.verdict == 'no' else 'not in context'}"
+            f"{': ' + v.reason if v.reason else ''})"
+            for claim, v in unsupported
+        )
+        return f"{len(unsupported)} of {total} claims are not supported by the context: {details}"
+
+    async def a_measure(self, test_case: LLMTestCase, *args, **kwargs) -> float:
+        self._start()
+        prompts = self.verification_prompts(test_case)
+        semaphore = asyncio.Semaphore(self.claim_concurrency)
+        verdicts = await asyncio.gather(*(self._a_verify(prompt, semaphore) for _, prompt in prompts))
+        return self._finish([claim for claim, _ in prompts], list(verdicts))
+
+    def measure(self, test_case: LLMTestCase, *args, **kwargs) -> float:
+        self._start()
+        prompts = self.verification_prompts(test_case)
+        verdicts = [self._verify(prompt) for _, prompt in prompts]
+        return self._finish([claim for claim, _ in prompts], verdicts)
+
+    def is_successful(self) -> bool:
+        if self.error is not None:
+            self.success = False
+        else:
+            self.success = self.score is not None and self.score >= self.threshold
+        return self.success
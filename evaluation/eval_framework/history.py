@@ -0,0 +1,384 @@
+"""
+History of evaluation results across git commits.
+analysis.json is overwritten by every run in its output_dir; each run is
+also appended to a local SQLite store, keyed by experiment, git hash and
+report timestamp, with per-test and per-metric results and the category
+summaries. Pass-rate and metric trends over the last commits, and the
+tests that regressed since a commit, are then single queries.
+"""
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .execution import NOT_EVALUATED
+from .reporting import map_test_results
+from .verdict_store import case_key, parse_test_run_log, test_case_key
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    experiment TEXT NOT NULL,
+    git_hash TEXT NOT NULL,
+    report_timestamp TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    scope TEXT NOT NULL,
+    report_path TEXT,
+    output_dir TEXT,
+    total_tests INTEGER NOT NULL,
+    tested INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    pass_rate REAL
+);
+CREATE INDEX IF NOT EXISTS runs_by_commit ON runs(experiment, git_hash, report_timestamp, recorded_at);
+CREATE TABLE IF NOT EXISTS run_categories (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    task_type TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    tested INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    pass_rate REAL,
+    PRIMARY KEY (run_id, task_type)
+);
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    metric TEXT NOT NULL,
+    evaluated INTEGER NOT NULL,
+    scored INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    mean_score REAL,
+    pass_rate REAL,
+    PRIMARY KEY (run_id, metric)
+);
+CREATE TABLE IF NOT EXISTS test_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id TEXT NOT NULL,
+    task_type TEXT NOT NULL,
+    success INTEGER,
+    PRIMARY KEY (run_id, test_id)
+);
+CREATE TABLE IF NOT EXISTS metric_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    score REAL,
+    threshold REAL,
+    success INTEGER,
+    PRIMARY KEY (run_id, test_id, metric)
+);
+CREATE INDEX IF NOT EXISTS metric_results_by_metric ON metric_results(metric, run_id);
+"""
+
+# Runs that judged every test entry of their report; only these count towards trends by default
+SCOPE_FULL = "full"
+SCOPE_SUBSET = "subset"  # --ids or a time budget left entries untested
+SCOPE_SAMPLE = "sample"  # --sample
+
+# Latest run of each (experiment, git_hash): the one of the newest report, then the most recently recorded
+_LATEST_RUNS = """
+latest AS (
+    SELECT * FROM (
+        SELECT runs.*, ROW_NUMBER() OVER (
+            PARTITION BY experiment, git_hash ORDER BY report_timestamp DESC, recorded_at DESC
+        ) AS rank
+        FROM runs WHERE (? IS NULL OR experiment = ?) AND (? OR scope = 'full')
+    ) WHERE rank = 1
+)
+"""
+
+
+def run_scope(coverage: Dict[str, Any], sampled: bool = False, selected: bool = False) -> str:
+    """Scope of a run from its coverage_report, whether it judged a sample and whether entries were picked by id."""
+    if sampled:
+        return SCOPE_SAMPLE
+    if selected or coverage.get("untested"):
+        return SCOPE_SUBSET
+    return SCOPE_FULL
+
+
+def metric_success(success: bool, error: Optional[str]) -> Optional[bool]:
+    """Success of a metric result; None for a metric fail-fast skipped, which neither passed nor failed."""
+    return None if error == NOT_EVALUATED else bool(success)
+
+
+def history_tests(result, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-test results of an evaluation in the form HistoryStore.record_run takes.
+
+    Entries without a test result (not evaluated) are kept with success None,
+    as are metrics that fail-fast skipped.
+    """
+    test_result_map = map_test_results(result, entries)
+    tests = []
+    for entry in entries:
+        test_id = entry.get("id", "")
+        test_result = test_result_map.get(test_id)
+        tests.append({
+            "id": test_id,
+            "task_type": entry.get("task_type", "unknown"),
+            "success": bool(test_result.success) if test_result is not None else None,
+            "metrics": [
+                {"name": m.name, "score": m.score, "threshold": m.threshold,
+                 "success": metric_success(m.success, m.error)}
+                for m in (test_result.metrics_data or [])
+            ] if test_result is not None else [],
+        })
+    return tests
+
+
+def history_tests_from_log(log_path: str, entries: List[Dict[str, Any]], test_cases: List[Any]) -> List[Dict[str, Any]]:
+    """Per-test results of an earlier evaluation, read back from its deepeval test_run log.
+
+    Logged results are matched to the entries through the fields deepeval
+    logs of their test cases (built from the same report, one per entry).
+    Entries with no logged result are kept with success None.
+    """
+    ids_by_key: Dict[str, List[str]] = {}
+    for entry, test_case in zip(entries, test_cases):
+        ids_by_key.setdefault(test_case_key(test_case), []).append(entry.get("id", ""))
+
+    logged = {}
+    for result in parse_test_run_log(log_path):
+        key = case_key(
+            result["input"], result["actual_output"], result["expected_output"],
+            result["context"], result["retrieval_context"],
+        )
+        # Entries with identical logged fields get their results in log order
+        ids = ids_by_key.get(key) or []
+        if ids:
+            logged[ids.pop(0)] = result["metrics"]
+
+    tests = []
+    for entry in entries:
+        metrics = logged.get(entry.get("id", ""))
+        tests.append({
+            "id": entry.get("id", ""),
+            "task_type": entry.get("task_type", "unknown"),
+            "success": all(m["success"] for m in metrics) if metrics is not None else None,
+            "metrics": [
+                {"name": m["name"], "score": m["score"], "threshold": m["threshold"],
+                 "success": metric_success(m["success"], m["error"])}
+                for m in metrics or []
+            ],
+        })
+    return tests
+
+
+class HistoryStore:
+    """SQLite history of evaluation runs.
+
+    Every recorded run is appended, so the same report evaluated twice has
+    two runs. Trends take the latest run per commit and experiment; runs of
+    a sample or a subset of the entries are only included when asked for.
+    Commits are ordered by the timestamp of their report.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def record_run(
+        self,
+        experiment: str,
+        git_hash: str,
+        report_timestamp: str,
+        tests: Iterable[Dict[str, Any]],
+        scope: str = SCOPE_FULL,
+        report_path: Optional[str] = None,
+        output_dir: Optional[str] = None,
+    ) -> int:
+        """Append an evaluation run and return its id.
+
+        Args:
+            tests: {"id", "task_type", "success" (None if not evaluated),
+                "metrics": [{"name", "score", "threshold", "success" (None if skipped)}]}, see history_tests
+            scope: SCOPE_FULL, or SCOPE_SUBSET / SCOPE_SAMPLE for runs that judged only part of the report
+        """
+        with self.conn:
+            run_id = self.conn.execute(
+                "INSERT INTO runs (experiment, git_hash, report_timestamp, recorded_at, scope, report_path, "
+                "output_dir, total_tests, tested, passed) VALUES (?, ?, ?, ?, ?, ?, ?, 0, 0, 0)",
+                (experiment, git_hash, report_timestamp, time.time(), scope,
+                 os.path.abspath(report_path) if report_path else None, output_dir),
+            ).lastrowid
+            for test in tests:
+                success = test["success"]
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO test_results (run_id, test_id, task_type, success) VALUES (?, ?, ?, ?)",
+                    (run_id, test["id"], test["task_type"], None if success is None else int(success)),
+                )
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO metric_results (run_id, test_id, metric, score, threshold, success) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(run_id, test["id"], m["name"], m["score"], m["threshold"],
+                      None if m["success"] is None else int(m["success"]))
+                     for m in test["metrics"]],
+                )
+
+            # Summaries are computed once here so trend queries never touch the per-test rows
+            self.conn.execute(
+                "INSERT INTO run_categories (run_id, task_type, n, tested, passed, pass_rate) "
+                "SELECT run_id, task_type, COUNT(*), COUNT(success), COALESCE(SUM(success), 0), "
+                "ROUND(100.0 * SUM(success) / COUNT(success), 2) "
+                "FROM test_results WHERE run_id = ? GROUP BY task_type",
+                (run_id,),
+            )
+            self.conn.execute(
+                "INSERT INTO run_metrics (run_id, metric, evaluated, scored, passed, mean_score, pass_rate) "
+                "SELECT run_id, metric, COUNT(success), COUNT(score), COALESCE(SUM(success), 0), AVG(score), "
+                "ROUND(100.0 * SUM(success) / COUNT(success), 2) "
+                "FROM metric_results WHERE run_id = ? GROUP BY metric",
+                (run_id,),
+            )
+            total_tests, tested, passed = self.conn.execute(
+                "SELECT COALESCE(SUM(n), 0), COALESCE(SUM(tested), 0), COALESCE(SUM(passed), 0) "
+                "FROM run_categories WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+            self.conn.execute(
+                "UPDATE runs SET total_tests = ?, tested = ?, passed = ?, pass_rate = ? WHERE id = ?",
+                (total_tests, tested, passed, round(passed / tested * 100, 2) if tested else None, run_id),
+            )
+        return run_id
+
+    def runs(self, experiment: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT * FROM runs WHERE ? IS NULL OR experiment = ? ORDER BY report_timestamp, recorded_at",
+            (experiment, experiment),
+        )
+        return [dict(row) for row in rows]
+
+    def pass_rate_trend(
+        self, experiment: Optional[str] = None, last: int = 10, include_partial: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Overall and per-task_type pass rate of the last `last` commits of each experiment, oldest first.
+
+        Returns:
+            [{"experiment", "git_hash", "report_timestamp", "run_id", "scope", "tested", "passed",
+            "pass_rate", "categories": {task_type: {"tested", "passed", "pass_rate"}}}]
+        """
+        rows = self.conn.execute(
+            f"WITH {_LATEST_RUNS}, ranked AS ("
+            "SELECT *, ROW_NUMBER() OVER (PARTITION BY experiment ORDER BY report_timestamp DESC) AS age "
+            "FROM latest) "
+            "SELECT r.experiment, r.git_hash, r.report_timestamp, r.id AS run_id, r.scope, r.tested, r.passed, "
+            "r.pass_rate, c.task_type, c.tested AS type_tested, c.passed AS type_passed, c.pass_rate AS type_pass_rate "
+            "FROM ranked r LEFT JOIN run_categories c ON c.run_id = r.id "
+            "WHERE r.age <= ? ORDER BY r.experiment, r.report_timestamp, c.task_type",
+            (experiment, experiment, int(include_partial), last),
+        )
+        trend = {}
+        for row in rows:
+            point = trend.setdefault(row["run_id"], {
+                key: row[key] for key in
+                ("experiment", "git_hash", "report_timestamp", "run_id", "scope", "tested", "passed", "pass_rate")
+            } | {"categories": {}})
+            if row["task_type"] is not None:
+                point["categories"][row["task_type"]] = {
+                    "tested": row["type_tested"], "passed": row["type_passed"], "pass_rate": row["type_pass_rate"],
+                }
+        return list(trend.values())
+
+    def metric_trend(
+        self,
+        experiment: Optional[str] = None,
+        last: int = 10,
+        metrics: Optional[List[str]] = None,
+        include_partial: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Mean score and pass rate per metric over the last `last` commits of each experiment, oldest first.
+
+        `metrics` selects metrics by case-insensitive substring of their name, so "faithfulness" matches
+        "Faithfulness (to context) [GEval]"; None selects all.
+        """
+        rows = self.conn.execute(
+            f"WITH {_LATEST_RUNS}, ranked AS ("
+            "SELECT *, ROW_NUMBER() OVER (PARTITION BY experiment ORDER BY report_timestamp DESC) AS age "
+            "FROM latest) "
+            "SELECT r.experiment, r.git_hash, r.report_timestamp, r.id AS run_id, m.metric, m.evaluated, m.scored, "
+            "m.passed, m.mean_score, m.pass_rate "
+            "FROM ranked r JOIN run_metrics m ON m.run_id = r.id "
+            "WHERE r.age <= ? ORDER BY r.experiment, m.metric, r.report_timestamp",
+            (experiment, experiment, int(include_partial), last),
+        )
+        wanted = [name.lower() for name in metrics] if metrics is not None else None
+        return [
+            dict(row) for row in rows
+            if wanted is None or any(name in row["metric"].lower() for name in wanted)
+        ]
+
+    def resolve_run(
+        self, experiment: str, git_hash: Optional[str] = None, include_partial: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Latest run of the experiment at a commit (hash or unique prefix), or of its newest commit."""
+        row = self.conn.execute(
+            f"WITH {_LATEST_RUNS} SELECT * FROM latest WHERE ? IS NULL OR git_hash LIKE ? || '%' "
+            "ORDER BY report_timestamp DESC LIMIT 1",
+            (experiment, experiment, int(include_partial), git_hash, git_hash),
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def regressions(self, baseline_run: int, candidate_run: int) -> List[Dict[str, Any]]:
+        """Tests that passed in the baseline run and fail in the candidate run.
+
+        Returns:
+            [{"test_id", "task_type", "metrics": [{"metric", "baseline_score", "candidate_score",
+            "threshold"}]}] with the metrics the test fails in the candidate run
+        """
+        rows = self.conn.execute(
+            "SELECT c.test_id, c.task_type, cm.metric, bm.score AS baseline_score, cm.score AS candidate_score, "
+            "cm.threshold "
+            "FROM test_results b JOIN test_results c ON c.test_id = b.test_id AND c.run_id = ? "
+            "LEFT JOIN metric_results cm ON cm.run_id = c.run_id AND cm.test_id = c.test_id AND cm.success = 0 "
+            "LEFT JOIN metric_results bm ON bm.run_id = b.run_id AND bm.test_id = b.test_id AND bm.metric = cm.metric "
+            "WHERE b.run_id = ? AND b.success = 1 AND c.success = 0 "
+            "ORDER BY c.task_type, c.test_id, cm.metric",
+            (candidate_run, baseline_run),
+        )
+        regressed = {}
+        for row in rows:
+            test = regressed.setdefault(row["test_id"], {
+                "test_id": row["test_id"], "task_type": row["task_type"], "metrics": [],
+            })
+            if row["metric"] is not None:
+                test["metrics"].append({
+                    "metric": row["metric"],
+                    "baseline_score": row["baseline_score"],
+                    "candidate_score": row["candidate_score"],
+                    "threshold": row["threshold"],
+                })
+        return list(regressed.values())
+
+
+def record_evaluation(
+    path: str,
+    experiment: str,
+    report_data: Dict[str, Any],
+    result,
+    scope: str = SCOPE_FULL,
+    report_path: Optional[str] = None,
+    output_dir: Optional[str] = None,
+) -> int:
+    """Append the evaluation of a report to the history store at `path` and return the run id."""
+    store = HistoryStore(path)
+    try:
+        return store.record_run(
+            experiment,
+            report_data.get("gitHash", "N/A"),
+            report_data.get("timestamp", "N/A"),
+            history_tests(result, report_data.get("testEntries", [])),
+            scope=scope,
+            report_path=report_path,
+            output_dir=output_dir,
+        )
+    finally:
+        store.close()
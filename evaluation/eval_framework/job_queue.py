@@ -0,0 +1,430 @@
+"""
+Persistent, prioritized evaluation job queue.
+Report and calibration evaluations are enqueued as jobs in a local SQLite
+database, one work item per test case. Workers claim test cases from the job
+with the highest priority, sharing equally among jobs of the same priority,
+so one big report cannot starve the others. Once all test cases of a job are
+done, the worker that finished the last one finalizes the job. Claimed test
+cases are leases: a worker renews the ones it is still judging, and cases
+whose lease ran out (their worker crashed) go back in the queue.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Callable, Set, Tuple
+
+from deepeval.evaluate.types import EvaluationResult, TestResult
+from deepeval.test_case import LLMTestCase
+from deepeval.test_run import MetricData
+
+from .config import QUEUE_LEASE_SECONDS, QUEUE_MAX_ATTEMPTS, QUEUE_THROUGHPUT_WINDOW
+
+
+JOB_REPORT = "report"
+JOB_CALIBRATION = "calibration"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    report_path TEXT,
+    output_dir TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    total_cases INTEGER NOT NULL,
+    claimed_cases INTEGER NOT NULL DEFAULT 0,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    summary TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS cases (
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    case_index INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, case_index)
+);
+CREATE INDEX IF NOT EXISTS cases_by_status ON cases(status, job_id, case_index);
+CREATE INDEX IF NOT EXISTS cases_by_finish ON cases(finished_at);
+"""
+
+
+def test_result_to_dict(test_result: TestResult) -> Dict[str, Any]:
+    return {
+        "name": test_result.name,
+        "success": test_result.success,
+        "metrics_data": [md.model_dump(mode="json") for md in test_result.metrics_data or []],
+        "input": test_result.input,
+        "actual_output": test_result.actual_output,
+        "expected_output": test_result.expected_output,
+        "context": test_result.context,
+        "retrieval_context": test_result.retrieval_context,
+        "additional_metadata": test_result.additional_metadata,
+    }
+
+
+def test_result_from_dict(data: Dict[str, Any]) -> TestResult:
+    return TestResult(
+        name=data["name"],
+        success=data["success"],
+        metrics_data=[MetricData(**md) for md in data["metrics_data"]],
+        conversational=False,
+        input=data["input"],
+        actual_output=data["actual_output"],
+        expected_output=data["expected_output"],
+        context=data["context"],
+        retrieval_context=data["retrieval_context"],
+        additional_metadata=data["additional_metadata"],
+    )
+
+
+class JobQueue:
+    """SQLite-backed queue of evaluation jobs, shared by any number of worker processes.
+
+    Methods may be called from several threads of one process (the workers run
+    their queue calls in threads); they take turns on the connection.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Autocommit; transactions are explicit (BEGIN IMMEDIATE) where reads and writes must be atomic
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _execute(self, sql: str, parameters=()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self.conn.execute(sql, parameters).fetchall()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def submit(self, kind: str, report_path: Optional[str], output_dir: str, priority: int, total_cases: int) -> int:
+        """Enqueue a job with one work item per test case and return its id."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, report_path, output_dir, priority, total_cases, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, report_path, output_dir, priority, total_cases, time.time()),
+            )
+            job_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO cases (job_id, case_index) VALUES (?, ?)",
+                ((job_id, i) for i in range(total_cases)),
+            )
+        if total_cases == 0:
+            self._finish_job(job_id, "done", summary={})
+        return job_id
+
+    def job(self, job_id: int) -> Dict[str, Any]:
+        return dict(self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))[0])
+
+    def open_cases(self) -> int:
+        """Test cases of any job that are queued or still being judged."""
+        return self._execute("SELECT COUNT(*) FROM cases WHERE status IN ('queued', 'running')")[0][0]
+
+    def renew(self, leases: List[Tuple[int, int]]):
+        """Extend the leases of (job id, case index) test cases a worker is still judging."""
+        if not leases:
+            return
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE cases SET claimed_at = ? WHERE job_id = ? AND case_index = ? AND status = 'running'",
+                ((now, job_id, case_index) for job_id, case_index in leases),
+            )
+
+    def requeue_stale(self, lease_seconds: float = QUEUE_LEASE_SECONDS) -> int:
+        """Put test cases claimed by workers that did not finish them in time back in the queue."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE cases SET status = 'queued' WHERE status = 'running' AND claimed_at < ?",
+                (time.time() - lease_seconds,),
+            )
+            return cursor.rowcount
+
+    def claim(self) -> Optional[Tuple[int, int]]:
+        """Claim the next test case as (job id, case index), or None if nothing is queued.
+
+        Highest priority job first; among equal priorities the job that has been
+        served least, so concurrently queued reports progress at the same rate.
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT j.id FROM jobs j WHERE j.status IN ('queued', 'running') "
+                "AND EXISTS (SELECT 1 FROM cases c WHERE c.job_id = j.id AND c.status = 'queued') "
+                "ORDER BY j.priority DESC, j.claimed_cases, j.id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            job_id = row["id"]
+            case_index = conn.execute(
+                "SELECT MIN(case_index) FROM cases WHERE job_id = ? AND status = 'queued'", (job_id,)
+            ).fetchone()[0]
+            now = time.time()
+            conn.execute(
+                "UPDATE cases SET status = 'running', claimed_at = ?, attempts = attempts + 1 "
+                "WHERE job_id = ? AND case_index = ?",
+                (now, job_id, case_index),
+            )
+            conn.execute(
+                "UPDATE jobs SET claimed_cases = claimed_cases + 1, status = 'running', "
+                "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (now, job_id),
+            )
+        return job_id, case_index
+
+    def release(self, job_id: int, case_index: int):
+        """Return a claimed test case to the queue without counting the attempt."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE cases SET status = 'queued', attempts = attempts - 1 "
+                "WHERE job_id = ? AND case_index = ? AND status = 'running'",
+                (job_id, case_index),
+            )
+            if cursor.rowcount:
+                conn.execute("UPDATE jobs SET claimed_cases = claimed_cases - 1 WHERE id = ?", (job_id,))
+
+    def complete(self, job_id: int, case_index: int, test_result: TestResult) -> bool:
+        """Store a test case result. Returns True if it was the job's last open test case."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE cases SET status = 'done', finished_at = ?, result = ?, error = NULL "
+                "WHERE job_id = ? AND case_index = ?",
+                (time.time(), json.dumps(test_result_to_dict(test_result), ensure_ascii=False), job_id, case_index),
+            )
+            return self._claim_finalization(conn, job_id)
+
+    def fail(self, job_id: int, case_index: int, error: str, max_attempts: int = QUEUE_MAX_ATTEMPTS) -> bool:
+        """Requeue a failed test case, or give up on it after max_attempts.
+
+        Returns True if giving up closed the job's last open test case.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE cases SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "finished_at = CASE WHEN attempts >= ? THEN ? ELSE NULL END, error = ? "
+                "WHERE job_id = ? AND case_index = ?",
+                (max_attempts, max_attempts, time.time(), error, job_id, case_index),
+            )
+            return self._claim_finalization(conn, job_id)
+
+    def _claim_finalization(self, conn: sqlite3.Connection, job_id: int) -> bool:
+        open_cases = conn.execute(
+            "SELECT COUNT(*) FROM cases WHERE job_id = ? AND status IN ('queued', 'running')", (job_id,)
+        ).fetchone()[0]
+        if open_cases:
+            return False
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'finalizing' WHERE id = ? AND status IN ('queued', 'running')", (job_id,)
+        )
+        return cursor.rowcount == 1
+
+    def results(self, job_id: int) -> EvaluationResult:
+        """Results of a job's evaluated test cases, in test case order (failed ones are left out)."""
+        rows = self._execute(
+            "SELECT result FROM cases WHERE job_id = ? AND status = 'done' ORDER BY case_index", (job_id,)
+        )
+        test_results = [test_result_from_dict(json.loads(row["result"])) for row in rows]
+        return EvaluationResult(test_results=test_results, confident_link=None, test_run_id=None)
+
+    def finish(self, job_id: int, summary: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        self._finish_job(job_id, "failed" if error else "done", summary=summary, error=error)
+
+    def _finish_job(self, job_id: int, status: str, summary: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, summary = ?, error = ? WHERE id = ?",
+            (status, time.time(), json.dumps(summary) if summary is not None else None, error, job_id),
+        )
+
+    def latest_summary(self, kind: str) -> Optional[Dict[str, Any]]:
+        """Summary of the most recently finished job of a kind (e.g. the current calibration)."""
+        rows = self._execute(
+            "SELECT summary FROM jobs WHERE kind = ? AND status = 'done' AND summary IS NOT NULL "
+            "ORDER BY finished_at DESC LIMIT 1",
+            (kind,),
+        )
+        return json.loads(rows[0]["summary"]) if rows else None
+
+    def status(self, window: float = QUEUE_THROUGHPUT_WINDOW) -> Dict[str, Any]:
+        """Queue depth, recent throughput and ETA, and per-job progress."""
+        now = time.time()
+        counts = {
+            row["status"]: row["n"]
+            for row in self._execute("SELECT status, COUNT(*) AS n FROM cases GROUP BY status")
+        }
+        recent, first_finish = self._execute(
+            "SELECT COUNT(*), MIN(finished_at) FROM cases WHERE status = 'done' AND finished_at >= ?",
+            (now - window,),
+        )[0]
+        throughput = recent / (now - first_finish) if recent >= 2 and now > first_finish else None
+        remaining = counts.get("queued", 0) + counts.get("running", 0)
+
+        jobs = []
+        for row in self._execute(
+            "SELECT j.*, "
+            "SUM(c.status = 'done') AS done, SUM(c.status = 'running') AS running, "
+            "SUM(c.status = 'queued') AS queued, SUM(c.status = 'failed') AS failed "
+            "FROM jobs j LEFT JOIN cases c ON c.job_id = j.id "
+            "GROUP BY j.id ORDER BY (j.status IN ('done', 'failed')), j.priority DESC, j.id"
+        ):
+            jobs.append({
+                "id": row["id"],
+                "kind": row["kind"],
+                "report_path": row["report_path"],
+                "output_dir": row["output_dir"],
+                "priority": row["priority"],
+                "status": row["status"],
+                "total_cases": row["total_cases"],
+                "done": row["done"] or 0,
+                "running": row["running"] or 0,
+                "queued": row["queued"] or 0,
+                "failed": row["failed"] or 0,
+                "submitted_at": row["submitted_at"],
+                "started_at": row["started_at"],
+                "finished_at": row["finished_at"],
+                "error": row["error"],
+            })
+
+        return {
+            "queued_cases": counts.get("queued", 0),
+            "running_cases": counts.get("running", 0),
+            "done_cases": counts.get("done", 0),
+            "failed_cases": counts.get("failed", 0),
+            "open_jobs": sum(1 for job in jobs if job["status"] not in ("done", "failed")),
+            "throughput_per_minute": round(throughput * 60, 2) if throughput else None,
+            "eta_seconds": round(remaining / throughput, 1) if throughput and remaining else (0.0 if not remaining else None),
+            "jobs": jobs,
+        }
+
+
+class QueueWorkerPool:
+    """Async workers that judge queued test cases one at a time each.
+
+    Args:
+        queue: Job queue to pull from
+        evaluate: Coroutine function judging one test case, called with (job, test case)
+        load_test_cases: Test cases of a job, by case index (cached per job)
+        finalize: Called with (job, result) once all test cases of a job are done;
+            returns the job summary stored in the queue
+        workers: Number of concurrent workers
+        poll_interval: Seconds an idle worker waits before looking for work again; also how often
+            leases are renewed and stale ones requeued
+        drain: Stop once no test case of any job is queued or being judged
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        evaluate: Callable[[Dict[str, Any], LLMTestCase], Any],
+        load_test_cases: Callable[[Dict[str, Any]], List[LLMTestCase]],
+        finalize: Callable[[Dict[str, Any], EvaluationResult], Optional[Dict[str, Any]]],
+        workers: int,
+        poll_interval: float = 2.0,
+        drain: bool = False,
+    ):
+        self.queue = queue
+        self.evaluate = evaluate
+        self.load_test_cases = load_test_cases
+        self.finalize = finalize
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.drain = drain
+        self.evaluated = 0
+        self.failed = 0
+        self._jobs: Dict[int, Tuple[Dict[str, Any], List[LLMTestCase]]] = {}
+        self._leases: Set[Tuple[int, int]] = set()
+
+    async def _job(self, job_id: int) -> Tuple[Dict[str, Any], List[LLMTestCase]]:
+        if job_id not in self._jobs:
+            job = await asyncio.to_thread(self.queue.job, job_id)
+            test_cases = self.load_test_cases(job)
+            if len(test_cases) != job["total_cases"]:
+                raise ValueError(
+                    f"job {job_id}: expected {job['total_cases']} test cases, found {len(test_cases)}"
+                )
+            self._jobs[job_id] = (job, test_cases)
+        return self._jobs[job_id]
+
+    async def run(self):
+        leases = asyncio.ensure_future(self._keep_leases())
+        try:
+            await asyncio.gather(*(self._worker() for _ in range(self.workers)))
+        finally:
+            leases.cancel()
+
+    async def _keep_leases(self):
+        """Renew the leases of the test cases being judged here and requeue those of crashed workers."""
+        while True:
+            await asyncio.to_thread(self.queue.renew, list(self._leases))
+            await asyncio.to_thread(self.queue.requeue_stale)
+            await asyncio.sleep(self.poll_interval)
+
+    async def _worker(self):
+        while True:
+            # SQLite calls block, so they run in threads while the other workers keep judging
+            claimed = await asyncio.to_thread(self.queue.claim)
+            if claimed is None:
+                # Test cases still being judged may be requeued (failed, released or stale)
+                if self.drain and not await asyncio.to_thread(self.queue.open_cases):
+                    return
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            job_id, case_index = claimed
+            self._leases.add(claimed)
+            try:
+                job, test_cases = await self._job(job_id)
+                test_result = await self.evaluate(job, test_cases[case_index])
+            except asyncio.CancelledError:
+                # Interrupted, not failed: hand the test case back (synchronously, the loop is shutting down)
+                self.queue.release(job_id, case_index)
+                raise
+            except Exception as e:
+                self.failed += 1
+                last = await asyncio.to_thread(self.queue.fail, job_id, case_index, f"{type(e).__name__}: {e}")
+            else:
+                self.evaluated += 1
+                last = await asyncio.to_thread(self.queue.complete, job_id, case_index, test_result)
+            finally:
+                self._leases.discard(claimed)
+            if last:
+                await self._finalize(job_id)
+
+    async def _finalize(self, job_id: int):
+        job = await asyncio.to_thread(self.queue.job, job_id)
+        try:
+            summary = self.finalize(job, await asyncio.to_thread(self.queue.results, job_id))
+        except Exception as e:
+            self.queue.finish(job_id, error=f"{type(e).__name__}: {e}")
+            print(f"✗ Job {job_id} could not be finalized: {e}")
+        else:
+            self.queue.finish(job_id, summary=summary or {})
+        self._jobs.pop(job_id, None)
@@ -0,0 +1,243 @@
+"""
+Tolerant parsing of judge outputs.
+Judges that are not held to a JSON schema by the API (GEval's log-probability
+calls, JSON-mode and plain chat models) sometimes return nearly-valid JSON: a
+code fence or a sentence around the object, single quotes, Python literals,
+trailing commas, raw newlines inside strings, or an object cut off at the
+token limit. Such outputs are repaired locally and validated against the
+expected schema; only outputs that cannot be repaired cost another judge call.
+"""
+import json
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+
+class JudgeOutputError(ValueError):
+    """Judge output that cannot be repaired into the expected schema."""
+
+
+class GEvalScore(BaseModel):
+    """Output of a GEval judge call; the reason may be empty (score-only) or cut off."""
+    score: float
+    reason: str = ""
+
+
+_FENCE = re.compile(r"```[a-zA-Z]*\s*(.*?)\s*(?:```|$)", re.DOTALL)
+_NUMBER = re.compile(r"^\s*(-?\d+(?:\.\d+)?)")
+_BARE_WORDS = {"True": "true", "False": "false", "None": "null", "true": "true", "false": "false", "null": "null"}
+
+# RunStats counting the outputs of the current run, if any (see counting_judge_outputs)
+_output_stats: ContextVar[Optional[Any]] = ContextVar("judge_output_stats", default=None)
+
+
+@contextmanager
+def counting_judge_outputs(stats):
+    """Count repaired outputs and re-asked judge calls made in this context in `stats` (a RunStats)."""
+    token = _output_stats.set(stats)
+    try:
+        yield
+    finally:
+        _output_stats.reset(token)
+
+
+def count_judge_output(counter: str):
+    """Increment `counter` (repaired_outputs or reasked_calls) of the current run's stats."""
+    stats = _output_stats.get()
+    if stats is not None:
+        setattr(stats, counter, getattr(stats, counter) + 1)
+
+
+def _object_span(text: str) -> Optional[str]:
+    """The first balanced {...} of `text`, closed if the text ends inside it; None if there is no '{'.
+
+    Strings may be single- or double-quoted; brackets inside them do not count.
+    A truncated object gets its open string, a missing value and its open
+    brackets closed, so the part the judge did write is kept.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+    stack = []
+    quote = None
+    escaped = False
+    key_pending = False
+    last = ""
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+            continue
+        if char in "\"'":
+            quote = char
+            # A string directly after '{' or ',' in an object is a key
+            key_pending = bool(stack) and stack[-1] == "}" and last in "{,"
+            last = char
+            continue
+        if char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return text[start:i + 1]
+        if not char.isspace():
+            if char == ":":
+                key_pending = False
+            last = char
+
+    # Truncated: close what is open
+    span = text[start:]
+    if quote:
+        span = (span[:-1] if escaped else span) + quote
+    span = span.rstrip()
+    if span.endswith(","):
+        span = span[:-1]
+    if span.endswith(":"):
+        span += " null"
+    elif key_pending and last in "\"'":
+        span += ": null"
+    return span + "".join(reversed(stack))
+
+
+def _normalize(text: str) -> str:
+    """Rewrite JSON-like text as JSON.
+
+    Single-quoted strings become double-quoted, True/False/None become JSON
+    literals, bare keys are quoted, raw control characters inside strings are
+    escaped and trailing commas and // comments are dropped.
+    """
+    out = []
+    i = 0
+    n = len(text)
+    while i < n:
+        char = text[i]
+        if char in "\"'":
+            quote = char
+            i += 1
+            chars = []
+            while i < n and text[i] != quote:
+                if text[i] == "\\" and i + 1 < n:
+                    # \' is not a JSON escape; a quote of the other kind needs none
+                    chars.append(text[i + 1] if text[i + 1] == "'" else text[i:i + 2])
+                    i += 2
+                    continue
+                if text[i] == '"':
+                    chars.append('\\"')
+                elif text[i] == "\n":
+                    chars.append("\\n")
+                elif text[i] == "\t":
+                    chars.append("\\t")
+                elif ord(text[i]) < 0x20:
+                    chars.append(f"\\u{ord(text[i]):04x}")
+                else:
+                    chars.append(text[i])
+                i += 1
+            out.append('"' + "".join(chars) + '"')
+            i += 1
+            continue
+        if char == "/" and text.startswith("//", i):
+            while i < n and text[i] != "\n":
+                i += 1
+            continue
+        if char == ",":
+            rest = text[i + 1:].lstrip()
+            if rest[:1] in ("}", "]", ""):
+                i += 1
+                continue
+        if (char.isalpha() or char == "_") and not (out and out[-1][-1:].isalnum()):
+            end = i
+            while end < n and (text[end].isalnum() or text[end] in "_-"):
+                end += 1
+            word = text[i:end]
+            if text[end:].lstrip().startswith(":"):
+                out.append(json.dumps(word))
+            else:
+                out.append(_BARE_WORDS.get(word, json.dumps(word)))
+            i = end
+            continue
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def load_judge_json(text: str) -> Tuple[Dict[str, Any], bool]:
+    """Parse the JSON object in a judge output.
+
+    Returns:
+        Tuple of (object, repaired): repaired is False when the output was valid JSON as is
+
+    Raises:
+        JudgeOutputError: No JSON object could be recovered
+    """
+    text = (text or "").strip()
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return data, False
+    except json.JSONDecodeError:
+        pass
+
+    fenced = _FENCE.search(text)
+    candidates = [fenced.group(1), text] if fenced else [text]
+    for candidate in candidates:
+        span = _object_span(candidate)
+        if span is None:
+            continue
+        for attempt in (span, _normalize(span)):
+            try:
+                # strict=False accepts raw newlines and tabs inside strings
+                data = json.loads(attempt, strict=False)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict):
+                return data, True
+    raise JudgeOutputError(f"judge output is not repairable JSON: {text[:200]!r}")
+
+
+def _coerce(data: Dict[str, Any], schema: Type[BaseModel]) -> Dict[str, Any]:
+    """Fit a parsed object to the schema's fields: unwrap a wrapping object, read "8/10" as 8, drop nulls of optional fields."""
+    fields = schema.model_fields
+    if fields and not set(fields) & set(data):
+        nested = [value for value in data.values() if isinstance(value, dict) and set(fields) & set(value)]
+        if len(nested) == 1:
+            data = nested[0]
+    data = dict(data)
+    for name, field in fields.items():
+        value = data.get(name)
+        if value is None and name in data and not field.is_required():
+            # A truncated output's missing value
+            del data[name]
+        elif isinstance(value, str) and field.annotation in (float, int):
+            match = _NUMBER.match(value)
+            if match:
+                data[name] = float(match.group(1)) if field.annotation is float else int(float(match.group(1)))
+    return data
+
+
+def parse_judge_output(text: str, schema: Type[BaseModel]) -> Tuple[BaseModel, bool]:
+    """Parse and validate a judge output against `schema`, repairing it if needed.
+
+    Returns:
+        Tuple of (validated output, repaired)
+
+    Raises:
+        JudgeOutputError: The output is not JSON, or not an instance of the schema, even after repair
+    """
+    data, repaired = load_judge_json(text)
+    try:
+        return schema.model_validate(data), repaired
+    except ValidationError:
+        pass
+    try:
+        return schema.model_validate(_coerce(data, schema)), True
+    except ValidationError as e:
+        raise JudgeOutputError(f"judge output does not match {schema.__name__}: {e.errors()[0]['msg']}") from e
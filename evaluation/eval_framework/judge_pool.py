@@ -0,0 +1,379 @@
+"""
+Judge endpoints.
+PooledGPTModel keeps OpenAI clients (and their HTTP connection pools) alive
+between judge calls, and repairs nearly-valid JSON outputs instead of failing
+the metric (see judge_output.py). JudgePool spreads judge calls over several endpoints or
+API keys, so no single key's rate limit caps throughput: each call goes to the
+endpoint with the fewest outstanding requests relative to its weight, failed
+calls fail over to the next endpoint, and an endpoint that keeps failing is
+taken out of rotation for a while.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+import numpy as np
+from deepeval.metrics.utils import initialize_model
+from deepeval.models import GPTModel
+from deepeval.models.llms.openai_model import json_mode_models, retry_openai, structured_outputs_models
+
+from .config import JUDGE_ENDPOINTS, JUDGE_POOL_EJECT_AFTER, JUDGE_POOL_EJECT_SECONDS, JUDGE_OUTPUT_REASKS
+from .judge_output import GEvalScore, JudgeOutputError, count_judge_output, parse_judge_output
+
+
+class PooledGPTModel(GPTModel):
+    """GPTModel that reuses its OpenAI clients, and with them their HTTP connection pools.
+
+    GPTModel builds a new client for every judge call; long-running processes
+    keep one sync client and one async client per event loop instead.
+
+    Outputs the API does not hold to a schema (GEval's raw responses, schema
+    requests to JSON-mode and plain chat models) are parsed tolerantly: a
+    nearly-valid output is repaired locally, and the judge is asked again, at
+    most `output_reasks` times, only when repair is impossible.
+    """
+
+    def __init__(self, *args, output_reasks: int = JUDGE_OUTPUT_REASKS, **kwargs):
+        self._sync_client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self.output_reasks = output_reasks
+        super().__init__(*args, **kwargs)
+
+    def load_model(self, async_mode: bool = False):
+        if not async_mode:
+            if self._sync_client is None:
+                self._sync_client = super().load_model(async_mode=False)
+            return self._sync_client
+
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            self._async_clients[loop] = super().load_model(async_mode=True)
+        return self._async_clients[loop]
+
+    def _ask(self, request, parse):
+        """Call `request()` until `parse` accepts its output; the cost covers every call."""
+        cost = 0.0
+        for attempt in range(self.output_reasks + 1):
+            output, call_cost = request()
+            cost += call_cost or 0.0
+            try:
+                result, repaired = parse(output)
+            except JudgeOutputError:
+                if attempt == self.output_reasks:
+                    raise
+                count_judge_output("reasked_calls")
+                continue
+            if repaired:
+                count_judge_output("repaired_outputs")
+            return result, cost
+
+    async def _a_ask(self, request, parse):
+        cost = 0.0
+        for attempt in range(self.output_reasks + 1):
+            output, call_cost = await request()
+            cost += call_cost or 0.0
+            try:
+                result, repaired = parse(output)
+            except JudgeOutputError:
+                if attempt == self.output_reasks:
+                    raise
+                count_judge_output("reasked_calls")
+                continue
+            if repaired:
+                count_judge_output("repaired_outputs")
+            return result, cost
+
+    def _json_mode_request(self, prompt: str) -> Dict[str, Any]:
+        return dict(
+            model=self.model_name,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            temperature=self.temperature,
+            **self.generation_kwargs,
+        )
+
+    def _generate_text(self, prompt: str):
+        if self.model_name in json_mode_models:
+            return self._generate_json_mode(prompt)
+        return super().generate(prompt)
+
+    async def _a_generate_text(self, prompt: str):
+        if self.model_name in json_mode_models:
+            return await self._a_generate_json_mode(prompt)
+        return await super().a_generate(prompt)
+
+    @retry_openai
+    def _generate_json_mode(self, prompt: str):
+        completion = self.load_model(async_mode=False).chat.completions.create(**self._json_mode_request(prompt))
+        cost = self.calculate_cost(completion.usage.prompt_tokens, completion.usage.completion_tokens)
+        return completion.choices[0].message.content, cost
+
+    @retry_openai
+    async def _a_generate_json_mode(self, prompt: str):
+        completion = await self.load_model(async_mode=True).chat.completions.create(**self._json_mode_request(prompt))
+        cost = self.calculate_cost(completion.usage.prompt_tokens, completion.usage.completion_tokens)
+        return completion.choices[0].message.content, cost
+
+    @staticmethod
+    def _repair_raw_response(completion):
+        """Rewrite a raw GEval response's content as canonical JSON if it needed repair."""
+        message = completion.choices[0].message
+        output, repaired = parse_judge_output(message.content, GEvalScore)
+        if repaired:
+            message.content = output.model_dump_json()
+        return completion, repaired
+
+    def generate(self, prompt: str, schema=None):
+        if schema is None or self.model_name in structured_outputs_models:
+            # Structured outputs are held to the schema by the API itself
+            return super().generate(prompt, schema=schema)
+        return self._ask(lambda: self._generate_text(prompt), lambda text: parse_judge_output(text, schema))
+
+    async def a_generate(self, prompt: str, schema=None):
+        if schema is None or self.model_name in structured_outputs_models:
+            return await super().a_generate(prompt, schema=schema)
+        return await self._a_ask(lambda: self._a_generate_text(prompt), lambda text: parse_judge_output(text, schema))
+
+    def generate_raw_response(self, prompt: str, top_logprobs: int = 5):
+        return self._ask(
+            lambda: super(PooledGPTModel, self).generate_raw_response(prompt, top_logprobs=top_logprobs),
+            self._repair_raw_response,
+        )
+
+    async def a_generate_raw_response(self, prompt: str, top_logprobs: int = 5):
+        return await self._a_ask(
+            lambda: super(PooledGPTModel, self).a_generate_raw_response(prompt, top_logprobs=top_logprobs),
+            self._repair_raw_response,
+        )
+
+
+@dataclass(eq=False)
+class JudgeEndpoint:
+    """One judge endpoint (API key / base URL / model) and its call statistics."""
+    name: str
+    model: GPTModel
+    weight: float = 1.0
+    outstanding: int = 0
+    requests: int = 0
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ejections: int = 0
+    ejected_until: float = 0.0
+    cost: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    def in_rotation(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def load(self) -> float:
+        """Weighted least-outstanding-requests score (lower is picked first).
+
+        Each consecutive failure doubles the weight of outstanding requests, so a
+        failing endpoint is avoided well before it is ejected.
+        """
+        return (self.outstanding + 1) / self.weight * 2 ** self.consecutive_failures
+
+    def to_dict(self, total_requests: int, now: float) -> Dict[str, Any]:
+        latencies = np.array(self.latencies)
+        return {
+            "name": self.name,
+            "model": self.model.get_model_name(),
+            "base_url": self.model.base_url,
+            "weight": self.weight,
+            "requests": self.requests,
+            "share": round(self.requests / total_requests, 4) if total_requests else 0.0,
+            "successes": self.successes,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "in_rotation": self.in_rotation(now),
+            "mean_latency_seconds": round(float(latencies.mean()), 3) if len(latencies) else None,
+            "p95_latency_seconds": round(float(np.percentile(latencies, 95)), 3) if len(latencies) else None,
+            "cost": round(self.cost, 6),
+        }
+
+
+def default_judge_is_openai() -> bool:
+    """Whether deepeval's default judge (no model given) is an OpenAI model, i.e. not another configured provider."""
+    model, _ = initialize_model(None)
+    return type(model) is GPTModel
+
+
+def load_judge_endpoints(path: str) -> List[Dict[str, Any]]:
+    """Read endpoint specs (see JUDGE_ENDPOINTS in config.py) from a JSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        specs = json.load(f)
+    if not isinstance(specs, list) or not specs:
+        raise ValueError(f"{path}: expected a non-empty JSON list of judge endpoints")
+    return specs
+
+
+def build_endpoint(spec: Dict[str, Any], index: int) -> JudgeEndpoint:
+    """Endpoint from a spec: name, model, base_url, api_key_env (variable holding the key), weight."""
+    api_key_env = spec.get("api_key_env", "OPENAI_API_KEY")
+    api_key = os.environ.get(api_key_env)
+    if api_key is None:
+        raise ValueError(f"judge endpoint {spec.get('name', index)}: environment variable {api_key_env} is not set")
+    weight = float(spec.get("weight", 1.0))
+    if weight <= 0:
+        raise ValueError(f"judge endpoint {spec.get('name', index)}: weight must be positive")
+    model = PooledGPTModel(model=spec.get("model"), _openai_api_key=api_key, base_url=spec.get("base_url"))
+    return JudgeEndpoint(name=spec.get("name", f"endpoint-{index}"), model=model, weight=weight)
+
+
+class JudgePool(GPTModel):
+    """Judge model that load-balances calls over several endpoints.
+
+    Behaves as a native deepeval model (calls return (result, cost)), so metrics
+    keep tracking evaluation cost. After `eject_after` consecutive failures an
+    endpoint leaves the rotation for `eject_seconds`; when it comes back a
+    single further failure ejects it again, a success restores it fully.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[JudgeEndpoint],
+        eject_after: int = JUDGE_POOL_EJECT_AFTER,
+        eject_seconds: float = JUDGE_POOL_EJECT_SECONDS,
+    ):
+        if not endpoints:
+            raise ValueError("JudgePool needs at least one endpoint")
+        self.endpoints = endpoints
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.failovers = 0
+        self._lock = threading.Lock()
+        super().__init__(model=endpoints[0].model.get_model_name())
+
+    @classmethod
+    def from_specs(cls, specs: List[Dict[str, Any]], **kwargs) -> "JudgePool":
+        return cls([build_endpoint(spec, i) for i, spec in enumerate(specs)], **kwargs)
+
+    def load_model(self, async_mode: bool = False):
+        # Clients belong to the endpoints
+        return None
+
+    def get_model_name(self):
+        models = list(dict.fromkeys(endpoint.model.get_model_name() for endpoint in self.endpoints))
+        # One model behind every endpoint judges like that model (and shares its cache keys)
+        return models[0] if len(models) == 1 else f"pool({', '.join(models)})"
+
+    def _acquire(self, tried: List[JudgeEndpoint]) -> Optional[JudgeEndpoint]:
+        with self._lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if e not in tried]
+            if not candidates:
+                return None
+            available = [e for e in candidates if e.in_rotation(now)]
+            if available:
+                endpoint = min(available, key=lambda e: (e.load(), e.requests / e.weight))
+            else:
+                # Everything is ejected: use the endpoint that is due back first
+                endpoint = min(candidates, key=lambda e: e.ejected_until)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _release(self, endpoint: JudgeEndpoint, started: float, cost: Optional[float] = None, error: bool = False):
+        with self._lock:
+            endpoint.outstanding -= 1
+            if error:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.eject_after:
+                    if endpoint.in_rotation(time.monotonic()):
+                        endpoint.ejections += 1
+                    endpoint.ejected_until = time.monotonic() + self.eject_seconds
+                return
+            endpoint.successes += 1
+            endpoint.consecutive_failures = 0
+            endpoint.cost += cost or 0.0
+            endpoint.latencies.append(time.monotonic() - started)
+
+    def _call(self, method: str, *args, **kwargs):
+        return self._call_with(lambda model: getattr(model, method)(*args, **kwargs))
+
+    def _call_with(self, call: Callable[[GPTModel], Tuple[Any, float]]):
+        """Run `call` on an endpoint's model, failing over to the next endpoint; `call` returns (result, cost)."""
+        tried = []
+        while True:
+            endpoint = self._acquire(tried)
+            started = time.monotonic()
+            try:
+                result, cost = call(endpoint.model)
+            except Exception:
+                self._release(endpoint, started, error=True)
+                tried.append(endpoint)
+                if len(tried) == len(self.endpoints):
+                    raise
+                self.failovers += 1
+                continue
+            self._release(endpoint, started, cost)
+            return result, cost
+
+    async def _a_call(self, method: str, *args, **kwargs):
+        tried = []
+        while True:
+            endpoint = self._acquire(tried)
+            started = time.monotonic()
+            try:
+                result, cost = await getattr(endpoint.model, method)(*args, **kwargs)
+            except asyncio.CancelledError:
+                # Cancelled by a deadline or a winning hedge: not the endpoint's fault
+                with self._lock:
+                    endpoint.outstanding -= 1
+                raise
+            except Exception:
+                self._release(endpoint, started, error=True)
+                tried.append(endpoint)
+                if len(tried) == len(self.endpoints):
+                    raise
+                self.failovers += 1
+                continue
+            self._release(endpoint, started, cost)
+            return result, cost
+
+    def generate(self, prompt: str, schema=None):
+        return self._call("generate", prompt, schema=schema)
+
+    async def a_generate(self, prompt: str, schema=None):
+        return await self._a_call("a_generate", prompt, schema=schema)
+
+    # GEval asks for raw responses to weight its score by the judge's token log probabilities
+    def generate_raw_response(self, prompt: str, top_logprobs: int = 5):
+        return self._call("generate_raw_response", prompt, top_logprobs=top_logprobs)
+
+    async def a_generate_raw_response(self, prompt: str, top_logprobs: int = 5):
+        return await self._a_call("a_generate_raw_response", prompt, top_logprobs=top_logprobs)
+
+    def generate_samples(self, prompt: str, n: int, temperature: float):
+        # GPTModel.generate_samples returns the completions without their cost
+        return self._call_with(lambda model: (model.generate_samples(prompt, n, temperature), 0.0))[0]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            total = sum(e.requests for e in self.endpoints)
+            return {
+                "model": self.get_model_name(),
+                "eject_after": self.eject_after,
+                "eject_seconds": self.eject_seconds,
+                "failovers": self.failovers,
+                "endpoints": [e.to_dict(total, now) for e in self.endpoints],
+            }
+
+
+_configured_pool: Optional[JudgePool] = None
+
+
+def get_configured_judge_pool() -> Optional[JudgePool]:
+    """Shared pool over JUDGE_ENDPOINTS from config.py, or None if none are configured."""
+    global _configured_pool
+    if _configured_pool is None and JUDGE_ENDPOINTS:
+        _configured_pool = JudgePool.from_specs(JUDGE_ENDPOINTS)
+    return _configured_pool
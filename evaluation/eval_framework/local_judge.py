@@ -0,0 +1,197 @@
+"""
+Local deterministic judge.
+Heuristic, judge-free stand-ins for the LLM metrics, used as the cheap tier of
+the judge cascade and as a stubbed judge for the job queue. Scores are in
+[0, 1] like the LLM metrics they replace.
+"""
+import asyncio
+import re
+from typing import Callable, List, Optional, Set
+
+from deepeval.metrics.base_metric import BaseMetric
+from deepeval.test_case import LLMTestCase, ToolCall
+
+from .config import (
+    ANSWER_RELEVANCY_THRESHOLD,
+    TASK_COMPLETION_THRESHOLD,
+    FAITHFULNESS_THRESHOLD,
+    GOAL_SATISFACTION_THRESHOLD,
+    FORMAT_COMPLIANCE_THRESHOLD,
+)
+
+
+LOCAL_JUDGE_NAME = "local-heuristic"
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+NUMBER_RE = re.compile(r"\d+")
+
+STOPWORDS = {
+    "the", "and", "for", "with", "your", "you", "are", "was", "this", "that", "have", "has", "from", "will",
+    "der", "die", "das", "und", "ist", "für", "mit", "sie", "ich", "den", "dem", "ein", "eine", "einen", "nicht",
+    "wurde", "wurden", "habe", "haben", "auf", "von", "zu", "im", "am",
+}
+
+GERMAN_MARKERS = {"der", "die", "das", "und", "ist", "nicht", "ich", "für", "mit", "sie", "den", "wann", "zeige", "erstelle", "nächste", "habe"}
+ENGLISH_MARKERS = {"the", "and", "is", "not", "you", "for", "with", "your", "are", "what", "show", "when", "next", "have", "my"}
+
+FAILURE_PHRASES = [
+    "could not", "couldn't", "unable", "not able", "problem", "error", "not available", "no information",
+    "konnte", "nicht möglich", "fehler", "keine information", "leider",
+]
+
+ARTIFACT_PATTERNS = [
+    re.compile(r"\b(CALL|DONE|DEBUG):"),
+    re.compile(r"evidence-json", re.IGNORECASE),
+    re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}"),
+    re.compile(r"\b(moodle|calendar|routing)-agent\b"),
+    re.compile(r"trace_id|stack trace|Traceback", re.IGNORECASE),
+    re.compile(r"[{\[]\s*\"\w+\"\s*:"),
+]
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return WORD_RE.findall((text or "").lower())
+
+
+def _content_tokens(text: Optional[str]) -> Set[str]:
+    """Numbers and non-stopword words, i.e. the tokens that carry claims."""
+    return {w for w in _words(text) if NUMBER_RE.fullmatch(w) or (len(w) >= 4 and w not in STOPWORDS)}
+
+
+def _overlap(reference: Set[str], candidate: Set[str]) -> float:
+    if not reference:
+        return 1.0
+    return len(reference & candidate) / len(reference)
+
+
+def _language(text: Optional[str]) -> Optional[str]:
+    words = set(_words(text))
+    german = len(words & GERMAN_MARKERS)
+    english = len(words & ENGLISH_MARKERS)
+    if german == english:
+        return None
+    return "de" if german > english else "en"
+
+
+def _reports_failure(text: Optional[str]) -> bool:
+    lowered = (text or "").lower()
+    return any(phrase in lowered for phrase in FAILURE_PHRASES)
+
+
+def _tool_names(tool_calls: Optional[List[ToolCall]]) -> List[str]:
+    return [(call.name or "").split(".")[-1] for call in tool_calls or []]
+
+
+def _tool_coverage(test_case: LLMTestCase) -> float:
+    expected = _tool_names(test_case.expected_tools)
+    if not expected:
+        return 1.0
+    called = set(_tool_names(test_case.tools_called))
+    return sum(1 for name in expected if name in called) / len(expected)
+
+
+def _context_tokens(test_case: LLMTestCase) -> Set[str]:
+    tokens = set()
+    for chunk in test_case.context or []:
+        tokens |= _content_tokens(str(chunk))
+    return tokens
+
+
+def score_answer_relevancy(test_case: LLMTestCase) -> float:
+    if not (test_case.actual_output or "").strip():
+        return 0.0
+    overlap = _overlap(_content_tokens(test_case.input), _content_tokens(test_case.actual_output))
+    return min(1.0, 0.5 + overlap)
+
+
+def score_task_completion(test_case: LLMTestCase) -> float:
+    if not (test_case.actual_output or "").strip():
+        return 0.0
+    success = 0.0 if _reports_failure(test_case.actual_output) else 1.0
+    return 0.6 * _tool_coverage(test_case) + 0.4 * success
+
+
+def score_faithfulness(test_case: LLMTestCase) -> float:
+    claims = _content_tokens(test_case.actual_output)
+    if not claims:
+        return 0.0
+    known = _context_tokens(test_case) | _content_tokens(test_case.input) | _content_tokens(test_case.expected_output)
+    supported = _overlap(claims, known)
+    matches_expected = _overlap(_content_tokens(test_case.expected_output), claims)
+    return 0.7 * supported + 0.3 * matches_expected
+
+
+def score_goal_satisfaction(test_case: LLMTestCase) -> float:
+    if not (test_case.actual_output or "").strip():
+        return 0.0
+    success = 0.0 if _reports_failure(test_case.actual_output) else 1.0
+    addressed = _overlap(_content_tokens(test_case.input), _content_tokens(test_case.actual_output))
+    return 0.4 * _tool_coverage(test_case) + 0.4 * success + 0.2 * addressed
+
+
+def score_format_compliance(test_case: LLMTestCase) -> float:
+    output = test_case.actual_output or ""
+    if not output.strip():
+        return 0.0
+    context_text = "\n".join(str(chunk) for chunk in test_case.context or [])
+    artifacts = sum(
+        1 for pattern in ARTIFACT_PATTERNS
+        if pattern.search(output) and not pattern.search(context_text)
+    )
+    score = max(0.0, 1.0 - 0.3 * artifacts)
+
+    input_language = _language(test_case.input)
+    output_language = _language(output)
+    if input_language and output_language and input_language != output_language:
+        score *= 0.3
+    return score
+
+
+class LocalHeuristicMetric(BaseMetric):
+    """Deterministic, judge-free metric computed from the test case alone."""
+
+    def __init__(self, name: str, threshold: float, scorer: Callable[[LLMTestCase], float], latency: float = 0.0):
+        self.name = name
+        self.threshold = threshold
+        self.scorer = scorer
+        # Simulated judge latency, so the metric can stand in for a remote judge
+        self.latency = latency
+        self.evaluation_model = LOCAL_JUDGE_NAME
+        self.strict_mode = False
+        self.async_mode = True
+        self.include_reason = False
+
+    def measure(self, test_case: LLMTestCase, *args, **kwargs) -> float:
+        self.error = None
+        self.evaluation_cost = 0
+        self.score = round(self.scorer(test_case), 4)
+        self.success = self.score >= self.threshold
+        self.reason = None
+        return self.score
+
+    async def a_measure(self, test_case: LLMTestCase, *args, **kwargs) -> float:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.measure(test_case)
+
+    def is_successful(self) -> bool:
+        return self.error is None and bool(self.success)
+
+    @property
+    def __name__(self):
+        return self.name
+
+
+def get_local_metrics(latency: float = 0.0) -> List[BaseMetric]:
+    """Local counterparts of get_metrics(), in the same order.
+
+    Args:
+        latency: Seconds each async measurement waits, to stub a remote judge
+    """
+    return [
+        LocalHeuristicMetric("Answer Relevancy", ANSWER_RELEVANCY_THRESHOLD, score_answer_relevancy, latency),
+        LocalHeuristicMetric("Task Completion", TASK_COMPLETION_THRESHOLD, score_task_completion, latency),
+        LocalHeuristicMetric("Faithfulness (to context)", FAITHFULNESS_THRESHOLD, score_faithfulness, latency),
+        LocalHeuristicMetric("Goal Satisfaction", GOAL_SATISFACTION_THRESHOLD, score_goal_satisfaction, latency),
+        LocalHeuristicMetric("Format Compliance", FORMAT_COMPLIANCE_THRESHOLD, score_format_compliance, latency),
+    ]
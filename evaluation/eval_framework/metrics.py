@@ -1,11 +1,19 @@
 """
 Metrics definitions for evaluation.
 """
-from typing import List
+import textwrap
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple, Union
+from pydantic import BaseModel
 from deepeval.metrics import GEval, AnswerRelevancyMetric, TaskCompletionMetric
-from deepeval.test_case import LLMTestCaseParams
+from deepeval.metrics.g_eval.template import GEvalTemplate
+from deepeval.metrics.g_eval.utils import construct_test_case_string
+from deepeval.metrics.task_completion.template import TaskCompletionTemplate
+from deepeval.metrics.utils import copy_metrics, trimAndLoadJson
+from deepeval.test_case import LLMTestCase, LLMTestCaseParams
 from deepeval.metrics.base_metric import BaseMetric
-from deepeval.models import GPTModel
+from deepeval.models import DeepEvalBaseLLM
 
 from .config import (
     ANSWER_RELEVANCY_THRESHOLD,
@@ -13,32 +21,408 @@ from .config import (
     FAITHFULNESS_THRESHOLD,
     GOAL_SATISFACTION_THRESHOLD,
     FORMAT_COMPLIANCE_THRESHOLD,
+    CASCADE_MARGIN,
 )
+from .local_judge import get_local_metrics
+from .judge_pool import get_configured_judge_pool
+from .faithfulness import ClaimFaithfulnessMetric
+from .judge_output import count_judge_output, load_judge_json
 
 
-def get_metrics() -> List[BaseMetric]:
+# Cheap judge name that selects the local deterministic metrics
+LOCAL_JUDGE = "local"
 
-    metrics = [
-        AnswerRelevancyMetric(threshold=ANSWER_RELEVANCY_THRESHOLD),
-        TaskCompletionMetric(threshold=TASK_COMPLETION_THRESHOLD)
-    ]
+# Metric attributes that make up the outcome of a measurement
+METRIC_STATE_FIELDS = [
+    "score",
+    "score_breakdown",
+    "reason",
+    "success",
+    "error",
+    "evaluation_model",
+    "evaluation_cost",
+    "verbose_logs",
+]
+
+
+# What the non-GEval metrics judge, used when explaining their scores afterwards
+METRIC_CRITERIA = {
+    "Answer Relevancy": "How relevant the statements in ACTUAL_OUTPUT are to addressing INPUT.",
+    "Task Completion": "How well the actual outcome (ACTUAL_OUTPUT and TOOLS_CALLED) achieves the task asked for in INPUT.",
+    "Faithfulness (to context) [Claims]": "The share of claims in ACTUAL_OUTPUT that are supported by CONTEXT.",
+}
+
+
+class ScoreOnlyGEvalTemplate(GEvalTemplate):
+    """GEval template that asks the judge for a score and no reason."""
+
+    @staticmethod
+    def generate_evaluation_results(
+        evaluation_steps: str,
+        test_case_content: str,
+        parameters: str,
+        rubric: Optional[str] = None,
+        score_range: Tuple[int, int] = (0, 10),
+        _additional_context: Optional[str] = None,
+    ):
+        rubric_text = f"Rubric:\n{rubric}\n" if rubric else ""
+        additional_context = (
+            f"\n\nAdditional Context:\n{_additional_context}\n"
+            if _additional_context
+            else ""
+        )
+        return textwrap.dedent(
+            f"""You are an evaluator. Given the following evaluation steps, assess the response below and return a JSON object with:
+
+            - `"score"`: an integer between {score_range[0]} and {score_range[1]}, with {score_range[1]} indicating strong alignment with the evaluation steps and {score_range[0]} indicating no alignment.
+            - `"reason"`: always an empty string.
+
+            Only return valid JSON. Do **not** include any explanation or extra text.
+
+            Evaluation Steps:
+            {evaluation_steps}
+
+            {rubric_text}
+            Test Case:
+            {test_case_content}
+
+            Parameters:
+            {parameters}
+            {additional_context}
+
+            **Example JSON:**
+            {{
+                "score": {score_range[0]},
+                "reason": ""
+            }}
+
+            JSON:
+            """
+        )
+
+
+class ScoreOnlyTaskCompletionTemplate(TaskCompletionTemplate):
+    """TaskCompletion template that asks the judge for a verdict and no reason."""
+
+    @staticmethod
+    def generate_verdict(task: str, actual_outcome: str):
+        return textwrap.dedent(
+            f"""Given the task (desired outcome) and the actual achieved outcome, compare how well the actual outcome aligns with the desired task.
+
+            Please return a JSON with a single key: `verdict`. Do not explain the verdict.
+            - The `verdict` should be a score from 0 to 1, where 1 indicates the actual outcome perfectly achieves the desired task, and 0 indicates it does not achieve the task at all.
+
+            **
+            IMPORTANT: Please make sure to only return in JSON format, with `verdict` as a float between 0 and 1.
+            Example:
+            Task: Have the system plan a weekend trip to New York, including travel, accommodation, and sightseeing.
+            Actual outcome: The system provided suggested flights departing on Saturday and returning on Sunday, identified hotels with check-in on Saturday and check-out on Sunday, and generated a list of sightseeing destinations in New York City.
+            Example JSON:
+            {{
+                "verdict": 0.85
+            }}
+            **
+
+            Task:
+            {task}
+
+            Actual outcome:
+            {actual_outcome}
+
+            JSON:
+            """
+        )
+
+
+class ScoreVerdict(BaseModel):
+    verdict: float
+
+
+class ScoreOnlyTaskCompletionMetric(TaskCompletionMetric):
+    """TaskCompletionMetric that asks the judge for the verdict only."""
+
+    def _verdict_prompt(self) -> str:
+        return ScoreOnlyTaskCompletionTemplate.generate_verdict(task=self.task, actual_outcome=self.outcome)
+
+    async def _a_generate_verdicts(self) -> Tuple:
+        prompt = self._verdict_prompt()
+        if self.using_native_model:
+            res, cost = await self.model.a_generate(prompt, schema=ScoreVerdict)
+            self.evaluation_cost += cost
+            return res.verdict, None
+        try:
+            res: ScoreVerdict = await self.model.a_generate(prompt, schema=ScoreVerdict)
+            return res.verdict, None
+        except TypeError:
+            res = await self.model.a_generate(prompt)
+            return trimAndLoadJson(res, self)["verdict"], None
+
+    def _generate_verdicts(self) -> Tuple:
+        prompt = self._verdict_prompt()
+        if self.using_native_model:
+            res, cost = self.model.generate(prompt, schema=ScoreVerdict)
+            self.evaluation_cost += cost
+            return res.verdict, None
+        try:
+            res: ScoreVerdict = self.model.generate(prompt, schema=ScoreVerdict)
+            return res.verdict, None
+        except TypeError:
+            res = self.model.generate(prompt)
+            return trimAndLoadJson(res, self)["verdict"], None
+
+
+class ReasonTemplate:
+    """Prompt for explaining a score that was judged without a reason."""
+
+    @staticmethod
+    def generate_reason(metric_name: str, criteria: str, test_case_content: str, score: float, threshold: float):
+        return textwrap.dedent(
+            f"""You are an evaluator. The response below was scored {score:.2f} (pass threshold {threshold:.2f}, scale 0 to 1) on the metric "{metric_name}".
+
+            Criteria:
+            {criteria}
+
+            Test Case:
+            {test_case_content}
+
+            Explain concisely why this score was given, mentioning the specific strengths or shortcomings in the test case. Do **not** quote the score itself.
+            Return a JSON object with a single key `reason`.
+
+            JSON:
+            """
+        )
+
+
+class JudgeCascade:
+    """Escalation policy and agreement statistics of the cheap -> strong judge cascade.
+
+    The cheap judge scores every case; only scores within `margin` of the metric
+    threshold (or cheap-judge errors) are escalated to the strong judge. While
+    auditing, e.g. on the calibration set, the strong judge additionally scores
+    every case so the cascade's decisions can be checked against it.
+    """
+
+    def __init__(self, margin: float = CASCADE_MARGIN):
+        self.margin = margin
+        self.audit = False
+        self._decisions = defaultdict(lambda: {"cases": 0, "escalated": 0})
+        self._audits = defaultdict(list)
+
+    def should_escalate(self, cheap: BaseMetric, threshold: float) -> bool:
+        if cheap.error is not None or cheap.score is None:
+            return True
+        return abs(cheap.score - threshold) <= self.margin
+
+    @contextmanager
+    def auditing(self):
+        """Score every case with the strong judge as well while the block runs."""
+        self.audit = True
+        try:
+            yield self
+        finally:
+            self.audit = False
+
+    def record(self, metric_name: str, escalated: bool, cheap: BaseMetric, strong: Optional[BaseMetric], threshold: float):
+        if not self.audit:
+            decisions = self._decisions[metric_name]
+            decisions["cases"] += 1
+            decisions["escalated"] += int(escalated)
+            return
+
+        if strong is None or strong.error is not None or strong.score is None:
+            return
+        cheap_score = cheap.score if cheap.error is None else None
+        final_score = strong.score if escalated else cheap_score
+        self._audits[metric_name].append({
+            "escalated": escalated,
+            "cheap_score": cheap_score,
+            "strong_score": strong.score,
+            "cheap_pass": cheap_score is not None and cheap_score >= threshold,
+            "strong_pass": strong.score >= threshold,
+            "cascade_pass": final_score is not None and final_score >= threshold,
+        })
+
+    def agreement(self) -> Dict[str, Any]:
+        """Pass/fail agreement of the cheap judge and the cascade with the strong judge on audited cases."""
+        def summarize(rows):
+            n = len(rows)
+            diffs = [abs(r["cheap_score"] - r["strong_score"]) for r in rows if r["cheap_score"] is not None]
+            return {
+                "cases": n,
+                "escalated": sum(r["escalated"] for r in rows),
+                "strong_call_rate": round(sum(r["escalated"] for r in rows) / n, 4) if n else 0.0,
+                "cheap_agreement": round(sum(r["cheap_pass"] == r["strong_pass"] for r in rows) / n, 4) if n else 0.0,
+                "cascade_agreement": round(sum(r["cascade_pass"] == r["strong_pass"] for r in rows) / n, 4) if n else 0.0,
+                "mean_abs_score_diff": round(sum(diffs) / len(diffs), 4) if diffs else None,
+            }
+
+        all_rows = [row for rows in self._audits.values() for row in rows]
+        return {
+            "metrics": {name: summarize(rows) for name, rows in self._audits.items()},
+            "overall": summarize(all_rows),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Escalation counts of non-audited runs plus the calibration agreement."""
+        metrics = {}
+        for name, decisions in self._decisions.items():
+            cases = decisions["cases"]
+            metrics[name] = {
+                **decisions,
+                "strong_call_rate": round(decisions["escalated"] / cases, 4) if cases else 0.0,
+            }
+        return {
+            "margin": self.margin,
+            "metrics": metrics,
+            "calibration_agreement": self.agreement(),
+        }
+
+
+class CascadeMetric(BaseMetric):
+    """Metric that scores with a cheap judge and escalates near-threshold cases to the strong judge."""
+
+    def __init__(self, cheap: BaseMetric, strong: BaseMetric, cascade: JudgeCascade):
+        self.cheap = cheap
+        self.strong = strong
+        self.cascade = cascade
+        self.name = getattr(strong, "name", strong.__class__.__name__)
+        self.threshold = strong.threshold
+        self.evaluation_model = strong.evaluation_model
+        self.strict_mode = strong.strict_mode
+        self.async_mode = strong.async_mode
+        self.verbose_mode = strong.verbose_mode
+        self.include_reason = strong.include_reason
+
+    def __getattr__(self, item):
+        # Expose configuration of the strong metric (evaluation_params, criteria, ...)
+        if item == "strong":
+            raise AttributeError(item)
+        return getattr(self.strong, item)
+
+    @property
+    def __name__(self):
+        return self.strong.__name__
+
+    def _decide(self, cheap: BaseMetric, strong: Optional[BaseMetric], escalated: bool):
+        decided_by = strong if escalated else cheap
+        for field in METRIC_STATE_FIELDS:
+            setattr(self, field, getattr(decided_by, field, None))
+        costs = [m.evaluation_cost for m in (cheap, strong) if m is not None and m.evaluation_cost is not None]
+        self.evaluation_cost = sum(costs) if costs else None
+        self.cascade.record(self.__name__, escalated, cheap, strong, self.threshold)
+
+    async def a_measure(self, test_case: LLMTestCase, *args, **kwargs) -> float:
+        cheap, strong = copy_metrics([self.cheap, self.strong])
+        try:
+            await cheap.a_measure(test_case, *args, **kwargs)
+        except Exception as e:
+            cheap.error = str(e)
+
+        escalated = self.cascade.should_escalate(cheap, self.threshold)
+        if escalated or self.cascade.audit:
+            await strong.a_measure(test_case, *args, **kwargs)
+        else:
+            strong = None
+
+        self._decide(cheap, strong, escalated)
+        return self.score
+
+    def measure(self, test_case: LLMTestCase, *args, **kwargs) -> float:
+        cheap, strong = copy_metrics([self.cheap, self.strong])
+        try:
+            cheap.measure(test_case, *args, **kwargs)
+        except Exception as e:
+            cheap.error = str(e)
+
+        escalated = self.cascade.should_escalate(cheap, self.threshold)
+        if escalated or self.cascade.audit:
+            strong.measure(test_case, *args, **kwargs)
+        else:
+            strong = None
+
+        self._decide(cheap, strong, escalated)
+        return self.score
+
+    def is_successful(self) -> bool:
+        if self.error is not None:
+            self.success = False
+        else:
+            self.success = self.score is not None and self.score >= self.threshold
+        return self.success
+
+
+def get_metrics(
+    score_only: bool = False,
+    cheap_judge: Optional[Union[str, DeepEvalBaseLLM]] = None,
+    cascade: Optional[JudgeCascade] = None,
+    judge: Optional[Union[str, DeepEvalBaseLLM]] = None,
+    claim_faithfulness: bool = False,
+) -> List[BaseMetric]:
+    """Build the evaluation metrics.
+
+    Args:
+        score_only: Ask the judge for scores only; reasons are generated later on demand
+        cheap_judge: Judge for the first tier of a cascade: LOCAL_JUDGE for the local
+            deterministic metrics, or a model name / DeepEvalBaseLLM. None disables the cascade.
+        cascade: Escalation policy and statistics shared by the cascaded metrics
+        judge: Strong judge model; None uses the judge pool configured in JUDGE_ENDPOINTS,
+            or deepeval's default judge if there is none
+        claim_faithfulness: Judge faithfulness claim by claim (ClaimFaithfulnessMetric)
+            instead of with the single-prompt GEval
+    """
+    if judge is None:
+        judge = get_configured_judge_pool()
+    strong_metrics = _build_metrics(score_only, model=judge, claim_faithfulness=claim_faithfulness)
+    if cheap_judge is None:
+        return strong_metrics
+
+    if cheap_judge == LOCAL_JUDGE:
+        cheap_metrics = get_local_metrics()
+    else:
+        cheap_metrics = _build_metrics(score_only, model=cheap_judge, claim_faithfulness=claim_faithfulness)
+
+    cascade = cascade or JudgeCascade()
+    return [CascadeMetric(cheap, strong, cascade) for cheap, strong in zip(cheap_metrics, strong_metrics)]
+
+
+def _build_metrics(
+    score_only: bool,
+    model: Optional[Union[str, DeepEvalBaseLLM]] = None,
+    claim_faithfulness: bool = False,
+) -> List[BaseMetric]:
+    if score_only:
+        metrics = [
+            AnswerRelevancyMetric(threshold=ANSWER_RELEVANCY_THRESHOLD, model=model, include_reason=False),
+            ScoreOnlyTaskCompletionMetric(threshold=TASK_COMPLETION_THRESHOLD, model=model),
+        ]
+    else:
+        metrics = [
+            AnswerRelevancyMetric(threshold=ANSWER_RELEVANCY_THRESHOLD, model=model),
+            TaskCompletionMetric(threshold=TASK_COMPLETION_THRESHOLD, model=model)
+        ]
+    geval_template = ScoreOnlyGEvalTemplate if score_only else GEvalTemplate
 
     # Faithfulness metric - uses reasoning_judge to catch subtle hallucinations
-    metrics.append(GEval(
-        name="Faithfulness (to context)",
-        evaluation_steps=[
-            "Check that every non-trivial claim in ACTUAL_OUTPUT is supported by CONTEXT.",
-            "CRITICAL: If ACTUAL_OUTPUT contains ANY information that is NOT present in CONTEXT, heavily penalize. Score should be < 0.2 for any unsupported claim.",
-            "CRITICAL: Look for hallucinations - fabricated information that appears nowhere in CONTEXT. Examples of hallucinations: lottery wins, unexpected money, requests for payment, locations not mentioned in context, events not in context, any financial or personal information not in context.",
-            "CRITICAL: If ACTUAL_OUTPUT mentions prizes, lottery, money transfers, processing fees, or any financial transactions that are NOT in CONTEXT, score must be 0.0 (complete hallucination).",
-            "Penalize claims that contradict or are not supported by the context.",
-            "Compare ACTUAL_OUTPUT to EXPECTED_OUTPUT. Mark as incorrect if any required fact in EXPECTED_OUTPUT is missing or wrong.",
-            "Minor surface differences (paraphrasing, formatting) are acceptable, but factual content must match exactly.",
-            "If ACTUAL_OUTPUT contains the correct information from EXPECTED_OUTPUT but ALSO contains fabricated information not in CONTEXT, score should be < 0.3 (mixed correct and hallucinated content).",
-        ],
-        evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_OUTPUT, LLMTestCaseParams.CONTEXT],
-        threshold=FAITHFULNESS_THRESHOLD,
-    ))
+    if claim_faithfulness:
+        metrics.append(ClaimFaithfulnessMetric(threshold=FAITHFULNESS_THRESHOLD, model=model, include_reason=not score_only))
+    else:
+        metrics.append(GEval(
+            name="Faithfulness (to context)",
+            evaluation_steps=[
+                "Check that every non-trivial claim in ACTUAL_OUTPUT is supported by CONTEXT.",
+                "CRITICAL: If ACTUAL_OUTPUT contains ANY information that is NOT present in CONTEXT, heavily penalize. Score should be < 0.2 for any unsupported claim.",
+                "CRITICAL: Look for hallucinations - fabricated information that appears nowhere in CONTEXT. Examples of hallucinations: lottery wins, unexpected money, requests for payment, locations not mentioned in context, events not in context, any financial or personal information not in context.",
+                "CRITICAL: If ACTUAL_OUTPUT mentions prizes, lottery, money transfers, processing fees, or any financial transactions that are NOT in CONTEXT, score must be 0.0 (complete hallucination).",
+                "Penalize claims that contradict or are not supported by the context.",
+                "Compare ACTUAL_OUTPUT to EXPECTED_OUTPUT. Mark as incorrect if any required fact in EXPECTED_OUTPUT is missing or wrong.",
+                "Minor surface differences (paraphrasing, formatting) are acceptable, but factual content must match exactly.",
+                "If ACTUAL_OUTPUT contains the correct information from EXPECTED_OUTPUT but ALSO contains fabricated information not in CONTEXT, score should be < 0.3 (mixed correct and hallucinated content).",
+            ],
+            evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_OUTPUT, LLMTestCaseParams.CONTEXT],
+            threshold=FAITHFULNESS_THRESHOLD,
+            evaluation_template=geval_template,
+            model=model,
+        ))
 
     # Goal Satisfaction metric - uses reasoning_judge for complex tool verification
     metrics.append(GEval(
@@ -53,6 +437,8 @@ def get_metrics() -> List[BaseMetric]:
         ],
         evaluation_params=[LLMTestCaseParams.INPUT, LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_TOOLS, LLMTestCaseParams.TOOLS_CALLED],
         threshold=GOAL_SATISFACTION_THRESHOLD,
+        evaluation_template=geval_template,
+        model=model,
     ))
 
     # Format Compliance metric - uses reasoning_judge to distinguish internal IDs from context data
@@ -72,6 +458,50 @@ def get_metrics() -> List[BaseMetric]:
         ],
         evaluation_params=[LLMTestCaseParams.INPUT, LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.CONTEXT],
         threshold=FORMAT_COMPLIANCE_THRESHOLD,
+        evaluation_template=geval_template,
+        model=model,
     ))
 
     return metrics
+
+
+def judged_params(metric: BaseMetric) -> Optional[List[LLMTestCaseParams]]:
+    """Test case fields the metric's judge sees, or None if the metric does not declare them."""
+    params = getattr(metric, "evaluation_params", None) or getattr(metric, "_required_params", None)
+    # BaseMetric only annotates _required_params; metrics that do not set it have the typing alias
+    return list(params) if isinstance(params, (list, tuple)) else None
+
+
+def reason_prompt(metric: BaseMetric, test_case: LLMTestCase, score: float) -> str:
+    """Prompt asking the metric's judge to explain a score judged in score-only mode."""
+    if isinstance(metric, GEval):
+        criteria = "\n".join(f"{i}. {step}" for i, step in enumerate(metric.evaluation_steps or [], 1)) or metric.criteria
+    else:
+        criteria = METRIC_CRITERIA.get(metric.__name__, metric.__name__)
+    params = judged_params(metric)
+
+    return ReasonTemplate.generate_reason(
+        metric_name=metric.__name__,
+        criteria=criteria,
+        test_case_content=construct_test_case_string(params, test_case),
+        score=score,
+        threshold=metric.threshold,
+    )
+
+
+async def a_generate_reason(metric: BaseMetric, test_case: LLMTestCase, score: float) -> Tuple[str, Optional[float]]:
+    """Ask the metric's judge to explain a score judged in score-only mode.
+
+    Returns:
+        Tuple of (reason, evaluation cost or None for custom models)
+    """
+    prompt = reason_prompt(metric, test_case, score)
+    cost = None
+    if metric.using_native_model:
+        res, cost = await metric.model.a_generate(prompt)
+    else:
+        res = await metric.model.a_generate(prompt)
+    data, repaired = load_judge_json(res)
+    if repaired:
+        count_judge_output("repaired_outputs")
+    return data.get("reason", ""), cost
@@ -0,0 +1,195 @@
+"""
+Agent-side performance profile from report traces.
+Where the agent spends time and money: latency percentiles, iterations,
+sub-agent fan-out, MCP calls and cost per successful task, broken down by
+task_type and featureConfig.
+"""
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from .reporting import map_test_results
+
+
+LATENCY_PERCENTILES = [50, 90, 95, 99]
+
+# Numeric per-entry features, in column order of the feature matrix
+FEATURES = [
+    "completion_time",
+    "token_cost",
+    "iterations",
+    "max_iterations",
+    "sub_agent_calls",
+    "sub_agent_iterations",
+    "fan_out_depth",
+    "mcp_calls",
+]
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _walk_trace(trace: Dict[str, Any], depth: int, counts: Dict[str, float]):
+    """Count calls in a trace and its nested internalRouterProcess sub-agent runs."""
+    for iteration in trace.get("iterationHistory", []) or []:
+        function_calls = (iteration.get("structuredThought") or {}).get("functionCalls", []) or []
+        for call in function_calls:
+            if call.get("type") == "mcp":
+                counts["mcp_calls"] += 1
+            sub_process = call.get("internalRouterProcess")
+            if call.get("type") == "agent" or sub_process:
+                counts["sub_agent_calls"] += 1
+            if sub_process:
+                counts["fan_out_depth"] = max(counts["fan_out_depth"], depth + 1)
+                counts["sub_agent_iterations"] += len(sub_process.get("iterationHistory", []) or [])
+                _walk_trace(sub_process, depth + 1, counts)
+
+
+def extract_trace_features(entry: Dict[str, Any]) -> Dict[str, float]:
+    """Numeric performance features of one test entry (NaN where the report has no value)."""
+    trace = entry.get("trace") or {}
+    counts = {"sub_agent_calls": 0.0, "sub_agent_iterations": 0.0, "fan_out_depth": 0.0, "mcp_calls": 0.0}
+    _walk_trace(trace, 0, counts)
+    return {
+        "completion_time": _to_float(entry.get("completion_time")),
+        "token_cost": _to_float(entry.get("token_cost")),
+        "iterations": float(len(trace.get("iterationHistory", []) or [])) if trace else np.nan,
+        "max_iterations": _to_float(trace.get("maxIterations")),
+        **counts,
+    }
+
+
+def feature_labels(entry: Dict[str, Any]) -> List[str]:
+    """featureConfig flags of an entry as "name=value" labels."""
+    feature_config = (entry.get("trace") or {}).get("featureConfig") or {}
+    return [f"{name}={str(value).lower()}" for name, value in sorted(feature_config.items())]
+
+
+def _round(value: float, digits: int = 3) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def _group_profiles(
+    keys: np.ndarray,
+    matrix: np.ndarray,
+    success: np.ndarray,
+    tested: np.ndarray,
+) -> Dict[str, Dict[str, Any]]:
+    """Aggregate the feature matrix per group key.
+
+    Sums and counts are computed for all groups at once with bincount; only
+    percentiles need a per-group pass over the (sorted) latency column.
+    """
+    if len(keys) == 0:
+        return {}
+    col = {name: i for i, name in enumerate(FEATURES)}
+    groups, inverse = np.unique(keys, return_inverse=True)
+    n_groups = len(groups)
+
+    valid = ~np.isnan(matrix)
+    filled = np.where(valid, matrix, 0.0)
+    counts = np.stack([np.bincount(inverse, weights=valid[:, j], minlength=n_groups) for j in range(len(FEATURES))], axis=1)
+    sums = np.stack([np.bincount(inverse, weights=filled[:, j], minlength=n_groups) for j in range(len(FEATURES))], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+
+    n = np.bincount(inverse, minlength=n_groups)
+    successes = np.bincount(inverse, weights=success, minlength=n_groups)
+    tested_counts = np.bincount(inverse, weights=tested, minlength=n_groups)
+    hit_max = np.bincount(
+        inverse,
+        weights=(valid[:, col["max_iterations"]] & (filled[:, col["iterations"]] >= filled[:, col["max_iterations"]])),
+        minlength=n_groups,
+    )
+    success_time = np.bincount(inverse, weights=filled[:, col["completion_time"]] * success, minlength=n_groups)
+
+    # Percentiles per group from one sort by (group, value)
+    latency = matrix[:, col["completion_time"]]
+    has_latency = ~np.isnan(latency)
+    order = np.lexsort((latency[has_latency], inverse[has_latency]))
+    sorted_groups = inverse[has_latency][order]
+    sorted_latency = latency[has_latency][order]
+    bounds = np.searchsorted(sorted_groups, np.arange(n_groups + 1))
+
+    profiles = {}
+    for g, key in enumerate(groups):
+        group_latency = sorted_latency[bounds[g]:bounds[g + 1]]
+        percentiles = (
+            np.percentile(group_latency, LATENCY_PERCENTILES) if len(group_latency) else [np.nan] * len(LATENCY_PERCENTILES)
+        )
+        iterations = matrix[inverse == g, col["iterations"]]
+        iterations = iterations[~np.isnan(iterations)]
+        succeeded = successes[g]
+
+        profiles[str(key)] = {
+            "n": int(n[g]),
+            "tested": int(tested_counts[g]),
+            "successes": int(succeeded),
+            "latency_seconds": {
+                "mean": _round(means[g, col["completion_time"]]),
+                **{f"p{p}": _round(value) for p, value in zip(LATENCY_PERCENTILES, percentiles)},
+                "max": _round(group_latency[-1]) if len(group_latency) else None,
+            },
+            "iterations": {
+                "mean": _round(means[g, col["iterations"]], 2),
+                "p95": _round(np.percentile(iterations, 95), 2) if len(iterations) else None,
+                "max": int(iterations.max()) if len(iterations) else None,
+                "max_iterations_hit_rate": round(float(hit_max[g] / n[g]), 4),
+            },
+            "sub_agents": {
+                "calls_per_task": _round(means[g, col["sub_agent_calls"]], 2),
+                "iterations_per_task": _round(means[g, col["sub_agent_iterations"]], 2),
+                "fan_out_depth_mean": _round(means[g, col["fan_out_depth"]], 2),
+                "fan_out_depth_max": int(np.max(matrix[inverse == g, col["fan_out_depth"]])),
+            },
+            "mcp_calls_per_task": _round(means[g, col["mcp_calls"]], 2),
+            "cost": {
+                "total_token_cost": _round(sums[g, col["token_cost"]], 6),
+                "cost_per_successful_task": _round(sums[g, col["token_cost"]] / succeeded, 6) if succeeded else None,
+                "time_per_successful_task": _round(sums[g, col["completion_time"]] / succeeded, 2) if succeeded else None,
+                "mean_time_successful": _round(success_time[g] / succeeded, 2) if succeeded else None,
+            },
+        }
+    return profiles
+
+
+def analyze_agent_performance(entries: List[Dict[str, Any]], result=None) -> Dict[str, Any]:
+    """Build the agent performance profile of a report.
+
+    Args:
+        entries: Report testEntries
+        result: Evaluation result, used to tell successful tasks apart (optional)
+    """
+    test_result_map = map_test_results(result, entries) if result is not None else {}
+
+    matrix = np.array(
+        [[features[name] for name in FEATURES] for features in map(extract_trace_features, entries)],
+        dtype=float,
+    ).reshape(len(entries), len(FEATURES))
+    tested = np.array([entry.get("id") in test_result_map for entry in entries], dtype=float)
+    success = np.array(
+        [bool(test_result_map.get(entry.get("id")) and test_result_map[entry.get("id")].success) for entry in entries],
+        dtype=float,
+    )
+    task_types = np.array([entry.get("task_type", "unknown") for entry in entries], dtype=object)
+
+    # One row per (entry, feature flag), so entries with several flags count in each
+    feature_rows = [(i, label) for i, entry in enumerate(entries) for label in feature_labels(entry)]
+    feature_index = np.array([i for i, _ in feature_rows], dtype=int)
+    feature_keys = np.array([label for _, label in feature_rows], dtype=object)
+
+    return {
+        "overall": _group_profiles(np.full(len(entries), "overall", dtype=object), matrix, success, tested).get("overall", {}),
+        "by_task_type": _group_profiles(task_types, matrix, success, tested),
+        "by_feature": _group_profiles(feature_keys, matrix[feature_index], success[feature_index], tested[feature_index]),
+        "by_task_type_and_feature": _group_profiles(
+            np.array([f"{task_types[i]} | {label}" for i, label in feature_rows], dtype=object),
+            matrix[feature_index],
+            success[feature_index],
+            tested[feature_index],
+        ),
+    }
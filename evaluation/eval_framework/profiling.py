@@ -0,0 +1,109 @@
+"""
+Stage profiler for evaluation runs (--profile).
+Records wall time, CPU time and peak Python memory (tracemalloc) of each run
+stage (load, build, calibration, evaluate, analysis, save) and optionally a
+cProfile dump of the whole run for pstats / snakeviz.
+"""
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+
+class StageProfiler:
+    """Per-stage wall time, CPU time and memory; does nothing unless enabled.
+
+    A stage entered several times (e.g. once per experiment) accumulates its
+    times and keeps its highest memory peak. Stages may nest; an outer stage's
+    peak includes its inner stages.
+    """
+
+    def __init__(self, enabled: bool = False, dump_path: Optional[str] = None):
+        self.enabled = enabled or dump_path is not None
+        self.dump_path = dump_path
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._open: List[Dict[str, Any]] = []
+        self._cprofile = None
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if dump_path is not None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def reset(self):
+        """Forget recorded stages, e.g. between reports evaluated by one long-running process."""
+        self._stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        if self._open:
+            self._open[-1]["peak"] = max(self._open[-1]["peak"], peak)
+        tracemalloc.reset_peak()
+        frame = {"peak": current}
+        self._open.append(frame)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+            end_current, peak = tracemalloc.get_traced_memory()
+            self._open.pop()
+            frame["peak"] = max(frame["peak"], peak)
+            if self._open:
+                self._open[-1]["peak"] = max(self._open[-1]["peak"], frame["peak"])
+
+            stats = self._stages.setdefault(name, {
+                "calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "peak_bytes": 0, "allocated_bytes": 0,
+            })
+            stats["calls"] += 1
+            stats["wall_seconds"] += wall
+            stats["cpu_seconds"] += cpu
+            stats["peak_bytes"] = max(stats["peak_bytes"], frame["peak"])
+            stats["allocated_bytes"] += end_current - current
+
+    def dump(self) -> Optional[str]:
+        """Write the cProfile statistics collected so far to dump_path (pstats format)."""
+        if self._cprofile is None:
+            return None
+        self._cprofile.disable()
+        self._cprofile.dump_stats(self.dump_path)
+        self._cprofile.enable()
+        return self.dump_path
+
+    def summary(self) -> Dict[str, Any]:
+        mb = 1024 * 1024
+        stages = [
+            {
+                "stage": name,
+                "calls": stats["calls"],
+                "wall_seconds": round(stats["wall_seconds"], 3),
+                "cpu_seconds": round(stats["cpu_seconds"], 3),
+                "cpu_share": round(stats["cpu_seconds"] / stats["wall_seconds"], 3) if stats["wall_seconds"] else 0.0,
+                "peak_memory_mb": round(stats["peak_bytes"] / mb, 2),
+                "retained_memory_mb": round(stats["allocated_bytes"] / mb, 2),
+            }
+            for name, stats in self._stages.items()
+        ]
+        return {
+            "stages": stages,
+            "total_wall_seconds": round(sum(s["wall_seconds"] for s in self._stages.values()), 3),
+            "total_cpu_seconds": round(sum(s["cpu_seconds"] for s in self._stages.values()), 3),
+            "pstats_dump": self.dump_path,
+        }
+
+    def write_into(self, analysis_path: str) -> Dict[str, Any]:
+        """Add the profile (save stage included) to an already written analysis.json."""
+        summary = self.summary()
+        with open(analysis_path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        report["profile"] = summary
+        with open(analysis_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return summary
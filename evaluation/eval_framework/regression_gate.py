@@ -0,0 +1,201 @@
+"""
+Latency and cost regression gate between two agent reports.
+Pairs the entries of a baseline and a candidate report by id and compares
+the median and p95 of completion_time and token_cost per task_type. Shifts
+get paired bootstrap confidence intervals: every resample draws the same
+entry ids from both reports, and all resamples are drawn and reduced as one
+(resamples x pairs) array per batch. Only the reports are read; no judge is
+called.
+"""
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from .config import (
+    GATE_LIMITS,
+    GATE_CONFIDENCE,
+    GATE_BOOTSTRAP_SAMPLES,
+    GATE_MIN_PAIRS,
+    GATE_SEED,
+)
+from .test_case_builder import stream_report
+
+
+GATE_FEATURES = ["completion_time", "token_cost"]
+GATE_STATS = {"median": 50, "p95": 95}
+
+# Resampled values held in memory at once; larger bootstraps are drawn in batches
+BOOTSTRAP_BATCH_ELEMENTS = 2_000_000
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def load_gate_entries(report_path: str) -> Tuple[Dict[str, Any], Dict[str, Tuple[str, np.ndarray]]]:
+    """Report metadata and {entry id: (task_type, [completion_time, token_cost])}, streamed entry by entry."""
+    metadata, entries = stream_report(report_path)
+    values = {}
+    for entry in entries:
+        values[entry.get("id")] = (
+            entry.get("task_type", "unknown"),
+            np.array([_to_float(entry.get(feature)) for feature in GATE_FEATURES]),
+        )
+    return metadata, values
+
+
+def _bootstrap_percentiles(
+    baseline: np.ndarray, candidate: np.ndarray, samples: int, rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Percentiles (GATE_STATS x samples) of baseline and candidate over the same resampled pairs."""
+    n = len(baseline)
+    percentiles = list(GATE_STATS.values())
+    batch = max(1, BOOTSTRAP_BATCH_ELEMENTS // n)
+    baseline_parts, candidate_parts = [], []
+    for start in range(0, samples, batch):
+        index = rng.integers(0, n, size=(min(batch, samples - start), n))
+        baseline_parts.append(np.percentile(baseline[index], percentiles, axis=1))
+        candidate_parts.append(np.percentile(candidate[index], percentiles, axis=1))
+    return np.concatenate(baseline_parts, axis=1), np.concatenate(candidate_parts, axis=1)
+
+
+def _relative(shift: np.ndarray, baseline: np.ndarray) -> np.ndarray:
+    """shift / baseline; 0 where both are 0 and inf where the baseline is 0 but the candidate is not."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(baseline != 0, shift / np.abs(baseline), np.where(shift > 0, np.inf, 0.0))
+
+
+def _round(value: float, digits: int = 4) -> Optional[float]:
+    return None if not np.isfinite(value) else round(float(value), digits)
+
+
+def compare_shifts(
+    baseline: np.ndarray,
+    candidate: np.ndarray,
+    limits: Dict[str, float],
+    confidence: float,
+    samples: int,
+    rng: np.random.Generator,
+) -> List[Dict[str, Any]]:
+    """Median and p95 shift of paired values with bootstrap confidence intervals.
+
+    A stat regresses when its relative shift exceeds its limit and the
+    interval of the shift lies above zero: the increase is both larger than
+    allowed and not explained by resampling noise.
+    """
+    percentiles = list(GATE_STATS.values())
+    baseline_point = np.percentile(baseline, percentiles)
+    candidate_point = np.percentile(candidate, percentiles)
+    shift_point = candidate_point - baseline_point
+    relative_point = _relative(shift_point, baseline_point)
+
+    baseline_boot, candidate_boot = _bootstrap_percentiles(baseline, candidate, samples, rng)
+    shift_boot = candidate_boot - baseline_boot
+    relative_boot = _relative(shift_boot, baseline_boot)
+    alpha = (1 - confidence) / 2
+    # Nearest-rank bounds, so an infinite relative shift stays infinite instead of becoming NaN
+    shift_ci = np.stack([
+        np.quantile(shift_boot, alpha, axis=1, method="lower"),
+        np.quantile(shift_boot, 1 - alpha, axis=1, method="higher"),
+    ], axis=1)
+    relative_ci = np.stack([
+        np.quantile(relative_boot, alpha, axis=1, method="lower"),
+        np.quantile(relative_boot, 1 - alpha, axis=1, method="higher"),
+    ], axis=1)
+
+    rows = []
+    for s, stat in enumerate(GATE_STATS):
+        limit = limits.get(stat)
+        rows.append({
+            "stat": stat,
+            "baseline": _round(baseline_point[s]),
+            "candidate": _round(candidate_point[s]),
+            "shift": _round(shift_point[s]),
+            "shift_ci": [_round(shift_ci[s, 0]), _round(shift_ci[s, 1])],
+            "relative_shift": _round(relative_point[s]),
+            "relative_ci": [_round(relative_ci[s, 0]), _round(relative_ci[s, 1])],
+            "limit": limit,
+            "regressed": bool(limit is not None and relative_point[s] > limit and shift_ci[s, 0] > 0),
+        })
+    return rows
+
+
+def build_gate_verdict(
+    baseline_path: str,
+    candidate_path: str,
+    limits: Optional[Dict[str, Dict[str, float]]] = None,
+    confidence: float = GATE_CONFIDENCE,
+    samples: int = GATE_BOOTSTRAP_SAMPLES,
+    min_pairs: int = GATE_MIN_PAIRS,
+    seed: int = GATE_SEED,
+) -> Dict[str, Any]:
+    """Compare the latency and cost of a candidate report against a baseline report.
+
+    Args:
+        limits: {feature: {stat: largest allowed relative increase}}, e.g.
+            {"completion_time": {"p95": 0.25}}; defaults to GATE_LIMITS
+        min_pairs: Groups with fewer paired entries are reported but never fail the gate
+
+    Returns:
+        Verdict with "passed", the per-group comparisons and the regressions among them
+    """
+    limits = GATE_LIMITS if limits is None else limits
+    baseline_metadata, baseline = load_gate_entries(baseline_path)
+    candidate_metadata, candidate = load_gate_entries(candidate_path)
+
+    paired_ids = [entry_id for entry_id in candidate if entry_id in baseline]
+    groups = defaultdict(list)
+    for entry_id in paired_ids:
+        # Grouped by the candidate's task_type; the baseline may predate a re-labelling
+        groups[candidate[entry_id][0]].append(entry_id)
+
+    rng = np.random.default_rng(seed)
+    comparisons = []
+    for group, ids in [("overall", paired_ids), *sorted(groups.items())]:
+        if not ids:
+            continue
+        baseline_values = np.stack([baseline[entry_id][1] for entry_id in ids])
+        candidate_values = np.stack([candidate[entry_id][1] for entry_id in ids])
+        for f, feature in enumerate(GATE_FEATURES):
+            valid = ~np.isnan(baseline_values[:, f]) & ~np.isnan(candidate_values[:, f])
+            pairs = int(valid.sum())
+            if pairs == 0:
+                continue
+            gated = pairs >= min_pairs
+            for row in compare_shifts(
+                baseline_values[valid, f],
+                candidate_values[valid, f],
+                limits.get(feature, {}) if gated else {},
+                confidence,
+                samples,
+                rng,
+            ):
+                comparisons.append({"task_type": group, "feature": feature, "pairs": pairs, "gated": gated, **row})
+
+    regressions = [row for row in comparisons if row["regressed"]]
+    return {
+        "passed": not regressions,
+        "baseline": {
+            "path": baseline_path,
+            "gitHash": baseline_metadata.get("gitHash"),
+            "timestamp": baseline_metadata.get("timestamp"),
+        },
+        "candidate": {
+            "path": candidate_path,
+            "gitHash": candidate_metadata.get("gitHash"),
+            "timestamp": candidate_metadata.get("timestamp"),
+        },
+        "paired_entries": len(paired_ids),
+        "baseline_only": [entry_id for entry_id in baseline if entry_id not in candidate],
+        "candidate_only": [entry_id for entry_id in candidate if entry_id not in baseline],
+        "limits": limits,
+        "confidence": confidence,
+        "bootstrap_samples": samples,
+        "min_pairs": min_pairs,
+        "comparisons": comparisons,
+        "regressions": regressions,
+    }
@@ -2,9 +2,17 @@
 Reporting and output formatting for evaluation results.
 """
 import json
-from typing import Dict, Any, List
+import os
+from typing import Dict, Any, List, Optional
 from collections import defaultdict
 
+from .clustering import cluster_texts
+
+
+def scored_metrics(test_result) -> List:
+    """Metric results of a test that carry a score (skips not evaluated or errored metrics)."""
+    return [m for m in (test_result.metrics_data or []) if m.score is not None]
+
 
 def print_header(title: str, width: int = 98):
     """Print a formatted header."""
@@ -34,6 +42,15 @@ def print_calibration_header():
     print("(negative controls). This establishes the reliability of the metrics.\n")
 
 
+def is_unexpected_calibration_result(test_result, calibration_metadata: Dict[tuple[str, str], tuple[str, bool]]) -> bool:
+    """Whether a calibration test did not pass/fail as its control type expects."""
+    key = (test_result.input, test_result.actual_output)
+    if key not in calibration_metadata:
+        return False
+    test_name, is_positive = calibration_metadata[key]
+    return test_result.success != is_positive
+
+
 def print_calibration_results(
     calibration_result,
     positive_controls_count: int,
@@ -59,17 +76,25 @@ def print_calibration_results(
     # Count positive/negative results using metadata
     positive_passed = 0
     negative_failed = 0
+    positive_tested = 0
+    negative_tested = 0
     for test_result in calibration_result.test_results:
         key = (test_result.input, test_result.actual_output)
         if key in calibration_metadata:
             test_name, is_positive = calibration_metadata[key]
+            if is_positive:
+                positive_tested += 1
+            else:
+                negative_tested += 1
             if is_positive and test_result.success:
                 positive_passed += 1
             elif not is_positive and not test_result.success:
                 negative_failed += 1
 
-    print(f"{'Positive Controls (should pass):':<45} {positive_passed}/{positive_controls_count}")
-    print(f"{'Negative Controls (should fail):':<45} {negative_failed}/{negative_controls_count}")
+    print(f"{'Positive Controls (should pass):':<45} {positive_passed}/{positive_tested}"
+          + (f" ({positive_controls_count - positive_tested} untested)" if positive_tested < positive_controls_count else ""))
+    print(f"{'Negative Controls (should fail):':<45} {negative_failed}/{negative_tested}"
+          + (f" ({negative_controls_count - negative_tested} untested)" if negative_tested < negative_controls_count else ""))
 
     # Print detailed status for each test case
     print("\nDetailed Calibration Test Results:")
@@ -98,8 +123,11 @@ def print_calibration_results(
         # If unexpected result, show metric scores
         if not is_correct:
             print(f"    Metric scores:")
-            for metric_result in test_result.metrics_data:
+            for metric_result in test_result.metrics_data or []:
                 metric_name = metric_result.name.replace(" [GEval]", "")
+                if metric_result.score is None:
+                    print(f"      {metric_name:<35} {'-':>5} ({metric_result.error})")
+                    continue
                 threshold = metric_thresholds.get(metric_result.name, 0.5)
                 passed = "✓" if metric_result.score >= threshold else "✗"
                 print(f"      {metric_name:<35} {metric_result.score:.3f} (threshold: {threshold:.2f}) {passed}")
@@ -116,7 +144,7 @@ def print_calibration_results(
             continue
 
         test_name, is_positive = calibration_metadata[key]
-        for metric_result in test_result.metrics_data:
+        for metric_result in scored_metrics(test_result):
             metric_name = metric_result.name.replace(" [GEval]", "")
             if is_positive:
                 positive_scores[metric_name].append(metric_result.score)
@@ -127,7 +155,10 @@ def print_calibration_results(
     print(f"\n{'Metric':<45} {'Positive Avg':>15} {'Negative Avg':>15} {'Separation':>15}")
     print("─" * 100)
 
-    for metric_name in positive_scores.keys():
+    # Metrics that were never scored on one side (e.g. skipped by fail-fast) have no separation
+    separated_metrics = [name for name in positive_scores.keys() if negative_scores[name]]
+
+    for metric_name in separated_metrics:
         pos_avg = sum(positive_scores[metric_name]) / len(positive_scores[metric_name])
         neg_avg = sum(negative_scores[metric_name]) / len(negative_scores[metric_name])
         separation = pos_avg - neg_avg
@@ -137,9 +168,11 @@ def print_calibration_results(
 
     print("─" * 100)
 
+    # Controls left untested (time budget) are judged on the tested ones only
     calibration_valid = (
-        positive_passed >= positive_controls_count * 0.8 and
-        negative_failed >= negative_controls_count * 0.8
+        positive_tested > 0 and negative_tested > 0 and
+        positive_passed >= positive_tested * 0.8 and
+        negative_failed >= negative_tested * 0.8
     )
 
     if calibration_valid:
@@ -155,13 +188,15 @@ def print_calibration_results(
     calibration_summary = {
         "positive_controls": {
             "total": positive_controls_count,
+            "tested": positive_tested,
             "passed": positive_passed,
-            "pass_rate": round(positive_passed / positive_controls_count * 100, 2)
+            "pass_rate": round(positive_passed / positive_tested * 100, 2) if positive_tested else 0.0
         },
         "negative_controls": {
             "total": negative_controls_count,
+            "tested": negative_tested,
             "failed": negative_failed,
-            "fail_rate": round(negative_failed / negative_controls_count * 100, 2)
+            "fail_rate": round(negative_failed / negative_tested * 100, 2) if negative_tested else 0.0
         },
         "metrics_separation": {
             metric_name: {
@@ -173,7 +208,7 @@ def print_calibration_results(
                     3
                 )
             }
-            for metric_name in positive_scores.keys()
+            for metric_name in separated_metrics
         },
         "calibration_valid": calibration_valid
     }
@@ -181,54 +216,61 @@ def print_calibration_results(
     return calibration_summary, calibration_valid
 
 
-def print_metrics_summary(result, metrics, metric_thresholds: Dict[str, float]):
-    """Print metrics summary table."""
+def print_metrics_summary(aggregates):
+    """Print metrics summary table from a run's streaming aggregates (see aggregation.py)."""
     print("\n" + "╔" + "═"*98 + "╗")
     print("║" + " "*35 + "EVALUATION METRICS SUMMARY" + " "*37 + "║")
     print("╚" + "═"*98 + "╝")
 
-    # Collect metric scores
-    metric_scores = {}
-    for test_result in result.test_results:
-        for metric_result in test_result.metrics_data:
-            metric_name = metric_result.name
-            if metric_name not in metric_scores:
-                metric_scores[metric_name] = []
-            metric_scores[metric_name].append(metric_result.score)
-
-    # Calculate statistics
-    print(f"\n{'Metric':<45} {'Average':>10} {'Min':>8} {'Max':>8} {'Threshold':>10} {'Pass Rate':>12}")
+    print(f"\n{'Metric':<37} {'Average':>10} {'Std':>7} {'Min':>8} {'Max':>8} {'Threshold':>10} {'Pass Rate':>12}")
     print("─" * 100)
 
-    for metric_name, scores in metric_scores.items():
+    overall = aggregates.overall
+    for metric_name, stat in overall.metrics.items():
         clean_name = metric_name.replace(" [GEval]", "")
-
-        avg_score = sum(scores) / len(scores)
-        min_score = min(scores)
-        max_score = max(scores)
-        threshold = metric_thresholds.get(metric_name, 0.5)
-        pass_rate = sum(1 for s in scores if s >= threshold) / len(scores) * 100
+        threshold = overall.thresholds[metric_name]
+        pass_rate = stat.pass_rate * 100
 
         indicator = "✓" if pass_rate >= 70 else "✗"
 
-        print(f"{clean_name:<45} {avg_score:>10.3f} {min_score:>8.3f} {max_score:>8.3f} {threshold:>10.2f} {pass_rate:>11.1f}% {indicator}")
+        print(f"{clean_name:<37} {stat.mean:>10.3f} {stat.std:>7.3f} {stat.min:>8.3f} {stat.max:>8.3f} "
+              f"{threshold:>10.2f} {pass_rate:>11.1f}% {indicator}")
 
     print("─" * 100)
 
 
-def print_overall_stats(result, tcs):
-    """Print overall test statistics."""
+def print_overall_stats(aggregates, tcs):
+    """Print overall test statistics (pass rate over the tested cases, next to coverage)."""
     total_tests = len(tcs)
-    passed_tests = sum(1 for tr in result.test_results if tr.success)
-    overall_pass_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
+    tested_tests = aggregates.overall.tested
+    passed_tests = aggregates.overall.passed
+    overall_pass_rate = (passed_tests / tested_tests * 100) if tested_tests > 0 else 0
+    coverage = (tested_tests / total_tests * 100) if total_tests > 0 else 0
 
     print(f"\n{'Test Cases:':<30} {total_tests:>5}")
+    print(f"{'Tested:':<30} {tested_tests:>5} ({coverage:.1f}% coverage)")
     print(f"{'Passed:':<30} {passed_tests:>5}")
-    print(f"{'Failed:':<30} {total_tests - passed_tests:>5}")
+    print(f"{'Failed:':<30} {tested_tests - passed_tests:>5}")
+    if tested_tests < total_tests:
+        print(f"{'Untested (time budget):':<30} {total_tests - tested_tests:>5}")
     print(f"{'Overall Pass Rate:':<30} {overall_pass_rate:>5.1f}%")
     print("\n" + "═"*100 + "\n")
 
 
+def coverage_report(result, tcs) -> Dict[str, Any]:
+    """Which test cases were evaluated; untested ones were cut off by the time budget."""
+    tested_names = {tr.name for tr in result.test_results}
+    untested = [tc.name for tc in tcs if tc.name not in tested_names]
+    total_tests = len(tcs)
+    return {
+        "total_tests": total_tests,
+        "tested": total_tests - len(untested),
+        "untested": len(untested),
+        "coverage_percent": round((total_tests - len(untested)) / total_tests * 100, 2) if total_tests else 0.0,
+        "untested_entries": untested,
+    }
+
+
 def detect_goal_drifting(entry: Dict[str, Any]) -> bool:
     """Detect if agent drifted from original goal."""
     trace = entry.get("trace", {})
@@ -290,23 +332,39 @@ def count_successful_steps(entry: Dict[str, Any]) -> int:
 
 
 def extract_common_errors(entries: List[Dict[str, Any]], limit: int = 3) -> List[str]:
-    """Extract most common error messages."""
-    error_counts = defaultdict(int)
+    """Extract most common error messages (one per near-duplicate cluster, largest first)."""
+    errors = [
+        (entry.get("id", ""), entry.get("trace", {}).get("error", ""))
+        for entry in entries
+        if entry.get("trace", {}).get("error", "")
+    ]
+    return [cluster["representative"].split("\n")[0][:100] for cluster in cluster_texts(errors)[:limit]]
 
-    for entry in entries:
-        trace = entry.get("trace", {})
-        error = trace.get("error", "")
 
-        if error:
-            simplified = error.split("\n")[0][:100]
-            error_counts[simplified] += 1
+def map_test_results(result, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Map test results to entry ids.
+
+    Results are matched by test case name (the entry id), falling back to
+    position for results that were not named after an entry.
+    """
+    entry_ids = {entry.get("id") for entry in entries}
+    test_result_map = {}
+    complete = len(result.test_results) == len(entries)
+    for i, test_result in enumerate(result.test_results):
+        if test_result.name in entry_ids:
+            test_result_map[test_result.name] = test_result
+        elif complete and i < len(entries):
+            entry_id = entries[i].get("id", f"test_{i}")
+            test_result_map[entry_id] = test_result
+    return test_result_map
 
-    sorted_errors = sorted(error_counts.items(), key=lambda x: x[1], reverse=True)
-    return [error for error, count in sorted_errors[:limit]]
 
+def print_task_type_analysis(aggregates, result, entries):
+    """Print task type breakdown analysis.
 
-def print_task_type_analysis(result, entries, metrics, metric_thresholds: Dict[str, float]):
-    """Print task type breakdown analysis."""
+    Tested and passed counts come from the run's streaming aggregates (see
+    aggregation.py); the entries are only walked for what their traces show.
+    """
     print("\n" + "╔" + "═"*98 + "╗")
     print("║" + " "*35 + "TASK TYPE BREAKDOWN" + " "*42 + "║")
     print("╚" + "═"*98 + "╝\n")
@@ -317,12 +375,7 @@ def print_task_type_analysis(result, entries, metrics, metric_thresholds: Dict[s
         task_type = entry.get("task_type", "unknown")
         entries_by_type[task_type].append(entry)
 
-    # Map test results to entries
-    test_result_map = {}
-    for i, test_result in enumerate(result.test_results):
-        if i < len(entries):
-            entry_id = entries[i].get("id", f"test_{i}")
-            test_result_map[entry_id] = test_result
+    test_result_map = map_test_results(result, entries)
 
     # Analyze by task type
     categories_report = {}
@@ -333,25 +386,29 @@ def print_task_type_analysis(result, entries, metrics, metric_thresholds: Dict[s
         "faithfulness_fail": 0,
     }
 
-    # Find Faithfulness metric name
-    faithfulness_metric_name = None
-    for metric_name in [m.name if hasattr(m, 'name') else m.__class__.__name__ for m in metrics]:
-        if "Faithfulness" in metric_name or "faithfulness" in metric_name.lower():
-            faithfulness_metric_name = metric_name
+    # Faithfulness scores below their threshold
+    for metric_name, stat in aggregates.overall.metrics.items():
+        if "faithfulness" in metric_name.lower():
+            failure_analysis["faithfulness_fail"] = stat.n - stat.passed
             break
 
     for task_type, type_entries in entries_by_type.items():
         n = len(type_entries)
-        passed = 0
+        group = aggregates.by_task_type.get(task_type)
+        tested = group.tested if group else 0
+        passed = group.passed if group else 0
         total_steps = 0
         failed_entries = []
+        untested_entries = []
 
         for entry in type_entries:
             entry_id = entry.get("id", "")
             test_result = test_result_map.get(entry_id)
 
-            if test_result and test_result.success:
-                passed += 1
+            if test_result is None:
+                untested_entries.append(entry_id)
+            elif not test_result.success:
+                failed_entries.append(entry)
 
             steps = count_successful_steps(entry)
             total_steps += steps
@@ -365,30 +422,26 @@ def print_task_type_analysis(result, entries, metrics, metric_thresholds: Dict[s
             if detect_json_error(entry):
                 failure_analysis["json_error_count"] += 1
 
-            if test_result and faithfulness_metric_name:
-                for metric_result in test_result.metrics_data:
-                    if metric_result.name == faithfulness_metric_name:
-                        threshold = metric_thresholds.get(faithfulness_metric_name, 0.7)
-                        if metric_result.score < threshold:
-                            failure_analysis["faithfulness_fail"] += 1
-
-            if not (test_result and test_result.success):
-                failed_entries.append(entry)
-
-        pass_rate = (passed / n * 100) if n > 0 else 0
+        pass_rate = group.pass_rate * 100 if group else 0
+        coverage = (tested / n * 100) if n > 0 else 0
         avg_steps = (total_steps / n) if n > 0 else 0
         common_errors = extract_common_errors(failed_entries, limit=3)
 
         categories_report[task_type] = {
             "n": n,
+            "tested": tested,
+            "coverage_percent": round(coverage, 2),
             "passed": passed,
             "pass_rate_percent": round(pass_rate, 2),
             "avg_steps_success": round(avg_steps, 2),
             "common_errors": common_errors,
         }
+        if untested_entries:
+            categories_report[task_type]["untested_entries"] = untested_entries
 
         print(f"Task Type: {task_type}")
         print(f"  Total Tests: {n}")
+        print(f"  Tested: {tested} ({coverage:.1f}% coverage)")
         print(f"  Passed: {passed}")
         print(f"  Pass Rate: {pass_rate:.1f}%")
         print(f"  Avg Successful Steps: {avg_steps:.2f}")
@@ -409,15 +462,456 @@ def print_task_type_analysis(result, entries, metrics, metric_thresholds: Dict[s
     return categories_report, failure_analysis
 
 
+def print_failure_clusters(taxonomy: Dict[str, Any], limit: int = 3):
+    """Print the largest failure clusters per task_type (see failure_taxonomy.py)."""
+    print("\n" + "╔" + "═"*98 + "╗")
+    print("║" + " "*40 + "FAILURE CLUSTERS" + " "*42 + "║")
+    print("╚" + "═"*98 + "╝\n")
+
+    def print_clusters(title, summary):
+        clusters = summary["clusters"]
+        print(f"  {title}: {summary['failures']} failures in {clusters} cluster{'s' if clusters != 1 else ''}")
+        for cluster in summary["top"][:limit]:
+            text = " ".join(cluster["representative"].split())
+            text = text if len(text) <= 70 else text[:67] + "..."
+            print(f"    {cluster['size']:>4}x  {text}")
+            print(f"           e.g. {', '.join(str(example) for example in cluster['examples'])}")
+
+    task_types = list(dict.fromkeys(list(taxonomy["errors"]) + list(taxonomy["reasons"])))
+    if not task_types:
+        print("No agent errors or failed metric reasons.")
+    for task_type in task_types:
+        print(f"Task Type: {task_type}")
+        if task_type in taxonomy["errors"]:
+            print_clusters("Agent errors", taxonomy["errors"][task_type])
+        for metric_name, summary in taxonomy["reasons"].get(task_type, {}).items():
+            print_clusters(metric_name.replace(" [GEval]", ""), summary)
+        print()
+
+    print("═"*100 + "\n")
+
+
+def print_agent_performance(performance: Dict[str, Any]):
+    """Print the agent performance profile by task type and feature flag."""
+    print("\n" + "╔" + "═"*98 + "╗")
+    print("║" + " "*37 + "AGENT PERFORMANCE PROFILE" + " "*36 + "║")
+    print("╚" + "═"*98 + "╝\n")
+
+    def fmt(value, spec):
+        return "-" if value is None else format(value, spec)
+
+    sections = [("Task Type", performance["by_task_type"]), ("Feature", performance["by_feature"])]
+    for title, groups in sections:
+        if not groups:
+            continue
+        print(f"{title:<28} {'N':>4} {'p50 (s)':>9} {'p95 (s)':>9} {'Iter':>6} {'Sub-agents':>11} "
+              f"{'Depth':>6} {'MCP/Task':>9} {'s/Success':>10}")
+        print("─" * 100)
+        for name, profile in list(groups.items()) + [("Overall", performance["overall"])]:
+            if name == "Overall":
+                print("─" * 100)
+            latency = profile["latency_seconds"]
+            print(f"{name:<28} {profile['n']:>4} {fmt(latency['p50'], '.1f'):>9} {fmt(latency['p95'], '.1f'):>9} "
+                  f"{fmt(profile['iterations']['mean'], '.2f'):>6} {fmt(profile['sub_agents']['calls_per_task'], '.2f'):>11} "
+                  f"{profile['sub_agents']['fan_out_depth_max']:>6} {fmt(profile['mcp_calls_per_task'], '.2f'):>9} "
+                  f"{fmt(profile['cost']['time_per_successful_task'], '.1f'):>10}")
+        print("─" * 100 + "\n")
+
+    print("═"*100 + "\n")
+
+
+def print_sample_estimates(sample_report: Dict[str, Any]):
+    """Print population pass-rate estimates from a stratified sample."""
+    summary = sample_report["summary"]
+
+    print("\n" + "╔" + "═"*98 + "╗")
+    print("║" + " "*33 + "SAMPLED PASS-RATE ESTIMATES" + " "*38 + "║")
+    print("╚" + "═"*98 + "╝")
+
+    confidence = f"{summary['confidence'] * 100:.0f}% CI"
+    print(f"\n{'Task Type':<35} {'Population':>12} {'Sampled':>10} {'Passed':>8} {'Pass Rate':>11} {confidence:>18}")
+    print("─" * 100)
+
+    for task_type, category in sample_report["categories"].items():
+        low, high = category["pass_rate_ci_percent"]
+        interval = f"[{low:.1f}, {high:.1f}]"
+        print(f"{task_type:<35} {category['n']:>12} {category['sampled']:>10} {category['passed']:>8} {category['pass_rate_percent']:>10.1f}% {interval:>18}")
+
+    print("─" * 100)
+    low, high = summary["overall_pass_rate_ci"]
+    interval = f"[{low:.1f}, {high:.1f}]"
+    print(f"{'Overall (stratified)':<35} {summary['total_tests']:>12} {summary['sampled_tests']:>10} {'':>8} {summary['overall_pass_rate']:>10.1f}% {interval:>18}")
+    print("\n" + "═"*100 + "\n")
+
+
+def print_run_stats(run_stats: Dict[str, Any]):
+    """Print judge call statistics for the run."""
+    print("\n" + "╔" + "═"*98 + "╗")
+    print("║" + " "*39 + "RUN STATISTICS" + " "*45 + "║")
+    print("╚" + "═"*98 + "╝\n")
+
+    requests = (
+        run_stats["judge_calls"] + run_stats["coalesced_calls"] + run_stats["stored_verdicts"]
+        + run_stats["skipped_calls"]
+    )
+    print(f"{'Metric Requests:':<30} {requests:>8}")
+    print(f"{'Judge Calls Sent:':<30} {run_stats['judge_calls']:>8}")
+    print(f"{'Coalesced Duplicates:':<30} {run_stats['coalesced_calls']:>8}")
+    print(f"{'Reused Stored Verdicts:':<30} {run_stats['stored_verdicts']:>8}")
+    print(f"{'Skipped (fail-fast):':<30} {run_stats['skipped_calls']:>8}")
+    print(f"{'Reason Calls (score-only):':<30} {run_stats['reason_calls']:>8}")
+    print(f"{'Timed Out Judge Calls:':<30} {run_stats['timed_out_calls']:>8}")
+    print(f"{'Retried Judge Calls:':<30} {run_stats['retried_calls']:>8}")
+    print(f"{'Repaired Judge Outputs:':<30} {run_stats['repaired_outputs']:>8}")
+    print(f"{'Re-asked (unrepairable):':<30} {run_stats['reasked_calls']:>8}")
+    print(f"{'Untested (time budget):':<30} {run_stats['untested_cases']:>8}")
+
+    hedging = run_stats.get("hedging")
+    if hedging:
+        p99 = f"{hedging['p99_seconds']:.2f}s" if hedging["p99_seconds"] is not None else "-"
+        p99_unhedged = f"{hedging['p99_unhedged_seconds']:.2f}s" if hedging["p99_unhedged_seconds"] is not None else "-"
+        improvement = (f"{hedging['p99_improvement_seconds']:+.2f}s"
+                       if hedging["p99_improvement_seconds"] is not None else "-")
+        print(f"{'Hedged Requests:':<30} {hedging['hedged_requests']:>8} ({hedging['hedge_rate'] * 100:.1f}%)")
+        print(f"{'Hedge Wins:':<30} {hedging['hedge_wins']:>8}")
+        print(f"{'p99 Latency (hedged):':<30} {p99:>8}")
+        print(f"{'p99 Latency (unhedged):':<30} {p99_unhedged:>8} (n={hedging['unhedged_samples']})")
+        print(f"{'p99 Improvement:':<30} {improvement:>8}")
+    print("\n" + "═"*100 + "\n")
+
+
+def print_cascade_summary(cascade_summary: Dict[str, Any]):
+    """Print strong-judge escalation rates and calibration agreement of the judge cascade."""
+    print("\n" + "╔" + "═"*98 + "╗")
+    print("║" + " "*41 + "JUDGE CASCADE" + " "*44 + "║")
+    print("╚" + "═"*98 + "╝\n")
+    print(f"Escalation margin: ±{cascade_summary['margin']:.2f} around each metric threshold\n")
+
+    agreement = cascade_summary["calibration_agreement"]
+    if agreement["metrics"]:
+        print("Calibration agreement with the strong judge:\n")
+        print(f"{'Metric':<40} {'Cases':>7} {'Escalated':>10} {'Cheap Agree':>12} {'Cascade Agree':>14} {'Mean |Δ|':>10}")
+        print("─" * 100)
+        rows = list(agreement["metrics"].items()) + [("Overall", agreement["overall"])]
+        for metric_name, stats in rows:
+            if metric_name == "Overall":
+                print("─" * 100)
+            diff = f"{stats['mean_abs_score_diff']:.3f}" if stats["mean_abs_score_diff"] is not None else "-"
+            print(f"{metric_name:<40} {stats['cases']:>7} {stats['escalated']:>10} "
+                  f"{stats['cheap_agreement'] * 100:>11.1f}% {stats['cascade_agreement'] * 100:>13.1f}% {diff:>10}")
+        print("─" * 100)
+        print(f"\nStrong-judge calls saved on calibration: {(1 - agreement['overall']['strong_call_rate']) * 100:.1f}%\n")
+
+    if cascade_summary["metrics"]:
+        print("Escalations in evaluation runs:\n")
+        print(f"{'Metric':<40} {'Cases':>10} {'Escalated':>12} {'Strong Calls Saved':>20}")
+        print("─" * 100)
+        for metric_name, stats in cascade_summary["metrics"].items():
+            print(f"{metric_name:<40} {stats['cases']:>10} {stats['escalated']:>12} "
+                  f"{(1 - stats['strong_call_rate']) * 100:>19.1f}%")
+        print("─" * 100)
+
+    print("\n" + "═"*100 + "\n")
+
+
+def print_judge_pool_stats(pool_summary: Dict[str, Any]):
+    """Print per-endpoint load, failures and latency of the judge endpoint pool."""
+    print("\n" + "╔" + "═"*98 + "╗")
+    print("║" + " "*40 + "JUDGE ENDPOINTS" + " "*43 + "║")
+    print("╚" + "═"*98 + "╝\n")
+    print(f"Judge: {pool_summary['model']} | ejected after {pool_summary['eject_after']} consecutive failures "
+          f"for {pool_summary['eject_seconds']:g}s | failovers: {pool_summary['failovers']}\n")
+
+    print(f"{'Endpoint':<22} {'Weight':>6} {'Requests':>9} {'Share':>7} {'Failures':>9} {'Ejected':>8} "
+          f"{'Mean':>7} {'p95':>7} {'Cost':>10}  {'State':<8}")
+    print("─"*100)
+    for endpoint in pool_summary["endpoints"]:
+        mean = f"{endpoint['mean_latency_seconds']:.2f}s" if endpoint["mean_latency_seconds"] is not None else "-"
+        p95 = f"{endpoint['p95_latency_seconds']:.2f}s" if endpoint["p95_latency_seconds"] is not None else "-"
+        state = "active" if endpoint["in_rotation"] else "ejected"
+        print(f"{endpoint['name'][:22]:<22} {endpoint['weight']:>6g} {endpoint['requests']:>9} "
+              f"{endpoint['share'] * 100:>6.1f}% {endpoint['failures']:>9} {endpoint['ejections']:>8} "
+              f"{mean:>7} {p95:>7} {endpoint['cost']:>10.4f}  {state:<8}")
+    print("─"*100)
+    print("\n" + "═"*100 + "\n")
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{secs:02d}s"
+
+
+def print_queue_status(status: Dict[str, Any]):
+    """Print depth, throughput, ETA and per-job progress of the evaluation job queue."""
+    print("\n" + "╔" + "═"*98 + "╗")
+    print("║" + " "*37 + "EVALUATION QUEUE" + " "*45 + "║")
+    print("╚" + "═"*98 + "╝\n")
+
+    throughput = status["throughput_per_minute"]
+    print(f"{'Open Jobs:':<30} {status['open_jobs']:>8}")
+    print(f"{'Queued Test Cases:':<30} {status['queued_cases']:>8}")
+    print(f"{'Running Test Cases:':<30} {status['running_cases']:>8}")
+    print(f"{'Done Test Cases:':<30} {status['done_cases']:>8}")
+    print(f"{'Failed Test Cases:':<30} {status['failed_cases']:>8}")
+    print(f"{'Throughput (cases/min):':<30} {throughput if throughput is not None else '-':>8}")
+    print(f"{'ETA:':<30} {_format_duration(status['eta_seconds']):>8}")
+
+    if status["jobs"]:
+        print(f"\n{'Job':>5} {'Kind':<12} {'Report':<34} {'Priority':>8} {'Status':<11} {'Done':>11} {'Failed':>7}")
+        print("─"*100)
+        for job in status["jobs"]:
+            report = job["report_path"] or "-"
+            if len(report) > 34:
+                report = "…" + report[-33:]
+            progress = f"{job['done']}/{job['total_cases']}"
+            print(f"{job['id']:>5} {job['kind']:<12} {report:<34} {job['priority']:>8} "
+                  f"{job['status']:<11} {progress:>11} {job['failed']:>7}")
+            if job["error"]:
+                print(f"{'':>6}✗ {job['error']}")
+    print("\n" + "═"*100 + "\n")
+
+
+def print_verdict_store_summary(logs: List[Dict[str, Any]], metric_summary: List[Dict[str, Any]]):
+    """Print the imported logs and verdicts per metric and judge model of a verdict store."""
+    print("\n" + "╔" + "═"*98 + "╗")
+    print("║" + " "*41 + "VERDICT STORE" + " "*44 + "║")
+    print("╚" + "═"*98 + "╝\n")
+
+    print(f"{'Log':<70} {'Test Cases':>12} {'Verdicts':>10}")
+    print("─"*100)
+    for log in logs:
+        path = log["path"] if len(log["path"]) <= 70 else "…" + log["path"][-69:]
+        print(f"{path:<70} {log['test_cases']:>12} {log['verdicts']:>10}")
+
+    if metric_summary:
+        print(f"\n{'Metric':<40} {'Judge':<14} {'Verdicts':>9} {'Cases':>7} {'Pass Rate':>10} {'Mean':>8} {'Errors':>7}")
+        print("─"*100)
+        for row in metric_summary:
+            mean = f"{row['mean_score']:.3f}" if row["mean_score"] is not None else "-"
+            print(f"{row['metric']:<40} {str(row['evaluation_model']):<14} {row['verdicts']:>9} "
+                  f"{row['test_cases']:>7} {row['passed'] / row['verdicts'] * 100:>9.1f}% {mean:>8} {row['errors']:>7}")
+    print("\n" + "═"*100 + "\n")
+
+
+def print_profile(profile: Dict[str, Any]):
+    """Print wall time, CPU time and memory of each run stage (--profile)."""
+    print("\n" + "╔" + "═"*98 + "╗")
+    print("║" + " "*41 + "STAGE PROFILE" + " "*44 + "║")
+    print("╚" + "═"*98 + "╝\n")
+
+    total_wall = profile["total_wall_seconds"]
+    print(f"{'Stage':<20} {'Calls':>6} {'Wall':>10} {'Share':>7} {'CPU':>10} {'CPU/Wall':>9} "
+          f"{'Peak MB':>10} {'Retained MB':>12}")
+    print("─"*100)
+    for stage in profile["stages"]:
+        share = stage["wall_seconds"] / total_wall * 100 if total_wall else 0.0
+        print(f"{stage['stage'][:20]:<20} {stage['calls']:>6} {stage['wall_seconds']:>9.2f}s {share:>6.1f}% "
+              f"{stage['cpu_seconds']:>9.2f}s {stage['cpu_share'] * 100:>8.0f}% "
+              f"{stage['peak_memory_mb']:>10.1f} {stage['retained_memory_mb']:>12.1f}")
+    print("─"*100)
+    print(f"{'Total':<20} {'':>6} {total_wall:>9.2f}s {'':>7} {profile['total_cpu_seconds']:>9.2f}s")
+    if profile["pstats_dump"]:
+        print(f"\ncProfile dump: {profile['pstats_dump']} (python -m pstats {profile['pstats_dump']})")
+    print("\n" + "═"*100 + "\n")
+
+
+def print_estimate(estimate: Dict[str, Any]):
+    """Print the dry-run estimate of judge calls, tokens, cost and wall-clock time."""
+    print("\n" + "╔" + "═"*98 + "╗")
+    print("║" + " "*35 + "DRY RUN: JUDGE ESTIMATE" + " "*40 + "║")
+    print("╚" + "═"*98 + "╝\n")
+
+    def money(value):
+        return f"${value:.2f}" if value is not None else "n/a"
+
+    mode = ", ".join(name for name, on in (("score-only", estimate["score_only"]), ("fail-fast", estimate["fail_fast"])) if on)
+    print(f"Judge: {estimate['model']} (context window {estimate['context_window']:,} tokens) | "
+          f"{estimate['max_concurrent']} concurrent test cases{f' | {mode}' if mode else ''}")
+    print(f"Tokenizer: {estimate['tokenizer']} | {estimate['output_tokens_per_call']} output tokens assumed per call")
+    if estimate["latency_history"]:
+        print(f"Latencies measured in: {estimate['latency_history']}")
+    else:
+        print(f"Latencies: no earlier measurements, {estimate['assumed_call_seconds']:g}s assumed per judge call")
+
+    print(f"\n{'Evaluation':<34} {'Cases':>7} {'Calls':>8} {'Prompt Tok':>12} {'Output Tok':>11} "
+          f"{'Cost':>10} {'Wall Clock':>11}")
+    print("─"*100)
+    for row in estimate["sets"] + [{"name": "TOTAL", **estimate["total"]}]:
+        if row["name"] == "TOTAL":
+            print("─"*100)
+        print(f"{row['name'][:34]:<34} {row['test_cases']:>7} {row['judge_calls']:>8} {row['prompt_tokens']:>12,} "
+              f"{row['output_tokens']:>11,} {money(row['cost']):>10} {_format_duration(row['wall_clock_seconds']):>11}")
+
+    print(f"\n{'Metric':<34} {'Calls':>8} {'Mean Prompt':>12} {'Max Prompt':>11} {'Latency/Case':>13}  {'Source':<9}")
+    print("─"*100)
+    for name, stats in estimate["metrics"].items():
+        seconds = stats["seconds_per_test_case"]
+        latency = f"{seconds:.2f}s" if seconds is not None else "-"
+        print(f"{name[:34]:<34} {stats['judge_calls']:>8} {stats['mean_prompt_tokens']:>12,} "
+              f"{stats['max_prompt_tokens']:>11,} {latency:>13}  {stats['latency']:<9}")
+    print("─"*100)
+
+    oversized = estimate["oversized"]
+    if oversized:
+        print(f"\n⚠ {len(oversized)} judge prompts would exceed the judge's context window:")
+        for call in oversized[:20]:
+            print(f"  {call['set']} / {call['test_case']}: {call['metric']} ({call['step']}) "
+                  f"{call['prompt_tokens']:,} tokens")
+        if len(oversized) > 20:
+            print(f"  ... and {len(oversized) - 20} more")
+    else:
+        print("\n✓ Every judge prompt fits the judge's context window")
+    print("\n" + "═"*100 + "\n")
+
+
+def print_comparison_matrix(comparison: Dict[str, Any]):
+    """Print paired comparison of every experiment against the first one (the baseline)."""
+    print_header("EXPERIMENT COMPARISON MATRIX")
+
+    names = comparison["experiments"]
+    pairwise = comparison["pairwise"]
+    metrics = comparison["metrics"]
+    baseline = names[0]
+
+    def fmt_delta(value, scale=1.0):
+        return "-" if value is None else f"{value * scale:+.2f}"
+
+    print(f"\nPaired per-test results vs. baseline '{baseline}' (W/L/T: test passes in one and fails in the other)\n")
+    print(f"{'Experiment':<32} {'Paired':>7} {'W':>5} {'L':>5} {'T':>5} {'ΔPass %':>9}"
+          + "".join(f" {('Δ' + m.replace(' [GEval]', ''))[:11]:>11}" for m in metrics[:3]))
+    print("─" * 100)
+    for i, name in enumerate(names[1:], 1):
+        print(f"{name[:32]:<32} {pairwise['paired_tests'][i][0]:>7.0f} {pairwise['wins'][i][0]:>5.0f} "
+              f"{pairwise['losses'][i][0]:>5.0f} {pairwise['ties'][i][0]:>5.0f} "
+              f"{fmt_delta(pairwise['pass_rate_delta'][i][0], 100):>9}"
+              + "".join(f" {fmt_delta(comparison['metric_deltas'][m][i][0]):>11}" for m in metrics[:3]))
+    print("─" * 100)
+
+    if len(metrics) > 3:
+        print(f"\n{'Experiment':<32}" + "".join(f" {('Δ' + m.replace(' [GEval]', ''))[:16]:>16}" for m in metrics[3:]))
+        print("─" * 100)
+        for i, name in enumerate(names[1:], 1):
+            print(f"{name[:32]:<32}" + "".join(f" {fmt_delta(comparison['metric_deltas'][m][i][0]):>16}" for m in metrics[3:]))
+        print("─" * 100)
+
+    print(f"\nPass rate delta (percentage points) by task type vs. baseline:\n")
+    print(f"{'Task Type':<32}" + "".join(f" {name[:14]:>14}" for name in names[1:6]))
+    print("─" * 100)
+    for task_type, delta in comparison["task_type_deltas"].items():
+        print(f"{task_type:<32}" + "".join(f" {fmt_delta(delta[i][0], 100):>14}" for i in range(1, min(len(names), 6))))
+    print("─" * 100)
+
+    flipped = comparison["flipped_tests"]
+    print(f"\nTests with different outcomes across experiments: {len(flipped)}/{comparison['total_tests']}")
+    for test in flipped[:10]:
+        outcomes = ", ".join(
+            f"{name}: {'-' if status is None else ('PASS' if status else 'FAIL')}" for name, status in test["passed"].items()
+        )
+        print(f"  {test['id']:<20} {test['task_type']:<24} {outcomes}")
+    if len(flipped) > 10:
+        print(f"  ... and {len(flipped) - 10} more (see comparison file)")
+
+    print("\n" + "═"*100 + "\n")
+
+
+def save_comparison_report(output_path: str, comparison: Dict[str, Any]):
+    """Save the experiment comparison to a JSON file."""
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(comparison, f, indent=2, ensure_ascii=False)
+
+    print(f"✓ Comparison saved to: {output_path}\n")
+
+
+def print_batch_summary(batch_summary: Dict[str, Any]):
+    """Print the batch rounds that fetched the judge's answers (--batch)."""
+    print("\n" + "╔" + "═"*98 + "╗")
+    print("║" + " "*42 + "BATCH JUDGE" + " "*45 + "║")
+    print("╚" + "═"*98 + "╝\n")
+    print(f"{'Round':>5}  {'Batch':<40} {'Requests':>9} {'Answered':>9} {'Failed':>7}")
+    print("─"*100)
+    for row in batch_summary["rounds"]:
+        print(f"{row['round']:>5}  {row['batch_id'][:40]:<40} {row['requests']:>9} {row['answered']:>9} "
+              f"{row['failed']:>7}")
+    print("─"*100)
+    print(f"{len(batch_summary['rounds'])} round(s), {batch_summary['requests']} requests in "
+          f"{batch_summary['seconds']:.1f}s; {batch_summary['reused_responses']} answers reused from earlier runs")
+    if batch_summary["unanswered_measurements"]:
+        print(f"⚠ {batch_summary['unanswered_measurements']} metric measurement(s) still lack an answer "
+              f"after the last round")
+    if batch_summary["measurement_errors"]:
+        print(f"⚠ {batch_summary['measurement_errors']} metric measurement(s) failed while collecting answers; "
+              f"the evaluation reports them as metric errors")
+    print("\n" + "═"*100 + "\n")
+
+
+def print_gate_verdict(verdict: Dict[str, Any]):
+    """Print the latency and cost comparison of a candidate report against its baseline."""
+    print_header("LATENCY & COST REGRESSION GATE")
+
+    baseline, candidate = verdict["baseline"], verdict["candidate"]
+    print(f"\nBaseline:  {baseline['path']} ({(baseline['gitHash'] or 'N/A')[:10]}, {baseline['timestamp']})")
+    print(f"Candidate: {candidate['path']} ({(candidate['gitHash'] or 'N/A')[:10]}, {candidate['timestamp']})")
+    print(f"Paired entries: {verdict['paired_entries']} (baseline only: {len(verdict['baseline_only'])}, "
+          f"candidate only: {len(verdict['candidate_only'])}); {verdict['confidence'] * 100:.0f}% intervals "
+          f"from {verdict['bootstrap_samples']} paired bootstrap resamples\n")
+
+    def fmt(value, spec):
+        return "–" if value is None else format(value, spec)
+
+    def fmt_relative(value):
+        return "–" if value is None else f"{value * 100:+.1f}%"
+
+    print(f"{'Task Type':<24} {'Feature':<16} {'Stat':<7} {'Pairs':>6} {'Baseline':>10} {'Candidate':>10} "
+          f"{'Shift':>9} {'Shift CI':>19} {'Limit':>7}")
+    print("─" * 116)
+    for row in verdict["comparisons"]:
+        ci = f"[{fmt_relative(row['relative_ci'][0])}, {fmt_relative(row['relative_ci'][1])}]"
+        limit = f"+{row['limit'] * 100:.0f}%" if row["limit"] is not None else ("–" if row["gated"] else "n<min")
+        status = "✗" if row["regressed"] else " "
+        print(f"{row['task_type'][:24]:<24} {row['feature']:<16} {row['stat']:<7} {row['pairs']:>6} "
+              f"{fmt(row['baseline'], '.3f'):>10} {fmt(row['candidate'], '.3f'):>10} "
+              f"{fmt_relative(row['relative_shift']):>9} {ci:>19} {limit:>7} {status}")
+    print("─" * 116)
+
+    if verdict["passed"]:
+        print("\n✓ Gate passed: no latency or cost regression beyond the configured limits")
+    else:
+        print(f"\n✗ Gate failed: {len(verdict['regressions'])} regression(s) beyond the configured limits")
+        for row in verdict["regressions"]:
+            print(f"  {row['task_type']} {row['feature']} {row['stat']}: {fmt(row['baseline'], '.3f')} → "
+                  f"{fmt(row['candidate'], '.3f')} ({fmt_relative(row['relative_shift'])}, "
+                  f"limit +{row['limit'] * 100:.0f}%)")
+    print("\n" + "═"*100 + "\n")
+
+
+def save_gate_verdict(output_path: str, verdict: Dict[str, Any]):
+    """Save the regression gate verdict to a JSON file."""
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(verdict, f, indent=2, ensure_ascii=False)
+
+    print(f"✓ Verdict saved to: {output_path}\n")
+
+
 def save_json_report(
     output_path: str,
     total_tests: int,
     overall_pass_rate: float,
     calibration_summary: Dict[str, Any],
     categories_report: Dict[str, Any],
-    failure_analysis: Dict[str, Any]
+    failure_analysis: Dict[str, Any],
+    extra_sections: Optional[Dict[str, Any]] = None,
 ):
-    """Save JSON report to file."""
+    """Save JSON report to file.
+
+    Args:
+        extra_sections: Optional additional top-level sections (e.g. sampling estimates)
+    """
     json_report = {
         "summary": {
             "total_tests": total_tests,
@@ -427,6 +921,8 @@ def save_json_report(
         "categories": categories_report,
         "failure_analysis": failure_analysis,
     }
+    if extra_sections:
+        json_report.update(extra_sections)
 
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(json_report, f, indent=2, ensure_ascii=False)
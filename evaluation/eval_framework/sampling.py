@@ -0,0 +1,154 @@
+"""
+Stratified sampling of test entries for cheap pass-rate estimates.
+Draws a per-task-type sample sized to a target margin of error and turns the
+judged sample back into population estimates with confidence intervals.
+"""
+import math
+import random
+from collections import defaultdict
+from statistics import NormalDist
+from typing import Dict, Any, List, Tuple
+
+from .config import SAMPLE_MIN_PER_STRATUM
+
+
+def z_score(confidence: float) -> float:
+    """Two-sided z value for a confidence level (e.g. 0.95 -> 1.96)."""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def required_sample_size(population: int, margin_of_error: float, confidence: float, p: float = 0.5) -> int:
+    """Sample size for estimating a proportion, with finite population correction."""
+    if population <= 0:
+        return 0
+    z = z_score(confidence)
+    n0 = z ** 2 * p * (1 - p) / margin_of_error ** 2
+    n = n0 / (1 + (n0 - 1) / population)
+    return min(population, math.ceil(n))
+
+
+def allocate_sample(strata_sizes: Dict[str, int], total_n: int, min_per_stratum: int = SAMPLE_MIN_PER_STRATUM) -> Dict[str, int]:
+    """Allocate total_n proportionally to strata (largest remainder), with a per-stratum minimum."""
+    population = sum(strata_sizes.values())
+    if population == 0:
+        return {stratum: 0 for stratum in strata_sizes}
+
+    quotas = {stratum: total_n * size / population for stratum, size in strata_sizes.items()}
+    allocation = {stratum: int(quota) for stratum, quota in quotas.items()}
+
+    remaining = total_n - sum(allocation.values())
+    by_remainder = sorted(quotas, key=lambda s: quotas[s] - allocation[s], reverse=True)
+    for stratum in by_remainder[:remaining]:
+        allocation[stratum] += 1
+
+    return {
+        stratum: min(strata_sizes[stratum], max(allocation[stratum], min_per_stratum))
+        for stratum in strata_sizes
+    }
+
+
+def draw_stratified_sample(
+    entries: List[Dict[str, Any]],
+    margin_of_error: float,
+    confidence: float,
+    seed: int,
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Draw a stratified sample of entries by task_type.
+
+    Returns:
+        Tuple of (sampled entries in report order, population size per task_type)
+    """
+    indices_by_type = defaultdict(list)
+    for i, entry in enumerate(entries):
+        indices_by_type[entry.get("task_type", "unknown")].append(i)
+
+    population_by_type = {task_type: len(indices) for task_type, indices in indices_by_type.items()}
+    total_n = required_sample_size(len(entries), margin_of_error, confidence)
+    allocation = allocate_sample(population_by_type, total_n)
+
+    rng = random.Random(seed)
+    selected = set()
+    for task_type, indices in indices_by_type.items():
+        selected.update(rng.sample(indices, allocation[task_type]))
+
+    sampled_entries = [entry for i, entry in enumerate(entries) if i in selected]
+    return sampled_entries, population_by_type
+
+
+def wilson_interval(passed: int, n: int, population: int, confidence: float) -> Tuple[float, float]:
+    """Wilson score interval for a pass rate, narrowed by the finite population correction."""
+    if n == 0:
+        return 0.0, 1.0
+
+    p = passed / n
+    fpc = (population - n) / (population - 1) if population > 1 else 0.0
+    if fpc <= 0:
+        return p, p
+
+    z = z_score(confidence)
+    n_eff = n / fpc
+    denominator = 1 + z ** 2 / n_eff
+    center = (p + z ** 2 / (2 * n_eff)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n_eff + z ** 2 / (4 * n_eff ** 2)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def build_sample_report(
+    categories_report: Dict[str, Any],
+    population_by_type: Dict[str, int],
+    margin_of_error: float,
+    confidence: float,
+) -> Dict[str, Any]:
+    """Estimate population pass rates from the judged sample.
+
+    Args:
+        categories_report: Per task_type results of the sampled run (from print_task_type_analysis)
+        population_by_type: Number of entries per task_type in the full report
+        margin_of_error: Target margin of error the sample was sized for
+        confidence: Confidence level for the intervals
+    """
+    population = sum(population_by_type.values())
+    z = z_score(confidence)
+
+    categories = {}
+    overall_rate = 0.0
+    overall_variance = 0.0
+    sampled_total = 0
+
+    for task_type, size in population_by_type.items():
+        category = categories_report.get(task_type, {})
+        n = category.get("tested", category.get("n", 0))
+        passed = category.get("passed", 0)
+        sampled_total += n
+
+        p = passed / n if n > 0 else 0.0
+        low, high = wilson_interval(passed, n, size, confidence)
+
+        weight = size / population if population > 0 else 0.0
+        overall_rate += weight * p
+        if n > 1:
+            overall_variance += weight ** 2 * (1 - n / size) * p * (1 - p) / (n - 1)
+
+        categories[task_type] = {
+            "n": size,
+            "sampled": n,
+            "passed": passed,
+            "pass_rate_percent": round(p * 100, 2),
+            "pass_rate_ci_percent": [round(low * 100, 2), round(high * 100, 2)],
+        }
+
+    half_width = z * math.sqrt(overall_variance)
+    return {
+        "summary": {
+            "total_tests": population,
+            "sampled_tests": sampled_total,
+            "overall_pass_rate": round(overall_rate * 100, 2),
+            "overall_pass_rate_ci": [
+                round(max(0.0, overall_rate - half_width) * 100, 2),
+                round(min(1.0, overall_rate + half_width) * 100, 2),
+            ],
+            "margin_of_error": margin_of_error,
+            "confidence": confidence,
+        },
+        "categories": categories,
+    }
@@ -3,10 +3,14 @@ Test case builders for evaluation.
 Handles creation of test cases from report data and calibration samples.
 """
 import json
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from deepeval.test_case import LLMTestCase, ToolCall
 
-from .config import EVALUATION_CURRENT_DATE
+from .config import EVALUATION_CURRENT_DATE, REPORT_READ_CHUNK, BUILD_WORKERS, BUILD_CHUNK_SIZE
+
+# Top-level report values that must precede testEntries for the report to be streamed
+REPORT_HEADER_KEYS = ("gitHash", "timestamp")
 
 
 def get_expected_tool_calls(e: Dict[str, Any]) -> List[ToolCall]:
@@ -452,42 +456,206 @@ DEBUG: Function completed successfully with trace_id=abc123""",
     return calibration_cases
 
 
-def get_test_cases(data: Optional[Dict[str, Any]] = None, path: str = "./report/report.json") -> List[LLMTestCase]:
-    """Load test cases from report JSON file."""
-    if data is None:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+def extract_test_case_fields(e: Dict[str, Any]) -> Dict[str, Any]:
+    """Test case fields of one report entry as plain values (tool calls as (name, args) pairs).
 
-    entries = data.get("testEntries", data if isinstance(data, list) else [])
-    tcs = []
+    This is the trace walk, the part of building a test case that grows with
+    the depth of the trace; the result is cheap to send between processes.
+    """
+    trace = e.get("trace", {})
+    # Add default context
+    context = [x.get("description") for x in trace.get("agentTools", [])]
+    context.extend(get_context(trace))
+
+    input_text = e["input"]
+    if e.get("extended_evaluation_input"):
+        input_text += f"\n\n{e.get('extended_evaluation_input')}"
+
+    return {
+        "name": e.get("id"),
+        "input": input_text,
+        "actual_output": e["actual_output"],
+        "expected_output": e.get("expected_output"),
+        "context": context,
+        "completion_time": e.get("completion_time"),
+        "expected_tools": [(t.name, t.input_parameters) for t in get_expected_tool_calls(e)],
+        "tools_called": [(t.name, t.input_parameters) for t in get_tools_called(trace)],
+    }
+
+
+def test_case_from_fields(fields: Dict[str, Any]) -> LLMTestCase:
+    """Validated test case from extract_test_case_fields() output."""
+    return LLMTestCase(**{
+        **fields,
+        "expected_tools": [ToolCall(name=name, input_parameters=args) for name, args in fields["expected_tools"]],
+        "tools_called": [ToolCall(name=name, input_parameters=args) for name, args in fields["tools_called"]],
+    })
+
+
+def build_test_case(e: Dict[str, Any]) -> LLMTestCase:
+    """Build the test case of one report entry."""
+    return test_case_from_fields(extract_test_case_fields(e))
+
+
+# Entries of the report being built, inherited by forked worker processes instead of pickled per chunk
+_worker_entries: List[Dict[str, Any]] = []
+
+
+def _init_build_worker(entries: List[Dict[str, Any]]):
+    global _worker_entries
+    _worker_entries = entries
 
-    for e in entries:
-        trace = e.get("trace", {})
-        # Add default context
-        context = [x.get("description") for x in trace.get("agentTools", [])]
-        context.extend(get_context(trace))
 
-        tool_calls = get_tools_called(trace)
+def _extract_chunk(bounds: Tuple[int, int]) -> List[Dict[str, Any]]:
+    start, end = bounds
+    return [extract_test_case_fields(e) for e in _worker_entries[start:end]]
 
-        input_text = e["input"]
-        if e.get("extended_evaluation_input"):
-            input_text += f"\n\n{e.get('extended_evaluation_input')}"
 
-        tc = LLMTestCase(
-            input=input_text,
-            actual_output=e["actual_output"],
-            expected_output=e.get("expected_output"),
-            context=context,
-            completion_time=e.get("completion_time"),
-            expected_tools=get_expected_tool_calls(e),
-            tools_called=tool_calls,
-        )
-        tcs.append(tc)
+def build_test_cases_parallel(
+    entries: List[Dict[str, Any]],
+    workers: int,
+    chunk_size: int = BUILD_CHUNK_SIZE,
+) -> List[LLMTestCase]:
+    """Build test cases with the trace walks fanned out to worker processes, in report order.
 
-    return tcs
+    Workers get the entries once when they start (for free where processes
+    are forked) and chunks as index ranges. They send back plain field values
+    rather than test cases, because unpickling pydantic models costs about as
+    much as building them; the parent only validates.
+    """
+    if workers <= 1 or len(entries) < 2 * chunk_size:
+        return [build_test_case(e) for e in entries]
+
+    bounds = [(i, min(i + chunk_size, len(entries))) for i in range(0, len(entries), chunk_size)]
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(bounds)), initializer=_init_build_worker, initargs=(entries,)
+    ) as executor:
+        return [test_case_from_fields(fields) for chunk in executor.map(_extract_chunk, bounds) for fields in chunk]
+
+
+def get_test_cases(
+    data: Optional[Dict[str, Any]] = None,
+    path: str = "./report/report.json",
+    workers: int = BUILD_WORKERS,
+) -> List[LLMTestCase]:
+    """Load test cases from report JSON file.
+
+    Args:
+        workers: Build in this many processes (see build_test_cases_parallel)
+    """
+    if data is None:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+    entries = data.get("testEntries", data if isinstance(data, list) else [])
+    return build_test_cases_parallel(entries, workers)
 
 
 def load_report_data(path: str) -> Dict[str, Any]:
     """Load report data from JSON file."""
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
+
+
+class _JsonStream:
+    """Reads a JSON text file value by value, holding only what has not been consumed yet."""
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, f, chunk_size: int):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+
+    def _read(self, at_least: int = 0) -> bool:
+        chunk = self._f.read(max(self._chunk_size, at_least))
+        if not chunk:
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ("" at the end of the file)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        """Consume the next non-whitespace character, which must be one of chars."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expecting one of {chars!r}", self._buffer, self._pos)
+        self._pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next value, reading more of the file until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Double the pending text per attempt, so a value larger than a chunk is decoded O(log n) times
+                if not self._read(len(self._buffer) - self._pos):
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and self._read():
+                continue
+            self._pos = end
+            return value
+
+
+def _iter_array(stream: _JsonStream, f) -> Iterator[Any]:
+    with f:
+        stream.expect("[")
+        if stream.peek() == "]":
+            return
+        while True:
+            yield stream.value()
+            if stream.expect(",]") == "]":
+                return
+
+
+def stream_report(path: str, chunk_size: int = REPORT_READ_CHUNK) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """Open a report for reading its entries one at a time.
+
+    Only the entry being decoded is held in memory, not the whole file.
+    Reports whose REPORT_HEADER_KEYS do not all precede testEntries are
+    loaded whole instead, so the returned metadata is the same either way.
+
+    Returns:
+        Tuple of (top-level values other than testEntries, iterator over testEntries)
+    """
+    f = open(path, "r", encoding="utf-8")
+    try:
+        stream = _JsonStream(f, chunk_size)
+        metadata = {}
+        if stream.peek() == "{":
+            stream.expect("{")
+            while stream.peek() == '"':
+                key = stream.value()
+                stream.expect(":")
+                if key == "testEntries":
+                    if stream.peek() == "[" and all(k in metadata for k in REPORT_HEADER_KEYS):
+                        return metadata, _iter_array(stream, f)
+                    break
+                metadata[key] = stream.value()
+                if stream.expect(",}") == "}":
+                    break
+    except BaseException:
+        f.close()
+        raise
+    f.close()
+
+    data = load_report_data(path)
+    if isinstance(data, list):
+        return {}, iter(data)
+    metadata = {key: value for key, value in data.items() if key != "testEntries"}
+    return metadata, iter(data.get("testEntries", []))
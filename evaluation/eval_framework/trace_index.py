@@ -0,0 +1,354 @@
+"""
+Searchable index of agent traces.
+Reports are loaded into a local SQLite database with one row per test entry
+(keyed by experiment, test id and task_type), per router iteration and per
+function call. Each call records its depth in the internalRouterProcess tree
+and its position in the trace. Thoughts, TODO lists, call arguments and
+results go into an FTS5 full-text index. Queries match a sequence of steps
+in trace order, e.g. a moodle error followed by a calendar-agent call.
+"""
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from .config import EXPERIMENTS, TRACE_ERROR_QUERY
+from .test_case_builder import stream_report
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    experiment TEXT NOT NULL,
+    git_hash TEXT,
+    timestamp TEXT,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    indexed_at REAL NOT NULL,
+    tests INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    report_id INTEGER NOT NULL REFERENCES reports(id),
+    experiment TEXT NOT NULL,
+    test_id TEXT NOT NULL,
+    task_type TEXT NOT NULL,
+    input TEXT,
+    actual_output TEXT,
+    error TEXT,
+    iterations INTEGER NOT NULL,
+    calls INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tests_by_id ON tests(test_id, experiment);
+CREATE TABLE IF NOT EXISTS iterations (
+    test INTEGER NOT NULL REFERENCES tests(id),
+    seq INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    agent TEXT,
+    iteration INTEGER,
+    is_finished INTEGER,
+    PRIMARY KEY (test, seq)
+);
+CREATE TABLE IF NOT EXISTS calls (
+    test INTEGER NOT NULL REFERENCES tests(id),
+    seq INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    parent_seq INTEGER,
+    agent TEXT,
+    type TEXT,
+    function TEXT,
+    path TEXT,
+    args TEXT,
+    result TEXT,
+    PRIMARY KEY (test, seq)
+);
+CREATE INDEX IF NOT EXISTS calls_by_function ON calls(function);
+CREATE VIRTUAL TABLE IF NOT EXISTS trace_text USING fts5(
+    content, test UNINDEXED, seq UNINDEXED, kind UNINDEXED, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Kinds of indexed text
+TEXT_KINDS = ("input", "thought", "todo", "args", "result", "output", "error")
+
+STEP_KINDS = ("called", "result", "error", "thought", "todo", "text")
+
+
+def experiment_for(report_path: str) -> str:
+    """Name of the configured experiment for a report, else its name (report_<name>.json -> <name>)."""
+    resolved = Path(report_path).resolve()
+    for config in EXPERIMENTS:
+        if Path(config.report_path).resolve() == resolved:
+            return config.name
+    stem = resolved.stem
+    return stem[len("report_"):] if stem.startswith("report_") else stem
+
+
+class _TraceRows:
+    """Iteration, call and text rows of one test entry's trace, numbered in trace order."""
+
+    def __init__(self, test: int):
+        self.test = test
+        self.seq = 0
+        self.iterations: List[Tuple] = []
+        self.calls: List[Tuple] = []
+        self.texts: List[Tuple] = []
+
+    def text(self, kind: str, seq: int, content: Optional[str]):
+        if content:
+            self.texts.append((content, self.test, seq, kind))
+
+    def walk(self, process: Dict[str, Any], depth: int = 0, parent: Optional[Tuple[int, str]] = None):
+        """Number iterations and calls depth-first, so an agent's calls follow the call that started it."""
+        agent = process.get("agentName")
+        for iteration in process.get("iterationHistory") or []:
+            self.seq += 1
+            structured = iteration.get("structuredThought") or {}
+            self.iterations.append((
+                self.test, self.seq, depth, agent, iteration.get("iteration"),
+                None if structured.get("isFinished") is None else int(bool(structured["isFinished"])),
+            ))
+            self.text("thought", self.seq, iteration.get("naturalLanguageThought"))
+            self.text("todo", self.seq, iteration.get("todoThought"))
+
+            for call in structured.get("functionCalls") or []:
+                self.seq += 1
+                function = call.get("function")
+                path = f"{parent[1]}.{function}" if parent else function
+                args = json.dumps(call.get("args"), ensure_ascii=False) if call.get("args") is not None else None
+                result = call.get("result")
+                if result is not None and not isinstance(result, str):
+                    result = json.dumps(result, ensure_ascii=False)
+                self.calls.append((
+                    self.test, self.seq, depth, parent[0] if parent else None, agent,
+                    call.get("type"), function, path, args, result,
+                ))
+                self.text("args", self.seq, args)
+                self.text("result", self.seq, result)
+                if call.get("internalRouterProcess"):
+                    self.walk(call["internalRouterProcess"], depth + 1, (self.seq, path))
+
+
+@dataclass
+class TraceStep:
+    """One step of a trace query.
+
+    called:NAME         a call of NAME
+    result:NAME=QUERY   a call of NAME whose result matches the full-text QUERY
+    error:NAME          a call of NAME whose result reads like an error (TRACE_ERROR_QUERY)
+    thought:QUERY       a router thought matching QUERY
+    todo:QUERY          a TODO list matching QUERY
+    text:QUERY          any indexed text matching QUERY
+
+    NAME is a glob matched against the function and against its path below
+    the calling agents ("moodle-agent.get_course_details"), so "moodle*"
+    matches moodle-agent and every tool it called.
+    """
+    kind: str
+    name: Optional[str] = None
+    query: Optional[str] = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "TraceStep":
+        kind, sep, rest = spec.partition(":")
+        if not sep or kind not in STEP_KINDS or not rest:
+            raise ValueError(f"invalid step {spec!r}: expected one of {', '.join(k + ':' for k in STEP_KINDS)}")
+        if kind == "called":
+            return cls(kind, name=rest)
+        if kind == "error":
+            return cls(kind, name=rest, query=TRACE_ERROR_QUERY)
+        if kind == "result":
+            name, sep, query = rest.partition("=")
+            if not sep or not name or not query:
+                raise ValueError(f"invalid step {spec!r}: expected result:NAME=QUERY")
+            return cls(kind, name=name, query=query)
+        return cls(kind, query=rest)
+
+    def sql(self) -> Tuple[str, List[Any]]:
+        """Query selecting (test, seq) of every position in a trace where this step holds."""
+        by_name = "(c.function GLOB ? OR c.path GLOB ?)"
+        if self.kind == "called":
+            return f"SELECT c.test, c.seq FROM calls c WHERE {by_name}", [self.name, self.name]
+        if self.kind in ("result", "error"):
+            return (
+                "SELECT c.test, c.seq FROM trace_text t JOIN calls c ON c.test = t.test AND c.seq = t.seq "
+                f"WHERE trace_text MATCH ? AND t.kind = 'result' AND {by_name}",
+                [self.query, self.name, self.name],
+            )
+        if self.kind == "text":
+            return "SELECT test, seq FROM trace_text WHERE trace_text MATCH ?", [self.query]
+        return "SELECT test, seq FROM trace_text WHERE trace_text MATCH ? AND kind = ?", [self.query, self.kind]
+
+
+class TraceIndex:
+    """SQLite index of the agent traces of one or more reports."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _delete_report(self, report_id: int):
+        tests = [row[0] for row in self.conn.execute("SELECT id FROM tests WHERE report_id = ?", (report_id,))]
+        for table in ("trace_text", "calls", "iterations"):
+            self.conn.executemany(f"DELETE FROM {table} WHERE test = ?", ((test,) for test in tests))
+        self.conn.execute("DELETE FROM tests WHERE report_id = ?", (report_id,))
+        self.conn.execute("DELETE FROM reports WHERE id = ?", (report_id,))
+
+    def index_report(self, path: str, experiment: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """Index the traces of a report, streaming its entries.
+
+        A report indexed before is skipped unless it changed (or `force`); a
+        changed report, or one indexed under another experiment name, replaces
+        its earlier rows.
+
+        Returns:
+            {"path", "experiment", "indexed": False if skipped, "tests", "calls"}
+        """
+        path = os.path.abspath(path)
+        experiment = experiment or experiment_for(path)
+        stat = os.stat(path)
+        row = self.conn.execute("SELECT * FROM reports WHERE path = ?", (path,)).fetchone()
+        if (row is not None and not force and row["experiment"] == experiment
+                and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime):
+            calls = self.conn.execute(
+                "SELECT COALESCE(SUM(calls), 0) FROM tests WHERE report_id = ?", (row["id"],)
+            ).fetchone()[0]
+            return {"path": path, "experiment": experiment, "indexed": False, "tests": row["tests"], "calls": calls}
+
+        metadata, entries = stream_report(path)
+        with self.conn:
+            if row is not None:
+                self._delete_report(row["id"])
+            report_id = self.conn.execute(
+                "INSERT INTO reports (path, experiment, git_hash, timestamp, size, mtime, indexed_at, tests) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (path, experiment, metadata.get("gitHash"), metadata.get("timestamp"),
+                 stat.st_size, stat.st_mtime, time.time()),
+            ).lastrowid
+
+            tests = calls = 0
+            for entry in entries:
+                trace = entry.get("trace") or {}
+                error = trace.get("error")
+                test = self.conn.execute(
+                    "INSERT INTO tests (report_id, experiment, test_id, task_type, input, actual_output, error, "
+                    "iterations, calls) VALUES (?, ?, ?, ?, ?, ?, ?, 0, 0)",
+                    (report_id, experiment, entry.get("id", ""), entry.get("task_type", "unknown"),
+                     entry.get("input"), entry.get("actual_output"), str(error) if error else None),
+                ).lastrowid
+
+                rows = _TraceRows(test)
+                rows.text("input", 0, entry.get("input"))
+                rows.walk(trace)
+                rows.text("output", rows.seq + 1, entry.get("actual_output"))
+                rows.text("error", rows.seq + 1, str(error) if error else None)
+
+                self.conn.executemany("INSERT INTO iterations VALUES (?, ?, ?, ?, ?, ?)", rows.iterations)
+                self.conn.executemany("INSERT INTO calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows.calls)
+                self.conn.executemany(
+                    "INSERT INTO trace_text (content, test, seq, kind) VALUES (?, ?, ?, ?)", rows.texts
+                )
+                self.conn.execute(
+                    "UPDATE tests SET iterations = ?, calls = ? WHERE id = ?",
+                    (len(rows.iterations), len(rows.calls), test),
+                )
+                tests += 1
+                calls += len(rows.calls)
+
+            self.conn.execute("UPDATE reports SET tests = ? WHERE id = ?", (tests, report_id))
+        return {"path": path, "experiment": experiment, "indexed": True, "tests": tests, "calls": calls}
+
+    @staticmethod
+    def _filters(experiment: Optional[str], task_type: Optional[str]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if experiment:
+            clauses.append("t.experiment = ?")
+            params.append(experiment)
+        if task_type:
+            clauses.append("t.task_type = ?")
+            params.append(task_type)
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+    def find(
+        self,
+        steps: Iterable[TraceStep],
+        experiment: Optional[str] = None,
+        task_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Tests whose trace contains the steps in this order (not necessarily adjacent)."""
+        steps = list(steps)
+        if not steps:
+            raise ValueError("a trace query needs at least one step")
+
+        ctes, params = [], []
+        for i, step in enumerate(steps):
+            sql, step_params = step.sql()
+            ctes.append(f"s{i} AS ({sql})")
+            params.extend(step_params)
+        # First position of the last step reachable through every earlier step, in order
+        chain = "SELECT test, MIN(seq) AS seq FROM s0 GROUP BY test"
+        for i in range(1, len(steps)):
+            chain = (
+                f"SELECT s{i}.test, MIN(s{i}.seq) AS seq FROM ({chain}) p "
+                f"JOIN s{i} ON s{i}.test = p.test AND s{i}.seq > p.seq GROUP BY s{i}.test"
+            )
+        filters, filter_params = self._filters(experiment, task_type)
+        rows = self.conn.execute(
+            f"WITH {', '.join(ctes)} "
+            "SELECT t.experiment, t.test_id, t.task_type, t.iterations, t.calls, m.seq AS matched_at "
+            f"FROM ({chain}) m JOIN tests t ON t.id = m.test WHERE 1 = 1{filters} "
+            "ORDER BY t.experiment, t.test_id",
+            params + filter_params,
+        )
+        return [dict(row) for row in rows]
+
+    def search(
+        self,
+        query: str,
+        kind: Optional[str] = None,
+        experiment: Optional[str] = None,
+        task_type: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """Best full-text matches of `query` with a snippet and the call they belong to, if any."""
+        filters, filter_params = self._filters(experiment, task_type)
+        if kind:
+            filters += " AND x.kind = ?"
+            filter_params.append(kind)
+        rows = self.conn.execute(
+            "SELECT t.experiment, t.test_id, t.task_type, x.kind, x.seq, c.path AS call, c.depth, "
+            "snippet(trace_text, 0, '[', ']', '…', 16) AS snippet "
+            "FROM trace_text x JOIN tests t ON t.id = x.test "
+            "LEFT JOIN calls c ON c.test = x.test AND c.seq = x.seq "
+            f"WHERE trace_text MATCH ?{filters} ORDER BY rank LIMIT ?",
+            [query] + filter_params + [limit],
+        )
+        return [dict(row) for row in rows]
+
+    def calls(self, test_id: str, experiment: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Function calls of a test in trace order, with their depth and result."""
+        filters, filter_params = self._filters(experiment, None)
+        rows = self.conn.execute(
+            "SELECT t.experiment, c.seq, c.depth, c.agent, c.type, c.function, c.path, c.args, c.result "
+            "FROM calls c JOIN tests t ON t.id = c.test "
+            f"WHERE t.test_id = ?{filters} ORDER BY t.experiment, c.seq",
+            [test_id] + filter_params,
+        )
+        return [dict(row) for row in rows]
+
+    def reports(self) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self.conn.execute("SELECT * FROM reports ORDER BY experiment, path")]
+
@@ -0,0 +1,301 @@
+"""
+Store of judge verdicts imported from deepeval's test_run_*.log files.
+The logs of earlier runs hold every metric result the judge was paid for,
+but only as text. They are parsed as a stream, one test result at a time,
+into a local SQLite database, so historical runs can be re-analysed with
+queries and their verdicts reused instead of asking the judge again.
+"""
+import ast
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Any, Iterator, List, Optional
+
+from deepeval.metrics.base_metric import BaseMetric
+from deepeval.test_case import LLMTestCase, LLMTestCaseParams
+
+from .metrics import judged_params
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    imported_at REAL NOT NULL,
+    test_cases INTEGER NOT NULL,
+    verdicts INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS verdicts (
+    log_id INTEGER NOT NULL REFERENCES logs(id),
+    case_index INTEGER NOT NULL,
+    case_key TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    score REAL,
+    threshold REAL,
+    strict INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    evaluation_model TEXT,
+    reason TEXT,
+    error TEXT,
+    input TEXT,
+    actual_output TEXT,
+    expected_output TEXT,
+    context TEXT,
+    retrieval_context TEXT,
+    PRIMARY KEY (log_id, case_index, metric)
+);
+CREATE INDEX IF NOT EXISTS verdicts_by_case ON verdicts(case_key, metric, evaluation_model);
+"""
+
+# Test case fields deepeval writes to the log; a verdict can only be reused for a metric that judges no others
+LOGGED_PARAMS = {
+    LLMTestCaseParams.INPUT,
+    LLMTestCaseParams.ACTUAL_OUTPUT,
+    LLMTestCaseParams.EXPECTED_OUTPUT,
+    LLMTestCaseParams.CONTEXT,
+    LLMTestCaseParams.RETRIEVAL_CONTEXT,
+}
+
+_RULE = "=" * 70
+_METRIC_START = re.compile(r"^  - (✅|❌) ", re.MULTILINE)
+_METRIC_RE = re.compile(
+    r"(?P<name>.+?) \(score: (?P<score>\S+), threshold: (?P<threshold>\S+), strict: (?P<strict>True|False), "
+    r"evaluation model: (?P<model>.*?), reason: (?P<reason>.*), error: (?P<error>.*)\)\s*\Z",
+    re.DOTALL,
+)
+# Inputs and outputs may span lines; context and retrieval context are list reprs on one line
+_CASE_RE = re.compile(
+    r"  - input: (?P<input>.*?)\n  - actual output: (?P<actual_output>.*?)\n"
+    r"  - expected output: (?P<expected_output>.*)\n  - context: (?P<context>[^\n]*)\n"
+    r"  - retrieval context: (?P<retrieval_context>[^\n]*)\s*\Z",
+    re.DOTALL,
+)
+_CASE_HEADER = re.compile(r"\n\nFor (?:multimodal |conversational )?test case:\n\n")
+
+
+def _none(value: str) -> Optional[str]:
+    return None if value == "None" else value
+
+
+def _float(value: str) -> Optional[float]:
+    return None if value == "None" else float(value)
+
+
+def _list(value: str) -> Optional[List[str]]:
+    if value == "None":
+        return None
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return [value]
+    return parsed if isinstance(parsed, list) else [str(parsed)]
+
+
+def _parse_block(block: str) -> Dict[str, Any]:
+    """Metric results and test case of one "Metrics Summary" block."""
+    parts = _CASE_HEADER.split(block, maxsplit=1)
+    summary, case = parts[0], parts[1] if len(parts) > 1 else ""
+
+    metrics = []
+    starts = list(_METRIC_START.finditer(summary))
+    for start, end in zip(starts, starts[1:] + [None]):
+        text = summary[start.end():end.start() if end else len(summary)]
+        match = _METRIC_RE.match(text)
+        if match is None:
+            continue
+        metrics.append({
+            "name": match["name"],
+            "score": _float(match["score"]),
+            "threshold": _float(match["threshold"]),
+            "strict": match["strict"] == "True",
+            # deepeval marks a metric as passed only if it succeeded without error
+            "success": start.group(1) == "✅",
+            "evaluation_model": _none(match["model"]),
+            "reason": _none(match["reason"]),
+            "error": _none(match["error"]),
+        })
+
+    fields = {"input": None, "actual_output": None, "expected_output": None, "context": None, "retrieval_context": None}
+    match = _CASE_RE.match(case)
+    if match:
+        fields.update(
+            input=match["input"],
+            actual_output=match["actual_output"],
+            expected_output=_none(match["expected_output"]),
+            context=_list(match["context"]),
+            retrieval_context=_list(match["retrieval_context"]),
+        )
+    return {"metrics": metrics, **fields}
+
+
+def parse_test_run_log(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the test results of a deepeval test_run_*.log one at a time.
+
+    Each result is {"metrics": [{name, score, threshold, strict, success,
+    evaluation_model, reason, error}], "input", "actual_output",
+    "expected_output", "context", "retrieval_context"}. Only the lines of the
+    current result are held in memory; a result cut off at the end of the
+    file (interrupted run) is still returned if its test case was written.
+    """
+    lines: Optional[List[str]] = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line == "Metrics Summary\n":
+                lines = []
+            elif line == "Overall Metric Pass Rates\n":
+                if lines is not None:
+                    # Drop the rule deepeval writes before the pass rates
+                    while lines and lines[-1].strip() in ("", _RULE):
+                        lines.pop()
+                    yield _parse_block("".join(lines))
+                lines = None
+            elif lines is not None:
+                lines.append(line)
+    if lines:
+        block = "".join(lines)
+        if _CASE_HEADER.search(block):
+            yield _parse_block(block)
+
+
+def case_key(
+    input: Optional[str],
+    actual_output: Optional[str],
+    expected_output: Optional[str],
+    context: Optional[List[str]],
+    retrieval_context: Optional[List[str]],
+) -> str:
+    """Key of a test case by the fields deepeval logs."""
+    raw = json.dumps([input, actual_output, expected_output, context, retrieval_context], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def test_case_key(test_case: LLMTestCase) -> str:
+    return case_key(
+        test_case.input,
+        test_case.actual_output,
+        test_case.expected_output,
+        test_case.context,
+        test_case.retrieval_context,
+    )
+
+
+class VerdictStore:
+    """SQLite store of metric verdicts imported from test_run logs.
+
+    A log is imported once; importing it again only replaces its verdicts if
+    the file changed since. Stored verdicts are reused for a metric only when
+    its judge sees nothing the log does not record (not for tool-call metrics),
+    and only for the same metric name, judge model and strict mode. Changes to
+    a metric's criteria are not visible in the log: import logs of runs with
+    the current metrics only.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def import_log(self, path: str, force: bool = False) -> Dict[str, Any]:
+        """Import the verdicts of a test_run log.
+
+        Returns:
+            {"path", "imported": False if the log was already imported unchanged,
+            "test_cases", "verdicts"}
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.conn.execute("SELECT * FROM logs WHERE path = ?", (path,)).fetchone()
+        if row is not None and not force and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+            return {"path": path, "imported": False, "test_cases": row["test_cases"], "verdicts": row["verdicts"]}
+
+        with self.conn:
+            if row is not None:
+                self.conn.execute("DELETE FROM verdicts WHERE log_id = ?", (row["id"],))
+                self.conn.execute("DELETE FROM logs WHERE id = ?", (row["id"],))
+            log_id = self.conn.execute(
+                "INSERT INTO logs (path, size, mtime, imported_at, test_cases, verdicts) VALUES (?, ?, ?, ?, 0, 0)",
+                (path, stat.st_size, stat.st_mtime, time.time()),
+            ).lastrowid
+
+            test_cases = verdicts = 0
+            for case_index, result in enumerate(parse_test_run_log(path)):
+                key = case_key(
+                    result["input"], result["actual_output"], result["expected_output"],
+                    result["context"], result["retrieval_context"],
+                )
+                context = json.dumps(result["context"], ensure_ascii=False) if result["context"] is not None else None
+                retrieval_context = (
+                    json.dumps(result["retrieval_context"], ensure_ascii=False)
+                    if result["retrieval_context"] is not None else None
+                )
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO verdicts (log_id, case_index, case_key, metric, score, threshold, strict, "
+                    "success, evaluation_model, reason, error, input, actual_output, expected_output, context, "
+                    "retrieval_context) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            log_id, case_index, key, m["name"], m["score"], m["threshold"], int(m["strict"]),
+                            int(m["success"]), m["evaluation_model"], m["reason"], m["error"],
+                            result["input"], result["actual_output"], result["expected_output"],
+                            context, retrieval_context,
+                        )
+                        for m in result["metrics"]
+                    ],
+                )
+                test_cases += 1
+                verdicts += len(result["metrics"])
+
+            self.conn.execute(
+                "UPDATE logs SET test_cases = ?, verdicts = ? WHERE id = ?", (test_cases, verdicts, log_id)
+            )
+        return {"path": path, "imported": True, "test_cases": test_cases, "verdicts": verdicts}
+
+    def reusable(self, metric: BaseMetric) -> bool:
+        params = judged_params(metric)
+        return params is not None and set(params) <= LOGGED_PARAMS
+
+    def lookup(self, metric: BaseMetric, test_case: LLMTestCase) -> Optional[Dict[str, Any]]:
+        """Latest stored verdict of `metric` for the test case, or None.
+
+        Verdicts that errored or have no score are never returned.
+        """
+        if not self.reusable(metric):
+            return None
+        row = self.conn.execute(
+            "SELECT v.* FROM verdicts v JOIN logs l ON l.id = v.log_id "
+            "WHERE v.case_key = ? AND v.metric = ? AND v.evaluation_model IS ? AND v.strict = ? "
+            "AND v.error IS NULL AND v.score IS NOT NULL "
+            "ORDER BY l.mtime DESC, v.case_index DESC LIMIT 1",
+            (
+                test_case_key(test_case),
+                metric.__name__,
+                getattr(metric, "evaluation_model", None),
+                int(bool(getattr(metric, "strict_mode", False))),
+            ),
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def logs(self) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self.conn.execute("SELECT * FROM logs ORDER BY mtime")]
+
+    def metric_summary(self) -> List[Dict[str, Any]]:
+        """Verdicts, pass rate and mean score per metric and judge model over all imported logs."""
+        rows = self.conn.execute(
+            "SELECT metric, evaluation_model, COUNT(*) AS verdicts, SUM(success) AS passed, "
+            "AVG(score) AS mean_score, SUM(error IS NOT NULL) AS errors, COUNT(DISTINCT case_key) AS test_cases "
+            "FROM verdicts GROUP BY metric, evaluation_model ORDER BY metric, evaluation_model"
+        )
+        return [dict(row) for row in rows]
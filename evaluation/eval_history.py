@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Trends and regressions across git commits from the evaluation history.
+
+Every evaluation appends its per-test and per-metric results to a SQLite
+history store (--history-db, disable with --no-history), keyed by
+experiment, git hash and report timestamp. The queries below read only
+that store, not the old analysis.json or report files.
+
+    python eval_history.py runs
+    python eval_history.py trend --last 10 --experiment with_todo
+    python eval_history.py trend --metrics "Answer Relevancy" Faithfulness
+    python eval_history.py regressions --since fda7f00 --experiment with_todo
+
+Evaluations that ran before the history existed can be backfilled from
+their report and test_run log:
+
+    python eval_history.py import ./report/report_with_todo.json ./report/evaluation_with_todo
+
+Trends use the latest run per commit and experiment, and only runs that
+judged every entry of their report unless --include-partial is given.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from eval_framework import HISTORY_DB_PATH, HistoryStore, get_test_cases, load_report_data
+from eval_framework.history import history_tests_from_log, run_scope
+from eval_framework.trace_index import experiment_for
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Trends and regressions across commits from the evaluation history.")
+    parser.add_argument("--db", default=HISTORY_DB_PATH, help="Path of the history store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runs = commands.add_parser("runs", help="Recorded runs, oldest first")
+    runs.add_argument("--experiment", default=None, help="Only runs of this experiment")
+    runs.add_argument("--json", action="store_true", help="Print the runs as JSON")
+
+    trend = commands.add_parser("trend", help="Pass rate per task_type and metric over the last commits")
+    trend.add_argument("--experiment", default=None, help="Only this experiment")
+    trend.add_argument("--last", type=int, default=10, help="Number of most recent commits per experiment")
+    trend.add_argument("--metrics", nargs="+", default=None,
+                       help="Only metrics whose name contains one of these (case-insensitive)")
+    trend.add_argument("--include-partial", action="store_true",
+                       help="Also use runs of a sample or a subset of the entries")
+    trend.add_argument("--json", action="store_true", help="Print the trend as JSON")
+
+    regressions = commands.add_parser("regressions", help="Tests that passed at a commit and fail at a later one")
+    regressions.add_argument("--since", required=True, metavar="GIT_HASH", help="Baseline commit (hash or prefix)")
+    regressions.add_argument("--until", default=None, metavar="GIT_HASH",
+                             help="Candidate commit (default: the newest recorded commit)")
+    regressions.add_argument("--experiment", required=True, help="Experiment to compare")
+    regressions.add_argument("--include-partial", action="store_true",
+                             help="Also use runs of a sample or a subset of the entries")
+    regressions.add_argument("--json", action="store_true", help="Print the regressions as JSON")
+
+    backfill = commands.add_parser("import", help="Record an earlier evaluation from its report and test_run log")
+    backfill.add_argument("report_path")
+    backfill.add_argument("output_dir", help="Output directory of the evaluation, holding its test_run_*.log")
+    backfill.add_argument("--experiment", default=None,
+                          help="Experiment name (default: the configured experiment of the report, else its name)")
+    backfill.add_argument("--log", default=None, help="test_run log to read (default: the newest in output_dir)")
+
+    return parser.parse_args()
+
+
+def short(git_hash: str) -> str:
+    return git_hash[:10]
+
+
+def fmt_rate(value) -> str:
+    return f"{value:.1f}%" if value is not None else "–"
+
+
+def print_runs(rows):
+    if rows:
+        print(f"{'Run':>5} {'Experiment':<22} {'Commit':<11} {'Report Timestamp':<25} {'Scope':<7} "
+              f"{'Tested':>7} {'Passed':>7} {'Pass Rate':>10}")
+        print("─"*100)
+    for row in rows:
+        print(f"{row['id']:>5} {row['experiment']:<22} {short(row['git_hash']):<11} {row['report_timestamp']:<25} "
+              f"{row['scope']:<7} {row['tested']:>7} {row['passed']:>7} {fmt_rate(row['pass_rate']):>10}")
+    if not rows:
+        print("No runs recorded")
+
+
+def print_trend(points, metric_rows):
+    if not points:
+        print("No runs recorded")
+        return
+    for experiment in dict.fromkeys(point["experiment"] for point in points):
+        commits = [point for point in points if point["experiment"] == experiment]
+        task_types = sorted({task_type for point in commits for task_type in point["categories"]})
+        print(f"\n{experiment}")
+        print(f"{'Commit':<11} {'Report Timestamp':<25} {'Tested':>7} {'Overall':>8} "
+              + " ".join(f"{task_type[:14]:>14}" for task_type in task_types))
+        print("─"*(53 + 15 * len(task_types)))
+        for point in commits:
+            rates = [point["categories"].get(task_type, {}).get("pass_rate") for task_type in task_types]
+            print(f"{short(point['git_hash']):<11} {point['report_timestamp']:<25} {point['tested']:>7} "
+                  f"{fmt_rate(point['pass_rate']):>8} " + " ".join(f"{fmt_rate(rate):>14}" for rate in rates))
+
+        rows = [row for row in metric_rows if row["experiment"] == experiment]
+        if rows:
+            print(f"\n  {'Metric':<36} {'Commit':<11} {'Mean Score':>11} {'Pass Rate':>10} {'Evaluated':>10}")
+            for row in rows:
+                mean = f"{row['mean_score']:.3f}" if row["mean_score"] is not None else "–"
+                print(f"  {row['metric'][:36]:<36} {short(row['git_hash']):<11} {mean:>11} "
+                      f"{fmt_rate(row['pass_rate']):>10} {row['evaluated']:>10}")
+
+
+def print_regressions(baseline, candidate, rows):
+    print(f"{baseline['experiment']}: {short(baseline['git_hash'])} ({fmt_rate(baseline['pass_rate'])}) → "
+          f"{short(candidate['git_hash'])} ({fmt_rate(candidate['pass_rate'])})\n")
+    for row in rows:
+        print(f"✗ {row['test_id']} ({row['task_type']})")
+        for metric in row["metrics"]:
+            before = f"{metric['baseline_score']:.2f}" if metric["baseline_score"] is not None else "–"
+            after = f"{metric['candidate_score']:.2f}" if metric["candidate_score"] is not None else "–"
+            print(f"    {metric['metric']}: {before} → {after} (threshold {metric['threshold']})")
+    print(f"\n{len(rows)} test(s) regressed")
+
+
+def backfill(store: HistoryStore, args):
+    logs = [Path(args.log)] if args.log else sorted(Path(args.output_dir).glob("test_run_*.log"))
+    if not logs:
+        sys.exit(f"No test_run_*.log found in {args.output_dir}")
+    report_data = load_report_data(args.report_path)
+    entries = report_data.get("testEntries", [])
+    tests = history_tests_from_log(str(logs[-1]), entries, get_test_cases(report_data))
+    tested = sum(test["success"] is not None for test in tests)
+    scope = run_scope({"untested": len(tests) - tested})
+    experiment = args.experiment or experiment_for(args.report_path)
+    run_id = store.record_run(
+        experiment,
+        report_data.get("gitHash", "N/A"),
+        report_data.get("timestamp", "N/A"),
+        tests,
+        scope=scope,
+        report_path=args.report_path,
+        output_dir=args.output_dir,
+    )
+    print(f"✓ {logs[-1]} recorded as run {run_id} of '{experiment}' ({scope}): {tested} of {len(tests)} tests")
+
+
+def main():
+    """History entry point."""
+    args = parse_args()
+    store = HistoryStore(args.db)
+    try:
+        if args.command == "import":
+            backfill(store, args)
+            return
+
+        start_time = time.perf_counter()
+        if args.command == "runs":
+            rows = store.runs(args.experiment)
+            if args.json:
+                print(json.dumps(rows, indent=2, ensure_ascii=False))
+            else:
+                print_runs(rows)
+            return
+
+        if args.command == "trend":
+            points = store.pass_rate_trend(args.experiment, args.last, args.include_partial)
+            metric_rows = store.metric_trend(args.experiment, args.last, args.metrics, args.include_partial)
+            for name in args.metrics or []:
+                if not any(name.lower() in row["metric"].lower() for row in metric_rows):
+                    print(f"⚠ Warning: no recorded metric matches '{name}'", file=sys.stderr)
+            if args.json:
+                print(json.dumps({"pass_rate": points, "metrics": metric_rows}, indent=2, ensure_ascii=False))
+                return
+            print_trend(points, metric_rows)
+            print(f"\n{len(points)} run(s) in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+            return
+
+        baseline = store.resolve_run(args.experiment, args.since, args.include_partial)
+        candidate = store.resolve_run(args.experiment, args.until, args.include_partial)
+        if baseline is None or candidate is None:
+            missing = args.since if baseline is None else (args.until or "any commit")
+            sys.exit(f"No recorded run of '{args.experiment}' at {missing}")
+        rows = store.regressions(baseline["id"], candidate["id"])
+        if args.json:
+            print(json.dumps({"baseline": baseline, "candidate": candidate, "regressions": rows},
+                             indent=2, ensure_ascii=False))
+            return
+        print_regressions(baseline, candidate, rows)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
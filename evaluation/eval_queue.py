@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Evaluation job queue.
+
+Several people can submit reports at once; their evaluations share one pool of
+judge workers instead of competing for the judge quota. Jobs are judged by
+priority (calibration and release reports first), test case by test case.
+
+    python eval_queue.py submit --calibration
+    python eval_queue.py submit ./report/report_with_todo.json --priority release
+    python eval_queue.py work --workers 20
+    python eval_queue.py status
+
+`work --stub-judge` uses the local deterministic metrics (with --stub-latency
+seconds of simulated judge time) instead of the LLM judge.
+"""
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from eval_framework import (
+    QUEUE_DB_PATH,
+    QUEUE_PRIORITIES,
+    QUEUE_WORKERS,
+    CALIBRATION_OUTPUT_DIR,
+    JOB_REPORT,
+    JOB_CALIBRATION,
+    JobQueue,
+    QueueWorkerPool,
+    ResultAggregator,
+    get_test_cases,
+    get_calibration_test_cases,
+    load_report_data,
+    get_local_metrics,
+    run_summary,
+    output_test_results,
+    is_unexpected_calibration_result,
+    print_metadata,
+    print_run_stats,
+    print_queue_status,
+    add_judge_arguments,
+    setup_evaluation,
+    calibration_metadata_for,
+    summarize_calibration,
+    summarize_report,
+    task_types_of,
+    output_dir_for,
+)
+
+
+def parse_priority(value: str) -> int:
+    if value in QUEUE_PRIORITIES:
+        return QUEUE_PRIORITIES[value]
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"expected an integer or one of {', '.join(QUEUE_PRIORITIES)}, got {value!r}"
+        )
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Prioritized evaluation job queue.")
+    parser.add_argument("--db", default=QUEUE_DB_PATH, help="Path of the queue database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Enqueue a report (or the calibration controls)")
+    submit.add_argument("report_path", nargs="?")
+    submit.add_argument("output_dir", nargs="?",
+                        help="Defaults to evaluation_<name>/ next to report_<name>.json")
+    submit.add_argument("--calibration", action="store_true",
+                        help="Enqueue the calibration controls instead of a report")
+    submit.add_argument("--priority", type=parse_priority, default=None,
+                        help=f"Integer or one of {', '.join(QUEUE_PRIORITIES)} (higher runs first)")
+
+    work = commands.add_parser("work", help="Judge queued test cases with a pool of async workers")
+    work.add_argument("--workers", type=int, default=QUEUE_WORKERS,
+                      help="Test cases judged concurrently")
+    work.add_argument("--poll-interval", type=float, default=2.0,
+                      help="Seconds an idle worker waits before checking the queue again")
+    work.add_argument("--drain", action="store_true",
+                      help="Exit once the queue is empty instead of waiting for new jobs")
+    work.add_argument("--stub-judge", action="store_true",
+                      help="Judge with the local deterministic metrics instead of the LLM judge")
+    work.add_argument("--stub-latency", type=float, default=0.0,
+                      help="Simulated judge latency in seconds per metric with --stub-judge")
+    add_judge_arguments(work)
+    work.set_defaults(time_budget=None, sample=False)
+
+    status = commands.add_parser("status", help="Show queue depth, throughput and ETA")
+    status.add_argument("--json", action="store_true", help="Print the status as JSON")
+
+    args = parser.parse_args()
+    if args.command == "submit" and args.calibration == bool(args.report_path):
+        parser.error("submit needs either a report path or --calibration")
+    return args
+
+
+def submit(queue: JobQueue, args):
+    if args.calibration:
+        kind, report_path = JOB_CALIBRATION, None
+        output_dir = CALIBRATION_OUTPUT_DIR
+        total_cases = len(get_calibration_test_cases())
+    else:
+        kind, report_path = JOB_REPORT, args.report_path
+        output_dir = args.output_dir or str(output_dir_for(Path(report_path)))
+        total_cases = len(get_test_cases(load_report_data(report_path)))
+
+    priority = args.priority if args.priority is not None else QUEUE_PRIORITIES[
+        "calibration" if args.calibration else "normal"
+    ]
+    job_id = queue.submit(kind, report_path, output_dir, priority, total_cases)
+    print(f"✓ Job {job_id} queued: {report_path or 'calibration controls'} "
+          f"({total_cases} test cases, priority {priority}) → {output_dir}")
+
+
+def work(queue: JobQueue, args):
+    if args.stub_judge:
+        # The local metrics have no judge to ask for reasons
+        args.score_only = False
+        metrics = get_local_metrics(latency=args.stub_latency)
+    else:
+        metrics = None
+    setup = setup_evaluation(args, pooled=True, metrics=metrics)
+    calibration_data = get_calibration_test_cases()
+    calibration_metadata = calibration_metadata_for(calibration_data)
+
+    def load_test_cases(job):
+        if job["kind"] == JOB_CALIBRATION:
+            return [tc for name, is_positive, tc in calibration_data]
+        return get_test_cases(load_report_data(job["report_path"]))
+
+    async def evaluate(job, test_case):
+        explain = None
+        if job["kind"] == JOB_CALIBRATION:
+            explain = lambda tr: is_unexpected_calibration_result(tr, calibration_metadata)
+        return await setup.runner.a_evaluate_test_case(test_case, setup.metrics, explain)
+
+    def finalize(job, result):
+        print(f"\n▶ Job {job['id']} done: {job['report_path'] or 'calibration controls'} → {job['output_dir']}")
+        output_test_results(result.test_results, job["output_dir"])
+        if job["kind"] == JOB_CALIBRATION:
+            return summarize_calibration(setup, calibration_data, result)
+
+        report_data = load_report_data(job["report_path"])
+        print_metadata(report_data.get("gitHash", "N/A"), report_data.get("timestamp", "N/A"))
+        # The runner's aggregates only cover its own runs; the job's test cases were judged one by one
+        aggregates = ResultAggregator(task_types_of(report_data))
+        for test_result in result.test_results:
+            aggregates.add(test_result)
+        output_path = summarize_report(
+            args,
+            setup,
+            report_data,
+            get_test_cases(report_data),
+            result,
+            job["output_dir"],
+            queue.latest_summary(JOB_CALIBRATION),
+            report_path=job["report_path"],
+            aggregates=aggregates,
+        )
+        return {"analysis": output_path, "tested": len(result.test_results)}
+
+    pool = QueueWorkerPool(
+        queue,
+        evaluate,
+        load_test_cases,
+        finalize,
+        workers=args.workers,
+        poll_interval=args.poll_interval,
+        drain=args.drain,
+    )
+    print(f"Working on {queue.path} with {args.workers} workers"
+          f"{' (stub judge)' if args.stub_judge else ''}; Ctrl-C to stop\n")
+    try:
+        asyncio.run(pool.run())
+    except KeyboardInterrupt:
+        print("\nStopped; unfinished test cases were returned to the queue.")
+
+    print(f"\n✓ {pool.evaluated} test cases evaluated, {pool.failed} failed attempts")
+    print_run_stats(run_summary(setup.run_stats, setup.hedger))
+
+
+def main():
+    """Queue entry point."""
+    args = parse_args()
+    queue = JobQueue(args.db)
+    try:
+        if args.command == "submit":
+            submit(queue, args)
+        elif args.command == "work":
+            work(queue, args)
+        elif args.json:
+            print(json.dumps(queue.status(), indent=2))
+        else:
+            print_queue_status(queue.status())
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
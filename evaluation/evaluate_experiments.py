@@ -3,74 +3,59 @@
 Main evaluation script for comparing different agent configurations.
 Evaluates multiple experiments (e.g., with/without TODO list) and outputs comparative results.
 """
+import argparse
 import os
-from deepeval import evaluate
-from deepeval.evaluate import DisplayConfig
+import sys
 
 from eval_framework import (
     EXPERIMENTS,
     RUN_CALIBRATION,
-    CALIBRATION_OUTPUT_DIR,
+    COMPARISON_OUTPUT_PATH,
+    JUDGE_ENDPOINTS,
+    BATCH_DIR,
     get_test_cases,
     get_calibration_test_cases,
     load_report_data,
+    build_sample_report,
+    analyze_agent_performance,
+    build_failure_taxonomy,
+    build_comparison,
+    estimate_evaluation,
     get_metrics,
+    load_judge_endpoints,
+    BatchJudge,
+    BatchClient,
+    collect_batch_responses,
+    record_evaluation,
+    run_summary,
     print_header,
-    print_metadata,
-    print_calibration_header,
-    print_calibration_results,
     print_metrics_summary,
     print_overall_stats,
+    coverage_report,
     print_task_type_analysis,
+    print_sample_estimates,
+    print_agent_performance,
+    print_failure_clusters,
+    print_run_stats,
+    print_cascade_summary,
+    print_judge_pool_stats,
+    print_batch_summary,
+    print_estimate,
+    print_profile,
+    print_comparison_matrix,
+    save_comparison_report,
     save_json_report,
+    add_evaluation_arguments,
+    setup_evaluation,
+    run_calibration,
+    evaluate_entries,
+    select_entries,
 )
+from eval_framework.config import BATCH_BASE_URL, BATCH_POLL_SECONDS
+from eval_framework.history import run_scope
 
 
-def run_calibration(metrics):
-    """Run calibration phase to validate evaluation framework."""
-    print_calibration_header()
-
-    # Get calibration test cases with metadata (name, is_positive, test_case)
-    calibration_data = get_calibration_test_cases()
-
-    # Extract test cases for evaluation
-    test_cases = [tc for name, is_positive, tc in calibration_data]
-
-    # Create metadata map for reporting using (input, actual_output) as key
-    # This uniquely identifies each calibration test case
-    calibration_metadata = {
-        (tc.input, tc.actual_output): (name, is_positive)
-        for name, is_positive, tc in calibration_data
-    }
-
-    calibration_result = evaluate(
-        display_config=DisplayConfig(file_output_dir=CALIBRATION_OUTPUT_DIR),
-        test_cases=test_cases,
-        metrics=metrics
-    )
-
-    # Calculate metric thresholds
-    metric_thresholds = {}
-    for metric in metrics:
-        metric_name = getattr(metric, 'name', metric.__class__.__name__)
-        metric_thresholds[metric_name] = metric.threshold
-
-    positive_controls_count = sum(1 for name, is_pos, tc in calibration_data if is_pos)
-    negative_controls_count = sum(1 for name, is_pos, tc in calibration_data if not is_pos)
-
-    calibration_summary, calibration_valid = print_calibration_results(
-        calibration_result,
-        positive_controls_count,
-        negative_controls_count,
-        metrics,
-        metric_thresholds,
-        calibration_metadata
-    )
-
-    return calibration_summary, calibration_valid, metric_thresholds
-
-
-def run_experiment_evaluation(config, metrics, metric_thresholds):
+def run_experiment_evaluation(config, setup, args):
     """Run evaluation for a single experiment configuration."""
     print_header(f"EVALUATING: {config.name}")
     print(f"Description: {config.description}")
@@ -82,57 +67,115 @@ def run_experiment_evaluation(config, metrics, metric_thresholds):
         print(f"  Skipping evaluation for '{config.name}'\n")
         return None
 
-    # Load report data
-    report_data = load_report_data(config.report_path)
-    git_hash = report_data.get("gitHash", "N/A")
-    timestamp = report_data.get("timestamp", "N/A")
-
-    print_metadata(git_hash, timestamp)
-
-    # Get test cases and run evaluation
-    tcs = get_test_cases(report_data)
-    result = evaluate(
-        display_config=DisplayConfig(file_output_dir=config.output_dir),
-        test_cases=tcs,
-        metrics=metrics
-    )
-
-    # Print results
-    print_metrics_summary(result, metrics, metric_thresholds)
-    print_overall_stats(result, tcs)
-
-    entries = report_data.get("testEntries", [])
-    categories_report, failure_analysis = print_task_type_analysis(
-        result, entries, metrics, metric_thresholds
-    )
-
-    # Calculate overall stats
-    total_tests = len(tcs)
-    passed_tests = sum(1 for tr in result.test_results if tr.success)
-    overall_pass_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
-
-    return {
-        "config": config,
-        "total_tests": total_tests,
-        "passed_tests": passed_tests,
-        "overall_pass_rate": overall_pass_rate,
-        "categories_report": categories_report,
-        "failure_analysis": failure_analysis,
-    }
+    report_data, tcs, result, population_by_type = evaluate_entries(args, setup, config.report_path, config.output_dir)
+    runner = setup.runner
+
+    with setup.profiler.stage("analysis"):
+        # Print results
+        print_metrics_summary(runner.aggregates)
+        print_overall_stats(runner.aggregates, tcs)
+
+        entries = report_data.get("testEntries", [])
+        categories_report, failure_analysis = print_task_type_analysis(runner.aggregates, result, entries)
+
+        sample_report = None
+        if population_by_type is not None:
+            sample_report = build_sample_report(
+                categories_report, population_by_type, args.margin_of_error, args.confidence
+            )
+            print_sample_estimates(sample_report)
+
+        # Recurring agent errors and judge reasons, grouped into near-duplicate clusters
+        failure_clusters = build_failure_taxonomy(result, entries)
+        print_failure_clusters(failure_clusters)
+
+        # Where the agent spends time, not just whether it passed
+        agent_performance = analyze_agent_performance(entries, result)
+        print_agent_performance(agent_performance)
+
+        # Calculate overall stats (pass rate over the test cases that were evaluated)
+        total_tests = len(tcs)
+        passed_tests = runner.aggregates.overall.passed
+        coverage = coverage_report(result, tcs)
+        overall_pass_rate = (passed_tests / coverage["tested"] * 100) if coverage["tested"] > 0 else 0
+
+        return {
+            "config": config,
+            "total_tests": total_tests,
+            "passed_tests": passed_tests,
+            "overall_pass_rate": overall_pass_rate,
+            "categories_report": categories_report,
+            "failure_analysis": failure_analysis,
+            "sample_report": sample_report,
+            "coverage": coverage,
+            "agent_performance": agent_performance,
+            "metric_stats": runner.aggregates.summary(),
+            "failure_clusters": failure_clusters,
+            "entries": entries,
+            "report_data": report_data,
+            "result": result,
+        }
+
+
+def judged_test_case_sets(args):
+    """(name, test cases) of calibration, if enabled, and every experiment, as the evaluation will judge them."""
+    test_case_sets = []
+    if RUN_CALIBRATION:
+        test_case_sets.append(("calibration", [tc for name, is_positive, tc in get_calibration_test_cases()]))
+    for config in EXPERIMENTS:
+        if not os.path.exists(config.report_path):
+            print(f"⚠ Warning: Report file not found: {config.report_path} (skipped)")
+            continue
+        report_data, _ = select_entries(args, load_report_data(config.report_path))
+        test_case_sets.append((config.name, get_test_cases(report_data, workers=args.build_workers)))
+    return test_case_sets
+
+
+def dry_run(args):
+    """Print the estimated judge tokens, cost and wall-clock time of evaluating calibration and every experiment."""
+    test_case_sets = judged_test_case_sets(args)
+    judge_specs = load_judge_endpoints(args.judge_endpoints) if args.judge_endpoints else JUDGE_ENDPOINTS
+    print_estimate(estimate_evaluation(
+        test_case_sets,
+        score_only=args.score_only,
+        fail_fast=args.fail_fast,
+        judge_specs=judge_specs,
+        claim_faithfulness=args.claim_faithfulness,
+    ))
+    if args.cheap_judge:
+        print("Note: the estimate assumes every test case is judged by the strong judge (no cascade savings).\n")
+
+
+def run_batch(args):
+    """Fetch every judge answer of calibration and all experiments through the batch API.
+
+    Returns:
+        Tuple of (BatchJudge answering the evaluation's judge calls, batch summary)
+    """
+    print_header("BATCH JUDGING")
+    judge = BatchJudge(model=args.batch_model)
+    client = BatchClient(args.batch_base_url, poll_seconds=args.batch_poll_seconds)
+    metrics = get_metrics(judge=judge, claim_faithfulness=args.claim_faithfulness)
+    batch_summary = collect_batch_responses(judge, client, metrics, judged_test_case_sets(args), args.batch_dir)
+    print_batch_summary(batch_summary)
+    if batch_summary["unanswered_measurements"]:
+        sys.exit(f"Batch judging incomplete; run again with --batch-dir {args.batch_dir} to continue")
+    return judge, batch_summary
 
 
 def print_comparative_summary(experiment_results):
     """Print comparative summary across all experiments."""
     print_header("COMPARATIVE SUMMARY")
 
-    print(f"\n{'Experiment':<40} {'Total Tests':>15} {'Pass Rate':>15}")
+    print(f"\n{'Experiment':<40} {'Total Tests':>15} {'Pass Rate':>15} {'Coverage':>15}")
     print("─" * 100)
 
     for result in experiment_results:
         if result is None:
             continue
         config = result["config"]
-        print(f"{config.name:<40} {result['total_tests']:>15} {result['overall_pass_rate']:>14.1f}%")
+        print(f"{config.name:<40} {result['total_tests']:>15} {result['overall_pass_rate']:>14.1f}% "
+              f"{result['coverage']['coverage_percent']:>14.1f}%")
 
     print("─" * 100)
 
@@ -145,52 +188,119 @@ def print_comparative_summary(experiment_results):
     print("\n" + "═"*100 + "\n")
 
 
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Evaluate and compare agent experiment reports.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Estimate judge tokens, cost and wall-clock time without calling the judge")
+    parser.add_argument("--batch", action="store_true",
+                        help="Submit all judge prompts through the batch API and evaluate from its results "
+                             "(higher throughput and lower cost, no interactive latency)")
+    parser.add_argument("--batch-dir", default=BATCH_DIR, metavar="PATH",
+                        help="Where batch files and answers are kept; an interrupted batch run resumes from it")
+    parser.add_argument("--batch-base-url", default=BATCH_BASE_URL, metavar="URL",
+                        help="OpenAI-compatible batch API (default: OpenAI; stub_judge_server.py serves one locally)")
+    parser.add_argument("--batch-model", default=None,
+                        help="Judge model of the batch requests (default: deepeval's configured model)")
+    parser.add_argument("--batch-poll-seconds", type=float, default=BATCH_POLL_SECONDS,
+                        help="Seconds between batch status checks")
+    add_evaluation_arguments(parser)
+    args = parser.parse_args()
+    if args.batch and (args.cheap_judge or args.score_only or args.judge_endpoints):
+        # The later calls of these modes depend on results the batch has not judged yet
+        parser.error("--batch cannot be combined with --cheap-judge, --score-only or --judge-endpoints")
+    return args
+
+
 def main():
     """Main evaluation entry point."""
-    print_header("AGENT EVALUATION - COMPARATIVE ANALYSIS")
-
-    # Get metrics
-    metrics = get_metrics()
+    args = parse_args()
 
-    # Calculate metric thresholds
-    metric_thresholds = {}
-    for metric in metrics:
-        metric_name = getattr(metric, 'name', metric.__class__.__name__)
-        metric_thresholds[metric_name] = metric.threshold
+    print_header("AGENT EVALUATION - COMPARATIVE ANALYSIS")
 
-    # Run calibration if enabled
-    calibration_summary = None
-    calibration_valid = True
+    if args.dry_run:
+        dry_run(args)
+        return
 
-    if RUN_CALIBRATION:
-        calibration_summary, calibration_valid, metric_thresholds = run_calibration(metrics)
+    batch_judge, batch_summary = run_batch(args) if args.batch else (None, None)
+    setup = setup_evaluation(args, judge=batch_judge)
+    run_stats, hedger, cascade = setup.run_stats, setup.hedger, setup.cascade
+    judge_pool, single_flight, profiler = setup.judge_pool, setup.single_flight, setup.profiler
 
-        if not calibration_valid:
-            print("⚠ WARNING: Calibration failed. Results may not be reliable.")
-            print("  Consider reviewing metric definitions and thresholds.\n")
+    calibration_summary = run_calibration(setup)
 
     # Run evaluations for each experiment
     experiment_results = []
     for config in EXPERIMENTS:
-        result = run_experiment_evaluation(config, metrics, metric_thresholds)
+        result = run_experiment_evaluation(config, setup, args)
         experiment_results.append(result)
 
         # Save individual report
         if result is not None:
+            extra_sections = {
+                "run_stats": run_summary(run_stats, hedger),
+                "coverage": result["coverage"],
+                "agent_performance": result["agent_performance"],
+                "metric_stats": result["metric_stats"],
+                "failure_clusters": result["failure_clusters"],
+            }
+            if args.cheap_judge:
+                extra_sections["cascade"] = cascade.summary()
+            if judge_pool:
+                extra_sections["judge_pool"] = judge_pool.summary()
+            if batch_summary:
+                extra_sections["batch"] = batch_summary
+            extra_sections["metric_latency"] = single_flight.latency_summary()
+            if result["sample_report"]:
+                extra_sections["sampling"] = result["sample_report"]
+
             output_path = f"{config.output_dir}/analysis.json"
-            os.makedirs(config.output_dir, exist_ok=True)
-            save_json_report(
-                output_path,
-                result["total_tests"],
-                result["overall_pass_rate"],
-                calibration_summary or {},
-                result["categories_report"],
-                result["failure_analysis"],
-            )
+            with profiler.stage("save"):
+                os.makedirs(config.output_dir, exist_ok=True)
+                save_json_report(
+                    output_path,
+                    result["total_tests"],
+                    result["overall_pass_rate"],
+                    calibration_summary or {},
+                    result["categories_report"],
+                    result["failure_analysis"],
+                    extra_sections=extra_sections,
+                )
+                if not args.no_history:
+                    scope = run_scope(result["coverage"], result["sample_report"] is not None, args.ids is not None)
+                    run_id = record_evaluation(
+                        args.history_db,
+                        config.name,
+                        result["report_data"],
+                        result["result"],
+                        scope,
+                        config.report_path,
+                        config.output_dir,
+                    )
+                    print(f"✓ Run {run_id} ({scope}) recorded in history: {args.history_db}\n")
+            if profiler.enabled:
+                # Stages of this run so far
+                profiler.write_into(output_path)
 
     # Print comparative summary
     print_comparative_summary(experiment_results)
 
+    # Paired per-test comparison across all evaluated experiments
+    valid_results = [r for r in experiment_results if r is not None]
+    if len(valid_results) >= 2:
+        comparison = build_comparison([(r["config"].name, r["entries"], r["result"]) for r in valid_results])
+        print_comparison_matrix(comparison)
+        save_comparison_report(COMPARISON_OUTPUT_PATH, comparison)
+
+    print_run_stats(run_summary(run_stats, hedger))
+    if args.cheap_judge:
+        print_cascade_summary(cascade.summary())
+    if judge_pool:
+        print_judge_pool_stats(judge_pool.summary())
+    if profiler.enabled:
+        profiler.dump()
+        print_profile(profiler.summary())
+
     print("✓ All evaluations complete!")
 
 
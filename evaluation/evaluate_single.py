@@ -2,122 +2,71 @@
 """
 Single evaluation script (legacy compatibility).
 Evaluates a single report file with calibration.
+The setup, calibration and per-report steps live in eval_framework/cli.py.
 """
-import sys
-from deepeval import evaluate
-from deepeval.evaluate import DisplayConfig
+import argparse
+from typing import List
 
 from eval_framework import (
     RUN_CALIBRATION,
-    CALIBRATION_OUTPUT_DIR,
+    JUDGE_ENDPOINTS,
     get_test_cases,
     get_calibration_test_cases,
     load_report_data,
-    get_metrics,
-    print_metadata,
-    print_calibration_header,
-    print_calibration_results,
-    print_metrics_summary,
-    print_overall_stats,
-    print_task_type_analysis,
-    save_json_report,
+    estimate_evaluation,
+    load_judge_endpoints,
+    print_estimate,
+    add_evaluation_arguments,
+    setup_evaluation,
+    run_calibration,
+    evaluate_report,
+    select_entries,
 )
 
 
-def main():
-    """Main evaluation entry point for single report."""
-    # Get report path from command line or use default
-    report_path = sys.argv[1] if len(sys.argv) > 1 else "./report/report.json"
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "./report/evaluation_report"
-
-    # Get metrics
-    metrics = get_metrics()
-
-    # Calculate metric thresholds
-    metric_thresholds = {}
-    for metric in metrics:
-        metric_name = getattr(metric, 'name', metric.__class__.__name__)
-        metric_thresholds[metric_name] = metric.threshold
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Evaluate a single agent report.")
+    parser.add_argument("report_path", nargs="?", default="./report/report.json")
+    parser.add_argument("output_dir", nargs="?", default="./report/evaluation_report")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Estimate judge tokens, cost and wall-clock time without calling the judge")
+    add_evaluation_arguments(parser)
+    return parser.parse_args()
 
-    # Run calibration if enabled
-    calibration_summary = None
 
+def dry_run(args, report_paths: List[str]):
+    """Print the estimated judge tokens, cost and wall-clock time of evaluating the reports."""
+    test_case_sets = []
     if RUN_CALIBRATION:
-        print_calibration_header()
-
-        # Get calibration test cases with metadata (name, is_positive, test_case)
-        calibration_data = get_calibration_test_cases()
-
-        # Extract test cases for evaluation
-        test_cases = [tc for name, is_positive, tc in calibration_data]
-
-        # Create metadata map for reporting using (input, actual_output) as key
-        # (handles async execution order and duplicate inputs)
-        calibration_metadata = {
-            (tc.input, tc.actual_output): (name, is_positive)
-            for name, is_positive, tc in calibration_data
-        }
-
-        calibration_result = evaluate(
-            display_config=DisplayConfig(file_output_dir=CALIBRATION_OUTPUT_DIR),
-            test_cases=test_cases,
-            metrics=metrics
-        )
+        test_case_sets.append(("calibration", [tc for name, is_positive, tc in get_calibration_test_cases()]))
+    for report_path in report_paths:
+        report_data, _ = select_entries(args, load_report_data(report_path))
+        test_case_sets.append((report_path, get_test_cases(report_data, workers=args.build_workers)))
+
+    judge_specs = load_judge_endpoints(args.judge_endpoints) if args.judge_endpoints else JUDGE_ENDPOINTS
+    print_estimate(estimate_evaluation(
+        test_case_sets,
+        score_only=args.score_only,
+        fail_fast=args.fail_fast,
+        judge_specs=judge_specs,
+        claim_faithfulness=args.claim_faithfulness,
+    ))
+    if args.cheap_judge:
+        print("Note: the estimate assumes every test case is judged by the strong judge (no cascade savings).\n")
 
-        positive_controls_count = sum(1 for name, is_pos, tc in calibration_data if is_pos)
-        negative_controls_count = sum(1 for name, is_pos, tc in calibration_data if not is_pos)
 
-        calibration_summary, calibration_valid = print_calibration_results(
-            calibration_result,
-            positive_controls_count,
-            negative_controls_count,
-            metrics,
-            metric_thresholds,
-            calibration_metadata
-        )
-
-        if not calibration_valid:
-            print("⚠ WARNING: Calibration failed. Results may not be reliable.")
-
-    # Load report data
-    report_data = load_report_data(report_path)
-    git_hash = report_data.get("gitHash", "N/A")
-    timestamp = report_data.get("timestamp", "N/A")
-
-    print_metadata(git_hash, timestamp)
-
-    # Get test cases and run evaluation
-    tcs = get_test_cases(report_data)
-    result = evaluate(
-        display_config=DisplayConfig(file_output_dir=output_dir),
-        test_cases=tcs,
-        metrics=metrics
-    )
-
-    # Print results
-    print_metrics_summary(result, metrics, metric_thresholds)
-    print_overall_stats(result, tcs)
-
-    entries = report_data.get("testEntries", [])
-    categories_report, failure_analysis = print_task_type_analysis(
-        result, entries, metrics, metric_thresholds
-    )
+def main():
+    """Main evaluation entry point for single report."""
+    args = parse_args()
 
-    # Calculate overall stats
-    total_tests = len(tcs)
-    passed_tests = sum(1 for tr in result.test_results if tr.success)
-    overall_pass_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
+    if args.dry_run:
+        dry_run(args, [args.report_path])
+        return
 
-    # Save report
-    output_path = f"{output_dir}/analysis.json"
-    save_json_report(
-        output_path,
-        total_tests,
-        overall_pass_rate,
-        calibration_summary or {},
-        categories_report,
-        failure_analysis,
-    )
+    setup = setup_evaluation(args)
+    calibration_summary = run_calibration(setup)
+    evaluate_report(args, setup, args.report_path, args.output_dir, calibration_summary)
 
     print("✓ Evaluation complete!")
 
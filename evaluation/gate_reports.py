@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+CI gate on agent latency and cost.
+
+Compares the completion_time and token_cost of a candidate report against a
+baseline report, entry by entry (paired by id): median and p95 shift per
+task_type with paired bootstrap confidence intervals. Exits with status 1
+when a shift exceeds its limit (GATE_LIMITS) and its interval lies above
+zero, and writes the verdict as JSON either way. No judge is called.
+
+    python gate_reports.py ./report/baseline.json ./report/report_with_todo.json
+    python gate_reports.py base.json candidate.json --limit completion_time.p95=0.4 --verdict ./ci/gate.json
+"""
+import argparse
+import copy
+import json
+import sys
+
+from eval_framework import (
+    GATE_VERDICT_PATH,
+    build_gate_verdict,
+    print_gate_verdict,
+    save_gate_verdict,
+)
+from eval_framework.config import GATE_LIMITS, GATE_CONFIDENCE, GATE_BOOTSTRAP_SAMPLES, GATE_MIN_PAIRS, GATE_SEED
+from eval_framework.regression_gate import GATE_FEATURES, GATE_STATS
+
+
+def parse_limit(value: str):
+    """FEATURE.STAT=VALUE, e.g. completion_time.p95=0.25."""
+    try:
+        key, limit = value.split("=", 1)
+        feature, stat = key.split(".", 1)
+        limit = float(limit)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected FEATURE.STAT=VALUE, got '{value}'")
+    if feature not in GATE_FEATURES or stat not in GATE_STATS:
+        raise argparse.ArgumentTypeError(
+            f"unknown limit '{key}' (features: {', '.join(GATE_FEATURES)}; stats: {', '.join(GATE_STATS)})"
+        )
+    return feature, stat, limit
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Fail when a candidate report is slower or more expensive than its baseline.")
+    parser.add_argument("baseline_path")
+    parser.add_argument("candidate_path")
+    parser.add_argument("--verdict", default=GATE_VERDICT_PATH, metavar="PATH", help="Where to write the verdict JSON")
+    parser.add_argument("--limit", type=parse_limit, action="append", default=[], metavar="FEATURE.STAT=VALUE",
+                        help="Override a limit from GATE_LIMITS (largest allowed relative increase, 0.25 = +25%%)")
+    parser.add_argument("--confidence", type=float, default=GATE_CONFIDENCE, help="Confidence level of the intervals")
+    parser.add_argument("--samples", type=int, default=GATE_BOOTSTRAP_SAMPLES, help="Bootstrap resamples")
+    parser.add_argument("--min-pairs", type=int, default=GATE_MIN_PAIRS,
+                        help="Task types with fewer paired entries are reported but not gated")
+    parser.add_argument("--seed", type=int, default=GATE_SEED, help="Random seed of the bootstrap")
+    parser.add_argument("--json", action="store_true", help="Print the verdict as JSON instead of a table")
+    return parser.parse_args()
+
+
+def main():
+    """Gate entry point."""
+    args = parse_args()
+    limits = copy.deepcopy(GATE_LIMITS)
+    for feature, stat, limit in args.limit:
+        limits.setdefault(feature, {})[stat] = limit
+
+    verdict = build_gate_verdict(
+        args.baseline_path,
+        args.candidate_path,
+        limits,
+        confidence=args.confidence,
+        samples=args.samples,
+        min_pairs=args.min_pairs,
+        seed=args.seed,
+    )
+    if args.json:
+        print(json.dumps(verdict, indent=2, ensure_ascii=False))
+    else:
+        print_gate_verdict(verdict)
+    save_gate_verdict(args.verdict, verdict)
+    sys.exit(0 if verdict["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
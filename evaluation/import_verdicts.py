@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Import judge verdicts from deepeval test_run logs.
+
+Every metric result of earlier runs (score, threshold, verdict, judge model
+and reason) is loaded into the verdict store, where it can be queried or
+reused by an evaluation with --verdict-store instead of calling the judge.
+
+    python import_verdicts.py ./report/evaluation_with_todo ./report/calibration_report
+    python import_verdicts.py ./report --summary
+
+Directories are searched recursively for test_run_*.log files. Logs that
+were imported before and have not changed since are skipped.
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import List
+
+from eval_framework import (
+    VERDICT_STORE_PATH,
+    VerdictStore,
+    print_verdict_store_summary,
+)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Import judge verdicts from deepeval test_run logs.")
+    parser.add_argument("paths", nargs="*", default=["./report"],
+                        help="test_run_*.log files or directories containing them")
+    parser.add_argument("--db", default=VERDICT_STORE_PATH, help="Path of the verdict store")
+    parser.add_argument("--force", action="store_true", help="Import logs again even if they did not change")
+    parser.add_argument("--summary", action="store_true",
+                        help="Print the imported logs and verdicts per metric afterwards")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    return parser.parse_args()
+
+
+def find_logs(paths: List[str]) -> List[Path]:
+    logs = []
+    for path in map(Path, paths):
+        logs.extend(sorted(path.rglob("test_run_*.log")) if path.is_dir() else [path])
+    return logs
+
+
+def main():
+    """Importer entry point."""
+    args = parse_args()
+    store = VerdictStore(args.db)
+    try:
+        logs = find_logs(args.paths)
+        if not logs:
+            print(f"No test_run_*.log files found in {', '.join(args.paths)}")
+        for log in logs:
+            result = store.import_log(str(log), force=args.force)
+            if result["imported"]:
+                print(f"✓ {log}: {result['test_cases']} test cases, {result['verdicts']} verdicts")
+            else:
+                print(f"· {log}: unchanged, already imported")
+
+        if args.json:
+            print(json.dumps({"logs": store.logs(), "metrics": store.metric_summary()}, indent=2, ensure_ascii=False))
+        elif args.summary:
+            print_verdict_store_summary(store.logs(), store.metric_summary())
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Index agent traces and query them.
+
+Reports are loaded into a SQLite index (iterations, function calls with
+their depth in the internalRouterProcess tree, results, FTS5 over thoughts,
+TODO lists, arguments and results), keyed by test id, experiment and
+task_type. Queries then take milliseconds instead of grepping the JSON.
+
+    python query_traces.py index ./report/report_with_todo.json ./report/report_without_todo.json
+    python query_traces.py find error:moodle* called:calendar-agent
+    python query_traces.py find "result:get_course_details=timeout*" --experiment with_todo
+    python query_traces.py search '"due date" OR deadline' --kind thought
+    python query_traces.py calls case_101 --experiment with_todo
+
+`find` matches tests whose trace contains the given steps in this order
+(see TraceStep for the step syntax). With --ids it prints only the matching
+test ids, ready for a subset evaluation:
+
+    python query_traces.py find error:moodle* called:calendar-agent --experiment with_todo --ids \\
+        | python evaluate_single.py ./report/report_with_todo.json ./report/subset --ids -
+"""
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+
+from eval_framework import TRACE_INDEX_PATH, TraceIndex, TraceStep
+from eval_framework.trace_index import TEXT_KINDS
+
+
+def parse_step(value: str) -> TraceStep:
+    try:
+        return TraceStep.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--experiment", default=None, help="Only tests of this experiment")
+    parser.add_argument("--task-type", default=None, help="Only tests of this task_type")
+    parser.add_argument("--json", action="store_true", help="Print the matches as JSON")
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Index agent traces and query them.")
+    parser.add_argument("--db", default=TRACE_INDEX_PATH, help="Path of the trace index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index = commands.add_parser("index", help="Index the traces of one or more reports")
+    index.add_argument("report_paths", nargs="+")
+    index.add_argument("--experiment", default=None,
+                       help="Experiment name (default: the configured experiment of the report, else its name)")
+    index.add_argument("--force", action="store_true", help="Index reports again even if they did not change")
+
+    find = commands.add_parser("find", help="Tests whose trace contains the given steps in this order")
+    find.add_argument("steps", nargs="+", type=parse_step, metavar="STEP",
+                      help="called:NAME, result:NAME=QUERY, error:NAME, thought:QUERY, todo:QUERY or text:QUERY")
+    find.add_argument("--ids", action="store_true", help="Print only the matching test ids, one per line")
+    add_filter_arguments(find)
+
+    search = commands.add_parser("search", help="Full-text search over thoughts, TODO lists, arguments and results")
+    search.add_argument("query", help="FTS5 query, e.g. 'moodle AND \"not found\"'")
+    search.add_argument("--kind", choices=TEXT_KINDS, default=None, help="Only this kind of text")
+    search.add_argument("--limit", type=int, default=20)
+    add_filter_arguments(search)
+
+    calls = commands.add_parser("calls", help="Function calls of a test in trace order")
+    calls.add_argument("test_id")
+    add_filter_arguments(calls)
+
+    return parser.parse_args()
+
+
+def first_line(text, width: int) -> str:
+    """First line of a text with whitespace collapsed, shortened to `width` characters."""
+    line = re.sub(r"\s+", " ", (text or "").strip().split("\n", 1)[0])
+    return line if len(line) <= width else line[:width - 1] + "…"
+
+
+def print_matches(rows, elapsed: float):
+    if rows:
+        print(f"{'Experiment':<22} {'Test':<14} {'Task Type':<24} {'Iterations':>10} {'Calls':>6} {'At':>5}")
+        print("─"*86)
+    for row in rows:
+        print(f"{row['experiment']:<22} {row['test_id']:<14} {row['task_type']:<24} "
+              f"{row['iterations']:>10} {row['calls']:>6} {row['matched_at']:>5}")
+    print(f"\n{len(rows)} test(s) in {elapsed * 1000:.1f} ms")
+
+
+def print_search(rows, elapsed: float):
+    for row in rows:
+        where = f"{row['kind']} of {row['call']}" if row["call"] else row["kind"]
+        print(f"{row['experiment']} / {row['test_id']} ({row['task_type']}) · {where} @ {row['seq']}")
+        print(f"    {first_line(row['snippet'], 120)}")
+    print(f"\n{len(rows)} match(es) in {elapsed * 1000:.1f} ms")
+
+
+def print_calls(rows):
+    experiment = None
+    for row in rows:
+        if row["experiment"] != experiment:
+            experiment = row["experiment"]
+            print(f"\n{experiment}")
+        indent = "  " * (row["depth"] + 1)
+        print(f"{row['seq']:>4} {indent}{row['function']} ({row['type']}) {first_line(row['args'], 60)}")
+        print(f"     {indent}  → {first_line(row['result'], 100)}")
+    if not rows:
+        print("No calls found")
+
+
+def main():
+    """Trace index entry point."""
+    args = parse_args()
+    index = TraceIndex(args.db)
+    try:
+        if args.command == "index":
+            for report_path in args.report_paths:
+                start_time = time.perf_counter()
+                result = index.index_report(report_path, args.experiment, force=args.force)
+                if result["indexed"]:
+                    print(f"✓ {report_path} as '{result['experiment']}': {result['tests']} tests, "
+                          f"{result['calls']} calls ({time.perf_counter() - start_time:.2f}s)")
+                else:
+                    print(f"· {report_path} as '{result['experiment']}': unchanged, already indexed")
+            return
+
+        start_time = time.perf_counter()
+        if args.command == "find":
+            rows = index.find(args.steps, args.experiment, args.task_type)
+        elif args.command == "search":
+            rows = index.search(args.query, args.kind, args.experiment, args.task_type, args.limit)
+        else:
+            rows = index.calls(args.test_id, args.experiment)
+        elapsed = time.perf_counter() - start_time
+
+        if args.json:
+            print(json.dumps(rows, indent=2, ensure_ascii=False))
+        elif args.command == "find" and args.ids:
+            for test_id in dict.fromkeys(row["test_id"] for row in rows):
+                print(test_id)
+        elif args.command == "find":
+            print_matches(rows, elapsed)
+        elif args.command == "search":
+            print_search(rows, elapsed)
+        else:
+            print_calls(rows)
+    except sqlite3.OperationalError as e:
+        # Malformed FTS5 queries
+        print(f"Query failed: {e}", file=sys.stderr)
+        sys.exit(2)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Local stand-in judge: a minimal OpenAI-compatible chat completions server.
+
+Answers every judge prompt with a deterministic, schema-valid response (no
+model involved), so the evaluation pipeline and the judge endpoint pool can be
+exercised without an API key or quota. Numbers stay in the metric's range:
+verdicts between 0 and 1, scores within the range the prompt asks for (GEval:
+0 to 10), so both passing and failing results come up. Start several on different ports to
+stand in for several endpoints:
+
+    python stub_judge_server.py --port 8801 &
+    python stub_judge_server.py --port 8802 --delay 0.5 &
+    python stub_judge_server.py --port 8803 --fail-rate 1.0 &
+
+with judge_endpoints.json such as
+    [{"name": "a", "base_url": "http://127.0.0.1:8801/v1"},
+     {"name": "b", "base_url": "http://127.0.0.1:8802/v1", "weight": 0.5},
+     {"name": "down", "base_url": "http://127.0.0.1:8803/v1"}]
+
+(any OPENAI_API_KEY value works). GET /stats returns the request counters.
+
+--malformed-rate mangles that share of the free-form (not schema-bound)
+answers the way real judges do, in repairable ways (code fence, trailing
+text, single quotes, cut-off object); --garbage-rate answers that share with
+prose that holds no JSON at all:
+
+    python stub_judge_server.py --port 8804 --malformed-rate 0.3 --garbage-rate 0.05 &
+
+It also stands in for the Batch API (files, batches and file content) used
+by evaluate_experiments.py --batch; a batch completes --batch-seconds after
+it is created, every line answered as a chat completions request would be:
+
+    python evaluate_experiments.py --batch --batch-base-url http://127.0.0.1:8801/v1 --batch-poll-seconds 1
+"""
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+
+SCORE_RANGE = re.compile(r"between (\d+) and (\d+)")
+
+
+def prompt_score_range(prompt: str) -> Tuple[int, int]:
+    """Score range a judge prompt asks for ("an integer between 0 and 10"); GEval's 0 to 10 if it names none."""
+    match = SCORE_RANGE.search(prompt)
+    return (int(match.group(1)), int(match.group(2))) if match else (0, 10)
+
+
+def stub_number(seed: int, low: float, high: float, integer: bool = False) -> float:
+    """One of eleven evenly spaced values from low to high, picked by the seed."""
+    value = low + (seed % 11) * (high - low) / 10
+    return round(value) if integer else round(value, 2)
+
+
+def synthesize(
+    schema: Dict[str, Any],
+    defs: Dict[str, Any],
+    seed: int,
+    score_range: Tuple[int, int] = (0, 10),
+    name: Optional[str] = None,
+) -> Any:
+    """Deterministic instance of a JSON schema.
+
+    Numbers use the schema's minimum and maximum if it has them; otherwise a
+    `verdict` is a 0 to 1 score (TaskCompletion, score-only verdicts) and any
+    other number is a score in `score_range`.
+    """
+    if "$ref" in schema:
+        return synthesize(defs[schema["$ref"].split("/")[-1]], defs, seed, score_range, name)
+    if "anyOf" in schema:
+        return synthesize(schema["anyOf"][0], defs, seed, score_range, name)
+    if "enum" in schema:
+        return schema["enum"][0]
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        return {
+            prop_name: synthesize(prop, defs, seed, score_range, prop_name)
+            for prop_name, prop in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        return [synthesize(schema.get("items", {}), defs, seed, score_range)]
+    if schema_type == "string":
+        # Free-text answers differ by prompt, so prompts built from them (TaskCompletion's verdict) differ too
+        return "yes" if name == "verdict" else f"Stub {name or 'text'} {seed % 97}."
+    if schema_type in ("number", "integer"):
+        if "minimum" in schema and "maximum" in schema:
+            low, high = schema["minimum"], schema["maximum"]
+        elif name == "verdict":
+            low, high = 0, 1
+        else:
+            low, high = score_range
+        return stub_number(seed, low, high, integer=schema_type == "integer")
+    if schema_type == "boolean":
+        return True
+    return None
+
+
+def mangle(content: str, kind: int) -> str:
+    """Nearly-valid variants of a JSON answer, as judges produce them."""
+    data = json.loads(content)
+    if kind == 0:
+        return f"```json\n{content}\n```"
+    if kind == 1:
+        return f"Here is my evaluation:\n{content}\nLet me know if anything {{else}} is needed."
+    if kind == 2:
+        return "{" + ", ".join(f"'{key}': {value!r}" for key, value in data.items()) + "}"
+    return content[:-max(2, len(content) // 4)]
+
+
+class StubJudge:
+    def __init__(self, delay: float, fail_rate: float, seed: int, malformed_rate: float = 0.0, garbage_rate: float = 0.0):
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.malformed_rate = malformed_rate
+        self.garbage_rate = garbage_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "failed": 0, "malformed": 0, "garbage": 0}
+
+    def respond(self, body: Dict[str, Any], delay: bool = True):
+        """Return (status, payload) for a chat completions request."""
+        with self.lock:
+            self.stats["requests"] += 1
+            fail = self.random.random() < self.fail_rate
+            if fail:
+                self.stats["failed"] += 1
+            damage = self.random.random()
+            mangle_kind = self.random.randrange(4)
+        if delay:
+            time.sleep(self.delay)
+        if fail:
+            return 500, {"error": {"message": "stub judge failure", "type": "server_error"}}
+
+        prompt = body["messages"][-1]["content"]
+        seed = int(hashlib.md5(prompt.encode("utf-8")).hexdigest(), 16)
+        response_format = body.get("response_format")
+        if isinstance(response_format, dict) and response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            content = json.dumps(synthesize(schema, schema.get("$defs", {}), seed, prompt_score_range(prompt)))
+        else:
+            # GEval's raw (log-probability) calls ask for an integer score in the prompt's range
+            low, high = prompt_score_range(prompt)
+            content = json.dumps({"score": stub_number(seed, low, high, integer=True),
+                                  "reason": f"Stub judge reason {seed % 97}."})
+            if damage < self.garbage_rate:
+                content = "I am unable to provide an evaluation for this test case."
+            elif damage < self.garbage_rate + self.malformed_rate:
+                content = mangle(content, mangle_kind)
+            if damage < self.garbage_rate + self.malformed_rate:
+                with self.lock:
+                    self.stats["garbage" if damage < self.garbage_rate else "malformed"] += 1
+
+        return 200, {
+            "id": f"stub-{seed % 10**8}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": index,
+                "finish_reason": "stop",
+                "logprobs": None,
+                "message": {"role": "assistant", "content": content},
+            } for index in range(body.get("n") or 1)],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            },
+        }
+
+
+class StubBatches:
+    """Files and batches of the Batch API, answered by a StubJudge."""
+
+    def __init__(self, judge: StubJudge, batch_seconds: float):
+        self.judge = judge
+        self.batch_seconds = batch_seconds
+        self.lock = threading.Lock()
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+
+    def add_file(self, filename: str, content: bytes, purpose: str) -> Dict[str, Any]:
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        with self.lock:
+            self.files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose, "status": "processed"}
+
+    def create(self, body: Dict[str, Any]):
+        if body.get("input_file_id") not in self.files:
+            return 404, {"error": {"message": f"unknown file {body.get('input_file_id')}"}}
+        batch = {
+            "id": f"batch_{uuid.uuid4().hex[:24]}",
+            "object": "batch",
+            "endpoint": body.get("endpoint"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        with self.lock:
+            self.batches[batch["id"]] = batch
+        threading.Thread(target=self._run, args=(batch["id"],), daemon=True).start()
+        return 200, batch
+
+    def _run(self, batch_id: str):
+        started = time.monotonic()
+        batch = self.batches[batch_id]
+        lines = [json.loads(line) for line in self.files[batch["input_file_id"]].decode("utf-8").splitlines() if line]
+        batch["request_counts"]["total"] = len(lines)
+        outputs, errors = [], []
+        for line in lines:
+            status, payload = self.judge.respond(line["body"], delay=False)
+            result = {"id": f"batch_req_{uuid.uuid4().hex[:24]}", "custom_id": line["custom_id"]}
+            if status == 200:
+                outputs.append({**result, "response": {"status_code": 200, "request_id": payload["id"], "body": payload},
+                                "error": None})
+                batch["request_counts"]["completed"] += 1
+            else:
+                errors.append({**result, "response": {"status_code": status, "body": payload},
+                               "error": {"code": "server_error", "message": payload["error"]["message"]}})
+                batch["request_counts"]["failed"] += 1
+        time.sleep(max(0.0, self.batch_seconds - (time.monotonic() - started)))
+        output = self.add_file(f"{batch_id}_output.jsonl", "".join(json.dumps(o) + "\n" for o in outputs).encode(),
+                               "batch_output")
+        error = self.add_file(f"{batch_id}_errors.jsonl", "".join(json.dumps(e) + "\n" for e in errors).encode(),
+                              "batch_output") if errors else None
+        with self.lock:
+            batch.update(status="completed", completed_at=int(time.time()), output_file_id=output["id"],
+                         error_file_id=error["id"] if error else None)
+
+
+def parse_multipart(content_type: str, data: bytes) -> Dict[str, Any]:
+    """Fields of a multipart/form-data body: {name: (filename or None, bytes)}."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + data
+    )
+    return {
+        part.get_param("name", header="content-disposition"): (part.get_filename(), part.get_payload(decode=True))
+        for part in message.iter_parts()
+    }
+
+
+def make_handler(judge: StubJudge, batches: StubBatches):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: Dict[str, Any]):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            path = self.path.rstrip("/")
+            data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if path.endswith("/chat/completions"):
+                self._send(*judge.respond(json.loads(data)))
+            elif path.endswith("/files"):
+                fields = parse_multipart(self.headers.get("Content-Type", ""), data)
+                filename, content = fields.get("file", (None, b""))
+                purpose = (fields.get("purpose") or (None, b"batch"))[1].decode("utf-8")
+                self._send(200, batches.add_file(filename or "upload.jsonl", content, purpose))
+            elif path.endswith("/batches"):
+                self._send(*batches.create(json.loads(data)))
+            else:
+                self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/stats":
+                with judge.lock:
+                    self._send(200, dict(judge.stats))
+            elif "/batches/" in path:
+                batch = batches.batches.get(path.rsplit("/", 1)[-1])
+                if batch is None:
+                    self._send(404, {"error": {"message": f"unknown batch {path}"}})
+                else:
+                    with batches.lock:
+                        self._send(200, json.loads(json.dumps(batch)))
+            elif "/files/" in path and path.endswith("/content"):
+                content = batches.files.get(path.split("/")[-2])
+                if content is None:
+                    self._send(404, {"error": {"message": f"unknown file {path}"}})
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+            else:
+                self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in judge (OpenAI-compatible).")
+    parser.add_argument("--port", type=int, default=8801)
+    parser.add_argument("--delay", type=float, default=0.05, help="Seconds per response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with HTTP 500")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for which requests fail")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Share of free-form answers returned as nearly-valid (repairable) JSON")
+    parser.add_argument("--garbage-rate", type=float, default=0.0,
+                        help="Share of free-form answers returned as prose without JSON")
+    parser.add_argument("--batch-seconds", type=float, default=2.0, help="Seconds until a submitted batch completes")
+    args = parser.parse_args()
+
+    judge = StubJudge(args.delay, args.fail_rate, args.seed, args.malformed_rate, args.garbage_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(judge, StubBatches(judge, args.batch_seconds)))
+    print(f"Stub judge on http://127.0.0.1:{args.port}/v1 (delay {args.delay:g}s, fail rate {args.fail_rate:g}, "
+          f"malformed rate {args.malformed_rate:g}, garbage rate {args.garbage_rate:g})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
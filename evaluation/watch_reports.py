@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Watch mode: evaluate agent reports as soon as they land.
+
+Polls a report directory and evaluates every new or rewritten report file in
+one long-running process. Metric objects, the judge's HTTP connection pools,
+the judge-call cache and hedging latencies stay warm between reports, and
+calibration runs once at startup instead of once per report.
+
+Each report_<name>.json is written to <watch_dir>/evaluation_<name>/analysis.json,
+the same layout as the EXPERIMENTS in eval_framework/config.py.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from eval_framework import (
+    add_evaluation_arguments,
+    setup_evaluation,
+    run_calibration,
+    evaluate_report,
+    output_dir_for,
+)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Evaluate agent reports as they are written.")
+    parser.add_argument("watch_dir", nargs="?", default="./report")
+    parser.add_argument("--interval", type=float, default=2.0,
+                        help="Seconds between directory polls")
+    parser.add_argument("--existing", action="store_true",
+                        help="Also evaluate reports that are already in the directory at startup")
+    add_evaluation_arguments(parser)
+    return parser.parse_args()
+
+
+def is_report(path: Path) -> bool:
+    """Only complete agent reports (JSON with testEntries) are evaluated."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return isinstance(data, dict) and "testEntries" in data
+
+
+def snapshot(watch_dir: Path) -> Dict[Path, Tuple[float, int]]:
+    """(mtime, size) of every JSON file directly in the watched directory."""
+    files = {}
+    for path in watch_dir.glob("*.json"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        files[path] = (stat.st_mtime, stat.st_size)
+    return files
+
+
+class ReportWatcher:
+    """Detects reports that are new or rewritten and no longer being written.
+
+    A file counts as written once its (mtime, size) is unchanged between two
+    polls, so reports copied or streamed into the directory are not read half-way.
+    """
+
+    def __init__(self, watch_dir: Path, include_existing: bool = False):
+        self.watch_dir = watch_dir
+        self._previous = snapshot(watch_dir)
+        self._handled: Dict[Path, Tuple[float, int]] = {} if include_existing else dict(self._previous)
+
+    def poll(self) -> List[Path]:
+        current = snapshot(self.watch_dir)
+        ready = [
+            path for path, signature in sorted(current.items())
+            if self._previous.get(path) == signature and self._handled.get(path) != signature
+        ]
+        self._previous = current
+        for path in ready:
+            self._handled[path] = current[path]
+        return [path for path in ready if is_report(path)]
+
+
+def main():
+    """Evaluate reports as they land until interrupted."""
+    args = parse_args()
+    watch_dir = Path(args.watch_dir)
+    if not watch_dir.is_dir():
+        raise SystemExit(f"Not a directory: {watch_dir}")
+
+    # Reports that land while calibration runs still count as new
+    watcher = ReportWatcher(watch_dir, include_existing=args.existing)
+
+    setup = setup_evaluation(args, pooled=True)
+    calibration_summary = run_calibration(setup)
+
+    print(f"Watching {watch_dir} for reports (polling every {args.interval:g}s, Ctrl-C to stop)\n")
+
+    evaluated = 0
+    try:
+        while True:
+            for report_path in watcher.poll():
+                output_dir = output_dir_for(report_path)
+                print(f"\n▶ New report: {report_path} → {output_dir}")
+                setup.run_stats.reset()
+                setup.profiler.reset()
+                setup.runner.restart_budget()
+                started = time.monotonic()
+                try:
+                    output_path = evaluate_report(args, setup, str(report_path), str(output_dir), calibration_summary)
+                except Exception as e:
+                    # Keep watching; the report is retried once it is rewritten
+                    print(f"✗ Evaluation of {report_path} failed: {e}")
+                    continue
+                evaluated += 1
+                print(f"✓ {output_path} written in {time.monotonic() - started:.1f}s")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print(f"\nStopped watching {watch_dir} ({evaluated} report(s) evaluated).")
+
+
+if __name__ == "__main__":
+    main()